@@ -0,0 +1,25 @@
+"""
+Timing helpers shared by the benchmark scripts, so they all measure the same way.
+"""
+import timeit
+
+
+def best_time(func, repeat=3, number=1):
+    """Returns the best seconds per call of func, out of repeat batches of number calls."""
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number
+
+
+def calls_per_batch(func, min_time):
+    """Returns the number of calls to func that take at least min_time seconds, for timing fast functions."""
+    number, seconds = timeit.Timer(func).autorange()
+    return max(1, int(number * min_time / max(seconds, 1e-9)))
+
+
+def bench(name, func, count=None, repeat=3):
+    """Prints the best time of func and, if func does count operations, the operations per second."""
+    seconds = best_time(func, repeat)
+    line = "{0:<30} {1:>10.1f} ms".format(name, seconds * 1000)
+    if count is not None:
+        line += " {0:>10.0f} ops/s".format(count / seconds)
+    print(line)
+    return seconds
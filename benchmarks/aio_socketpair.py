@@ -0,0 +1,81 @@
+"""
+Sends length-prefixed Buffer messages over a socketpair loopback with asyncio and measures the throughput of
+BufferWriter + BufferFramedProtocol, compared to a write per message + `await Message.read_from(reader)` loop.
+
+Run with: python benchmarks/aio_socketpair.py (Python 3 only)
+"""
+import asyncio
+import socket
+
+from _common import best_time
+
+from infi.instruct.buffer import Buffer, be_uint_field, str_field, bytes_ref, len_ref, num_ref, self_ref
+from infi.instruct.buffer.aio import BufferFramedProtocol, BufferWriter
+
+N = 20000
+
+
+class Message(Buffer):
+    length = be_uint_field(where=bytes_ref[0:4], set_before_pack=len_ref(self_ref.body))
+    body = str_field(where=bytes_ref[4:4 + num_ref(self_ref.length)])
+
+
+async def framed_protocol(messages):
+    loop = asyncio.get_running_loop()
+    done = loop.create_future()
+    received = []
+
+    def record_received(obj):
+        received.append(obj)
+        if len(received) == len(messages):
+            done.set_result(None)
+
+    server_sock, client_sock = socket.socketpair()
+    transport, _ = await loop.connect_accepted_socket(lambda: BufferFramedProtocol(Message, record_received),
+                                                      server_sock)
+    _, stream_writer = await asyncio.open_connection(sock=client_sock)
+    writer = BufferWriter(stream_writer)
+    for i, message in enumerate(messages):
+        writer.write(message)
+        if i % 100 == 0:
+            await writer.drain()
+    await writer.drain()
+    await done
+    stream_writer.close()
+    transport.close()
+
+
+async def stream_reader(messages):
+    server_sock, client_sock = socket.socketpair()
+    reader, server_writer = await asyncio.open_connection(sock=server_sock)
+    _, stream_writer = await asyncio.open_connection(sock=client_sock)
+
+    async def write_all():
+        for i, message in enumerate(messages):
+            stream_writer.write(message.pack())
+            if i % 100 == 0:
+                await stream_writer.drain()
+
+    write_task = asyncio.ensure_future(write_all())
+    for _ in messages:
+        await Message.read_from(reader)
+    await write_task
+    stream_writer.close()
+    server_writer.close()
+
+
+def bench(name, coroutine_func, messages):
+    total_bytes = sum(len(message.pack()) for message in messages)
+    seconds = best_time(lambda: asyncio.run(coroutine_func(messages)))
+    print("{0:<40} {1:>10.0f} msgs/s {2:>8.1f} MB/s".format(name, len(messages) / seconds,
+                                                            total_bytes / seconds / 1e6))
+
+
+def main():
+    messages = [Message(body="enclosure status {0}".format(i) * 4) for i in range(N)]
+    bench("BufferWriter + BufferFramedProtocol", framed_protocol, messages)
+    bench("StreamWriter + Message.read_from", stream_reader, messages)
+
+
+if __name__ == '__main__':
+    main()
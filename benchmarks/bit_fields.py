@@ -0,0 +1,86 @@
+"""
+Unpacks and packs bit-heavy buffers - an IPv4 header and the control bytes of SCSI CDBs - and reads and writes
+unaligned bit ranges straight from a BitView and an OutputBuffer.
+
+Run with: python benchmarks/bit_fields.py
+"""
+from _common import bench
+
+from infi.instruct.buffer import Buffer, be_uint_field, uint_field, bytes_ref
+from infi.instruct.buffer.io_buffer import BitView, OutputBuffer
+from infi.instruct.buffer.range import SequentialRange, SequentialRangeList
+
+N = 2000
+
+
+class IPv4Header(Buffer):
+    ihl = uint_field(where=bytes_ref[0].bits[0:4])
+    version = uint_field(where=bytes_ref[0].bits[4:8])
+    ecn = uint_field(where=bytes_ref[1].bits[0:2])
+    dscp = uint_field(where=bytes_ref[1].bits[2:8])
+    total_length = be_uint_field(where=bytes_ref[2:4])
+    identification = be_uint_field(where=bytes_ref[4:6])
+    fragment_offset = uint_field(where=bytes_ref[6:8].bits[3:16])
+    flags = uint_field(where=bytes_ref[6].bits[0:3])
+    ttl = uint_field(where=bytes_ref[8:9])
+    protocol = uint_field(where=bytes_ref[9:10])
+    checksum = be_uint_field(where=bytes_ref[10:12])
+    source = be_uint_field(where=bytes_ref[12:16])
+    destination = be_uint_field(where=bytes_ref[16:20])
+
+
+class Control(Buffer):
+    link = uint_field(where=bytes_ref[0].bits[0:1])
+    obsolete = uint_field(where=bytes_ref[0].bits[1:2])
+    naca = uint_field(where=bytes_ref[0].bits[2:3])
+    reserved = uint_field(where=bytes_ref[0].bits[3:6])
+    vendor_specific = uint_field(where=bytes_ref[0].bits[6:8])
+
+
+class Read16Control(Buffer):
+    opcode = uint_field(where=bytes_ref[0:1])
+    dld2 = uint_field(where=bytes_ref[1].bits[0:1])
+    fua_nv = uint_field(where=bytes_ref[1].bits[1:2])
+    fua = uint_field(where=bytes_ref[1].bits[3:4])
+    dpo = uint_field(where=bytes_ref[1].bits[4:5])
+    rdprotect = uint_field(where=bytes_ref[1].bits[5:8])
+    logical_block_address = be_uint_field(where=bytes_ref[2:10])
+    transfer_length = be_uint_field(where=bytes_ref[10:14])
+    group_number = uint_field(where=bytes_ref[14].bits[0:5])
+    dld = uint_field(where=bytes_ref[14].bits[6:8])
+    link = uint_field(where=bytes_ref[15].bits[0:1])
+    naca = uint_field(where=bytes_ref[15].bits[2:3])
+    vendor_specific = uint_field(where=bytes_ref[15].bits[6:8])
+
+
+IPV4 = IPv4Header(version=4, ihl=5, dscp=0, ecn=0, total_length=84, identification=0x1234, flags=2,
+                  fragment_offset=0x1a5, ttl=64, protocol=1, checksum=0, source=0x0a000001,
+                  destination=0x0a000002).pack()
+READ16 = Read16Control(opcode=0x88, dld2=0, fua_nv=0, fua=1, dpo=0, rdprotect=0, logical_block_address=0x12345678,
+                       transfer_length=8, group_number=0, dld=0, link=0, naca=1, vendor_specific=2).pack()
+
+
+# 3-bit flags packed back to back over a 64 byte page, like the control fields of SES elements.
+FLAG_RANGES = [SequentialRangeList([SequentialRange(bit / 8.0, (bit + 3) / 8.0)]) for bit in range(0, 64 * 8 - 3, 3)]
+
+
+def set_flags():
+    output = OutputBuffer(bytearray(64))
+    for positions in FLAG_RANGES:
+        output.set(b"\x05", positions)
+
+
+def main():
+    ipv4, read16 = IPv4Header(), Read16Control()
+    view = BitView(IPV4)
+    bench("ipv4 header unpack", lambda: [ipv4.unpack(IPV4) for _ in range(N)], N)
+    bench("read16 unpack", lambda: [read16.unpack(READ16) for _ in range(N)], N)
+    bench("ipv4 header pack", lambda: [ipv4.pack() for _ in range(N)], N)
+    bench("read16 pack", lambda: [read16.pack() for _ in range(N)], N)
+    bench("set 170 flags in 64 bytes", lambda: [set_flags() for _ in range(N // 10)], N // 10)
+    bench("bitview unaligned to_bytes", lambda: [view[6.375:20.375].to_bytes() for _ in range(N)], N)
+    bench("bitview unaligned iter", lambda: [list(view[6.375:8]) for _ in range(N)], N)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+Constructs and packs instances of a deep Buffer class hierarchy, like vendor-specific mode page subclasses that each
+add a few fields to a common page header.
+
+Run with: python benchmarks/deep_inheritance.py
+"""
+from _common import bench
+
+from infi.instruct.buffer import Buffer, be_uint_field, str_field, bytes_ref, len_ref, num_ref, self_ref
+
+N = 2000
+DEPTH = 8
+
+
+class PageHeader(Buffer):
+    page_code = be_uint_field(where=bytes_ref[0:1])
+    page_length = be_uint_field(where=bytes_ref[1:2], set_before_pack=len_ref(self_ref.vendor_data))
+    vendor_data = str_field(where=bytes_ref[2:2 + num_ref(self_ref.page_length)])
+
+
+def make_hierarchy(depth):
+    cls = PageHeader
+    for level in range(depth):
+        offset = 64 + level * 4
+        attrs = {"level{0}_a".format(level): be_uint_field(where=bytes_ref[offset:offset + 2]),
+                 "level{0}_b".format(level): be_uint_field(where=bytes_ref[offset + 2:offset + 4])}
+        cls = type("VendorPage{0}".format(level), (cls,), attrs)
+    return cls
+
+
+def main():
+    cls = make_hierarchy(DEPTH)
+    values = dict(("level{0}_{1}".format(level, suffix), level) for level in range(DEPTH) for suffix in "ab")
+    obj = cls(page_code=0x3f, vendor_data="vendor", **values)
+
+    bench("construct", lambda: [cls(page_code=0x3f, vendor_data="vendor", **values) for _ in range(N)], N)
+    bench("pack", lambda: [obj.pack() for _ in range(N)], N)
+    bench("construct + pack",
+          lambda: [cls(page_code=0x3f, vendor_data="vendor", **values).pack() for _ in range(N)], N)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+Packs and unpacks a list_field of 10k nested Buffers, both fixed-size and variable-size elements.
+
+Run with: python benchmarks/list_nested_buffers.py
+"""
+from _common import bench
+
+from infi.instruct.buffer import Buffer, be_uint_field, str_field, list_field, bytes_ref, len_ref, num_ref, self_ref
+
+N = 10000
+
+
+class FixedElement(Buffer):
+    lba = be_uint_field(where=bytes_ref[0:8])
+    length = be_uint_field(where=bytes_ref[8:12])
+
+
+class VarElement(Buffer):
+    name_len = be_uint_field(where=bytes_ref[0:1], set_before_pack=len_ref(self_ref.name))
+    name = str_field(where=bytes_ref[1:1 + num_ref(self_ref.name_len)])
+
+
+class FixedList(Buffer):
+    elements = list_field(where=bytes_ref[0:], type=FixedElement)
+
+
+class VarList(Buffer):
+    elements = list_field(where=bytes_ref[0:], type=VarElement)
+
+
+def main():
+    fixed = FixedList(elements=[FixedElement(lba=i, length=i % 512) for i in range(N)])
+    var = VarList(elements=[VarElement(name="element{0}".format(i)) for i in range(N)])
+    fixed_data, var_data = fixed.pack(), var.pack()
+
+    bench("pack 10k fixed elements", fixed.pack)
+    bench("unpack 10k fixed elements", lambda: FixedList().unpack(fixed_data))
+    bench("pack 10k variable elements", var.pack)
+    bench("unpack 10k variable elements", lambda: VarList().unpack(var_data))
+
+
+if __name__ == '__main__':
+    main()
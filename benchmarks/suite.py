@@ -0,0 +1,253 @@
+"""
+Pack/unpack throughput of the Buffer and Struct hot paths over realistic SCSI/SES data, reported in ops/s and bytes/s.
+
+Run with: python benchmarks/suite.py [-k SUBSTRING] [--save FILE] [--compare FILE]
+
+--save writes the results as JSON and --compare prints the change relative to a saved run, so a regression in
+`Reference.deref`, `BitView` or serialize.py shows up before a release. The suite doesn't need any external data.
+"""
+import sys
+import json
+import argparse
+
+from _common import best_time, calls_per_batch
+
+from infi.instruct import Struct, BitFields, BitField, BitPadding, BitFlag, UBInt8, Padding, PaddedString, Lazy
+from infi.instruct.buffer import (Buffer, be_int_field, be_uint_field, str_field, list_field, buffer_field,
+                                  bytearray_field, bytes_ref, total_size, after_ref, member_func_ref, str_type,
+                                  len_ref, num_ref, self_ref, b_uint16)
+
+# The SES configuration diagnostic page from tests/test_buffer_ses.py (sg_ses -p 0x1 of a NEWISYS NDS-4600-JD).
+SES_PAGE_SAMPLE = \
+    (b"\x01\x00\x00\xCC" +
+     b"\x00\x00\x00\x01\x12\x00\x08\x24\x50\x00\x93\xD0\x00\x6A\x70\x00" +
+     b"\x4E\x45\x57\x49\x53\x59\x53\x20\x4E\x44\x53\x2D\x34\x36\x30\x30" +
+     b"\x2D\x4A\x44\x20\x20\x20\x20\x20\x42\x35\x30\x37\x17\x3C\x00\x10" +
+     b"\x9E\x01\x00\x10\x02\x02\x00\x10\x03\x04\x00\x10\x04\x06\x00\x10" +
+     b"\x06\x01\x00\x10\x07\x02\x00\x10\x18\x06\x00\x10\x41\x72\x72\x61" +
+     b"\x79\x20\x44\x65\x76\x20\x53\x6C\x6F\x74\x20\x20\x34\x36\x30\x30" +
+     b"\x20\x45\x6E\x63\x6C\x6F\x73\x75\x72\x65\x20\x20\x50\x6F\x77\x65" +
+     b"\x72\x20\x53\x75\x70\x70\x6C\x79\x20\x20\x20\x20\x43\x6F\x6F\x6C" +
+     b"\x69\x6E\x67\x20\x46\x61\x6E\x20\x20\x20\x20\x20\x54\x65\x6D\x70" +
+     b"\x20\x53\x65\x6E\x73\x6F\x72\x20\x20\x20\x20\x20\x42\x75\x7A\x7A" +
+     b"\x65\x72\x20\x20\x20\x20\x20\x20\x20\x20\x20\x20\x45\x53\x20\x50" +
+     b"\x72\x6F\x63\x65\x73\x73\x6F\x72\x20\x20\x20\x20\x53\x41\x53\x20" +
+     b"\x45\x78\x70\x61\x6E\x64\x65\x72\x20\x20\x20\x20")
+
+STANDARD_INQUIRY_SAMPLE = (b"\x00\x00\x05\x02[\x00\x00\x00ATA     ST9320423AS     0003" + b"\x00" * 20 +
+                           b"\x00\x00\x00`\x03 \x02`" + b"\x00" * 32)
+
+
+class Read10(Buffer):
+    opcode = be_uint_field(where=bytes_ref[0], set_before_pack=0x28)
+    lba = be_uint_field(where=bytes_ref[2:6])
+    group = be_uint_field(where=bytes_ref[6])
+    transfer_length = be_uint_field(where=bytes_ref[7:9])
+    control = be_uint_field(where=bytes_ref[9])
+
+
+class Read16Flags(Buffer):
+    opcode = be_uint_field(where=bytes_ref[0], set_before_pack=0x88)
+    dld2 = be_uint_field(where=bytes_ref[1].bits[0:1])
+    rarc = be_uint_field(where=bytes_ref[1].bits[2:3])
+    fua = be_uint_field(where=bytes_ref[1].bits[3:4])
+    dpo = be_uint_field(where=bytes_ref[1].bits[4:5])
+    rdprotect = be_uint_field(where=bytes_ref[1].bits[5:8])
+    lba = be_uint_field(where=bytes_ref[2:10])
+    transfer_length = be_uint_field(where=bytes_ref[10:14])
+    group = be_uint_field(where=bytes_ref[14].bits[0:5])
+    dld0_1 = be_uint_field(where=bytes_ref[14].bits[6:8])
+    control = be_uint_field(where=bytes_ref[15])
+
+
+class EnclosureDescriptor(Buffer):
+    enclosure_services_processes_num = be_int_field(where=bytes_ref[0].bits[0:3])
+    relative_enclosure_services_process_identifier = be_int_field(where=bytes_ref[0].bits[4:7])
+    subenclosure_identifier = be_int_field(where=bytes_ref[1])
+    type_descriptor_headers_num = be_int_field(where=bytes_ref[2])
+    enclosure_descriptor_length = be_int_field(where=bytes_ref[3])
+    enclosure_logical_identifier = bytearray_field(where=bytes_ref[4:12])
+    enclosure_vendor_identification = str_field(where=bytes_ref[12:20])
+    product_identification = str_field(where=bytes_ref[20:36])
+    product_revision_level = str_field(where=bytes_ref[36:40])
+    vendor_specific_enclosure_information = bytearray_field(where_when_pack=bytes_ref[40:],
+                                                            where_when_unpack=bytes_ref[40:enclosure_descriptor_length + 4])
+
+
+class TypeDescriptorHeader(Buffer):
+    element_type = be_int_field(where=bytes_ref[0])
+    possible_elements_num = be_int_field(where=bytes_ref[1])
+    subenclosure_identifier = be_int_field(where=bytes_ref[2])
+    type_descriptor_text_length = be_int_field(where=bytes_ref[3])
+
+
+class ConfigurationDiagnosticPage(Buffer):
+    def _calc_num_type_descriptor_headers(self):
+        return sum(desc.type_descriptor_headers_num for desc in self.enclosure_descriptor_list)
+
+    def _unpack_type_descriptor_text(self, buffer, index, **kwargs):
+        l = self.type_descriptor_header_list[index].type_descriptor_text_length
+        return buffer[0:l].to_bytes(), l
+
+    page_code = be_int_field(where=bytes_ref[0])
+    secondary_subenclosures_num = be_int_field(where=bytes_ref[1])
+    page_length = be_int_field(where=bytes_ref[2:4], set_before_pack=total_size - 4)
+    generation_code = be_int_field(where=bytes_ref[4:8])
+    enclosure_descriptor_list = list_field(type=EnclosureDescriptor, where=bytes_ref[8:],
+                                           n=secondary_subenclosures_num + 1)
+    type_descriptor_header_list = list_field(where=bytes_ref[after_ref(enclosure_descriptor_list):],
+                                             type=TypeDescriptorHeader,
+                                             n=member_func_ref(_calc_num_type_descriptor_headers))
+    type_descriptor_text_list = list_field(where=bytes_ref[after_ref(type_descriptor_header_list):],
+                                           type=str_type, unpack_selector=_unpack_type_descriptor_text,
+                                           n=member_func_ref(_calc_num_type_descriptor_headers))
+
+
+class LbaStatusDescriptor(Buffer):
+    lba = be_uint_field(where=bytes_ref[0:8])
+    blocks = be_uint_field(where=bytes_ref[8:12])
+    provisioning_status = be_uint_field(where=bytes_ref[12].bits[0:4])
+
+
+class LbaStatusPage(Buffer):
+    parameter_data_length = be_uint_field(where=bytes_ref[0:4], set_before_pack=total_size - 4)
+    descriptors = list_field(type=LbaStatusDescriptor, where_when_pack=bytes_ref[8:],
+                             where_when_unpack=bytes_ref[8:parameter_data_length + 4])
+
+
+class WordList(Buffer):
+    count = be_uint_field(where=bytes_ref[0:4], set_before_pack=len_ref(self_ref.words))
+    words = list_field(type=b_uint16, where=bytes_ref[4:], n=num_ref(self_ref.count))
+
+
+class Designator(Buffer):
+    code_set = be_uint_field(where=bytes_ref[0].bits[0:4])
+    designator_type = be_uint_field(where=bytes_ref[1].bits[0:4])
+    designator_length = be_uint_field(where=bytes_ref[3], set_before_pack=len_ref(self_ref.designator))
+    designator = bytearray_field(where=bytes_ref[4:4 + num_ref(self_ref.designator_length)])
+
+
+class DeviceIdentificationHeader(Buffer):
+    page_code = be_uint_field(where=bytes_ref[0], set_before_pack=0x83)
+    page_length = be_uint_field(where=bytes_ref[2:4])
+
+
+class DeviceIdentificationPage(Buffer):
+    header = buffer_field(type=DeviceIdentificationHeader, where=bytes_ref[0:4])
+    naa = buffer_field(type=Designator, where=bytes_ref[4:])
+    target_port = buffer_field(type=Designator, where=bytes_ref[after_ref(naa):])
+    sizes = buffer_field(type=WordList, where=bytes_ref[after_ref(target_port):])
+
+
+class StandardInquiryData(Struct):
+    _fields_ = [
+        Lazy(
+            BitFields(BitField("peripheral_device_type", 5), BitField("peripheral_qualifier", 3)),
+            BitFields(BitPadding(7), BitFlag("rmb")),
+            UBInt8("version"),
+            BitFields(BitField("response_data_format", 4), BitFlag("hisup"), BitFlag("normaca"), BitPadding(2)),
+            UBInt8("additional_length"),
+            BitFields(BitFlag("protect"), BitPadding(2), BitFlag("3pc"), BitField("tpgs", 2), BitFlag("acc"),
+                      BitFlag("sccs")),
+            BitFields(BitPadding(1), BitFlag("enc_serv"), BitFlag("vs"), BitFlag("multi_p"), BitPadding(3),
+                      BitFlag("addr16")),
+            BitFields(BitPadding(2), BitFlag("wbus16"), BitFlag("sync"), BitPadding(2), BitFlag("cmd_que"),
+                      BitFlag("vs")),
+            PaddedString("t10_vendor_identification", 8),
+            PaddedString("product_identification", 16),
+            PaddedString("product_revision_level", 4),
+        ),
+        Padding(60),
+    ]
+
+
+class Case(object):
+    """A benchmark case: packing obj and unpacking its packed form with a new instance of its class."""
+    def __init__(self, name, obj, records=1):
+        self.name = name
+        self.obj = obj
+        self.records = records  # e.g. the number of list elements, for the records/s column
+
+    def pack(self):
+        return self.obj.pack()
+
+    def unpack(self, data):
+        type(self.obj)().unpack(data)
+
+    def data(self):
+        return bytes(self.pack())
+
+
+class StructCase(Case):
+    def pack(self):
+        return type(self.obj).write_to_string(self.obj)
+
+    def unpack(self, data):
+        type(self.obj).create_from_string(data)
+
+
+def make_cases():
+    ses_page = ConfigurationDiagnosticPage()
+    ses_page.unpack(SES_PAGE_SAMPLE)
+    descriptors = [LbaStatusDescriptor(lba=i * 2048, blocks=2048, provisioning_status=i % 3) for i in range(1000)]
+    naa = Designator(code_set=1, designator_type=3, designator=bytearray(b"\x60\x02\x24\x80\x00\x00\x12\x34"))
+    port = Designator(code_set=1, designator_type=4, designator=bytearray(b"\x00\x00\x00\x01"))
+    device_identification = DeviceIdentificationPage(header=DeviceIdentificationHeader(page_length=24), naa=naa,
+                                                     target_port=port, sizes=WordList(words=list(range(16))))
+    return [
+        Case("static cdb (read10)", Read10(lba=0x12345678, group=0, transfer_length=8, control=0)),
+        Case("bit fields (read16)", Read16Flags(dld2=0, rarc=0, fua=1, dpo=1, rdprotect=3, lba=1 << 40,
+                                                transfer_length=256, group=5, dld0_1=1, control=0)),
+        Case("ses configuration page", ses_page),
+        Case("list_field 1k nested", LbaStatusPage(descriptors=descriptors), records=len(descriptors)),
+        Case("list_field 10k uint16", WordList(words=[i % 65536 for i in range(10000)]), records=10000),
+        Case("nested buffer_field", device_identification),
+        StructCase("struct inquiry data", StandardInquiryData.create_from_string(STANDARD_INQUIRY_SAMPLE)),
+    ]
+
+
+def measure(func, min_time):
+    """Returns the best seconds per call of func, calling it in batches that take at least min_time seconds."""
+    return best_time(func, number=calls_per_batch(func, min_time))
+
+
+def run(cases, min_time):
+    results = dict()
+    print("{0:<26} {1:<7} {2:>12} {3:>12} {4:>12}".format("case", "op", "ops/s", "MB/s", "records/s"))
+    for case in cases:
+        data = case.data()
+        for op, func in (("pack", case.pack), ("unpack", lambda: case.unpack(data))):
+            seconds = measure(func, min_time)
+            result = dict(ops=1 / seconds, bytes=len(data) / seconds, records=case.records / seconds)
+            results["{0}/{1}".format(case.name, op)] = result
+            print("{0:<26} {1:<7} {2:>12.0f} {3:>12.2f} {4:>12.0f}".format(case.name, op, result["ops"],
+                                                                         result["bytes"] / 1e6, result["records"]))
+    return results
+
+
+def compare(results, baseline):
+    print("\nchange in ops/s relative to the baseline:")
+    for key in sorted(results):
+        if key in baseline:
+            print("{0:<35} {1:>+8.1%}".format(key, results[key]["ops"] / baseline[key]["ops"] - 1))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("-k", dest="filter", default="", help="run only the cases whose name contains this string")
+    parser.add_argument("--min-time", type=float, default=0.2, help="minimum seconds per measurement")
+    parser.add_argument("--save", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="compare the results to a JSON file written by --save")
+    args = parser.parse_args(argv)
+
+    results = run([case for case in make_cases() if args.filter in case.name], args.min_time)
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,38 @@
+"""
+Measures the throughput of expected unpack failures, like probing a device with page formats it may not support, and
+the cost of formatting the error message when it is needed.
+
+Run with: python benchmarks/unpack_failures.py
+"""
+from _common import bench
+
+from infi.instruct.buffer import Buffer, be_uint_field, str_field, list_field, bytes_ref, num_ref, self_ref, b_uint16
+from infi.instruct.buffer.buffer import InstructBufferError
+
+N = 2000
+
+
+class Page(Buffer):
+    page_code = be_uint_field(where=bytes_ref[0:1])
+    page_length = be_uint_field(where=bytes_ref[1:3])
+    descriptors = list_field(where=bytes_ref[3:3 + num_ref(self_ref.page_length)], type=b_uint16)
+    vendor = str_field(where=bytes_ref[3 + num_ref(self_ref.page_length):3 + num_ref(self_ref.page_length) + 8])
+
+
+TRUNCATED = Page(page_code=0x3f, page_length=64, descriptors=list(range(32)), vendor="vendor").pack()[:-4]
+
+
+def probe():
+    try:
+        Page().unpack(TRUNCATED)
+    except InstructBufferError as error:
+        return error
+
+
+def main():
+    bench("failed unpack", lambda: [probe() for _ in range(N)], N)
+    bench("failed unpack + str(error)", lambda: [str(probe()) for _ in range(N)], N)
+
+
+if __name__ == "__main__":
+    main()
@@ -25,6 +25,14 @@ if PY2:
 
     import collections as abc
 
+    import binascii
+
+    def int_from_bytes_le(data):
+        return long(binascii.hexlify(str(bytearray(reversed(bytearray(data))))) or '0', 16)
+
+    def int_to_bytes_le(value, length):
+        return bytearray(reversed(bytearray(binascii.unhexlify('%0*x' % (length * 2, value)))))
+
 else:
     from itertools import repeat
     from io import BytesIO as StringIO
@@ -45,3 +53,9 @@ else:
         return list(d.values())
 
     import collections.abc as abc
+
+    def int_from_bytes_le(data):
+        return int.from_bytes(data, 'little')
+
+    def int_to_bytes_le(value, length):
+        return value.to_bytes(length, 'little')
@@ -1,3 +1,4 @@
 # flake8: noqa
 from .buffer import Buffer, BufferType
+from .stream import scan_mmap
 from .macros import *
@@ -0,0 +1,108 @@
+"""
+asyncio support for Buffer framing (Python 3 only, so it isn't imported by the package - see `BufferType.read_from`).
+"""
+import asyncio
+
+from .io_buffer import BitView
+from .stream import record_bytes_needed
+
+
+async def read_record(buffer_type, reader):
+    """
+    Reads a single buffer_type record from an asyncio.StreamReader. Returns None if the stream ended before the record
+    started and raises asyncio.IncompleteReadError if it ended in the middle of the record.
+    """
+    data = bytearray()
+    record_size = record_bytes_needed(buffer_type, data)
+    while record_size > len(data):
+        try:
+            data += await reader.readexactly(record_size - len(data))
+        except asyncio.IncompleteReadError as error:
+            if not data and not error.partial:
+                return None
+            raise
+        record_size = record_bytes_needed(buffer_type, data)
+    obj = buffer_type()
+    obj.unpack(data)
+    return obj
+
+
+class BufferFramedProtocol(asyncio.Protocol):
+    """
+    A protocol that parses buffer_type records out of the received data and calls `record_received` for each one.
+
+    Received chunks are appended to a receive buffer that's consumed from an offset. The number of bytes a partially
+    received record needs is remembered, so its size is recalculated only when at least that many bytes arrived
+    instead of re-parsing it on every chunk.
+    """
+    def __init__(self, buffer_type, record_received=None):
+        super(BufferFramedProtocol, self).__init__()
+        self.buffer_type = buffer_type
+        self.transport = None
+        self._record_received = record_received
+        self._buffer = bytearray()
+        self._offset = 0
+        self._bytes_needed = 0
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def data_received(self, data):
+        self._buffer += data
+        while len(self._buffer) - self._offset >= self._bytes_needed:
+            record_size = record_bytes_needed(self.buffer_type, self._buffer, self._offset)
+            if record_size > len(self._buffer) - self._offset:
+                self._bytes_needed = record_size
+                break
+            obj = self.buffer_type()
+            if self.buffer_type.__lazy__:
+                obj.unpack(bytes(self._buffer[self._offset:self._offset + record_size]))  # it keeps a reference to it
+            else:
+                obj.unpack(BitView(self._buffer, self._offset, self._offset + record_size))
+                obj._unpack_all_lazy_fields()  # lazy Buffers nested in it must not refer to the receive buffer
+            self._offset += record_size
+            self._bytes_needed = 0
+            self.record_received(obj)
+
+        # We drop the consumed bytes only once they're at least half the buffer, so this is amortized O(1) per byte.
+        if self._offset and self._offset * 2 >= len(self._buffer):
+            del self._buffer[:self._offset]
+            self._offset = 0
+
+    def record_received(self, obj):
+        """Called for each received record. Calls the record_received callback by default."""
+        if self._record_received is not None:
+            self._record_received(obj)
+
+
+class BufferWriter(object):
+    """
+    Writes Buffer objects to an asyncio.StreamWriter. Packed objects are coalesced and handed to the transport in
+    batches of at least coalesce_size bytes, since each transport write has a fixed overhead. Like
+    `StreamWriter.write`, `write` doesn't block - call `drain` regularly to flush and wait while the transport's buffer
+    is above its high-water mark.
+    """
+    def __init__(self, writer, coalesce_size=64 * 1024):
+        self.writer = writer
+        self.coalesce_size = coalesce_size
+        self._pending = bytearray()
+
+    def write(self, obj):
+        self._pending += obj.pack()
+        if len(self._pending) >= self.coalesce_size:
+            self.flush()
+
+    def writelines(self, objs):
+        for obj in objs:
+            self.write(obj)
+
+    def flush(self):
+        """Hands the coalesced data to the transport without waiting."""
+        if self._pending:
+            # The transport may keep a reference to the data, so we give it away instead of reusing it.
+            data, self._pending = self._pending, bytearray()
+            self.writer.write(data)
+
+    async def drain(self):
+        self.flush()
+        await self.writer.drain()
@@ -1,71 +1,98 @@
 import math
-import itertools
+import importlib
 from six import add_metaclass
-import six
 
 from infi.exceptools import chain as chain_exceptions
-from infi.instruct.utils.safe_repr import safe_repr
-from infi.instruct.errors import InstructError
+from .._compat import PY2, range
 
 from .range import SequentialRangeList
-from .reference import Reference, FieldReference, PackContext, UnpackContext, TotalSizeReference
-from .io_buffer import InputBuffer, OutputBuffer
-
-
-class InstructBufferError(InstructError):
-    MESSAGE = """{error_msg} - attribute '{attr_name}' in class '{clazz}':
-  Resolved References:
-{resolved_references}
-
-  Instruct internal call stack:
-{context_call_stack}"""
-
-    def __init__(self, error_msg, ctx, clazz, attr_name):
-        # Format the context call stack, so it will be clearer.
-        context_call_stack = "\n".join(["    {0}".format(line) for line in ctx.format_exception_call_stack()])
-
-        # Format a list of all resolved references, remove identity ones (e.g. 1=1, etc.) and show only uniques
-        resolved_reference_pairs = [(safe_repr(key), repr(value)) for key, value in six.iteritems(ctx.cached_results)]
-        resolved_reference_str_list = sorted(["    {0}={1}".format(a, b) for a, b in resolved_reference_pairs
-                                              if a != b])
-        resolved_references = "\n".join(s for s, _ in itertools.groupby(resolved_reference_str_list))
-        msg = type(self).MESSAGE.format(error_msg=error_msg, attr_name=attr_name, clazz=clazz,
-                                        context_call_stack=context_call_stack, resolved_references=resolved_references)
-        super(InstructBufferError, self).__init__(msg)
-
-        self.clazz = clazz
-        self.attr_name = attr_name
+from .reference import Reference, FieldReference, PackContext, UnpackContext, TotalSizeReference, index_fields_by_name
+from .io_buffer import BitView, InputBuffer, OutputBuffer
+from .field_reference_builder import check_position_list
+from .fused import compile_fused_struct
+from .plan import compile_plan
+from .numpy_dtype import numpy_dtype, unpack_numpy_records
+from .stream import iter_from_stream
+from .errors import InstructBufferError
 
 
 class BufferType(type):
     """Meta class for Buffer classes.
-    This meta-class does two things:
+    This meta-class does the following:
       * Copy the fields declared as attributes on the object for "safe keeping" to `__fields__` since they're going to
         get overwritten by actual values once the instance is created. It also sets the field name for each field
         reference since the name is an rvalue (e.g. when evaluating `foo = int_field()` we are unaware of `foo` in the
         scope of `int_field`).
+      * Collects the fields of the class and its bases to `__all_fields__` (a tuple in MRO order) and
+        `__fields_by_name__`, so instances don't walk the MRO or search the fields by name.
       * If there's no `byte_size` attribute already existing it tries to calculate and add a `byte_size` class
         attribute - this applies only to buffers that have fixed positions.
+      * If all the fields are standard-width ints/floats in fixed positions, it compiles a `FusedStruct` so pack and
+        unpack can be done with a single `struct.Struct` (see fused.py).
+      * Compiles an `EvaluationPlan` that orders the fields by their dependencies (see plan.py).
+      * If the class sets `__compact__ = True` (or inherits it), the field values are stored in `__slots__` instead of
+        a per-instance `__dict__` and a specialized `__init__` is generated. Compact instances are always unpacked
+        eagerly, since lazy unpacking relies on the instance's `__dict__`.
+    It also provides class-level methods that unpack arrays of records (`iter_unpack`, `unpack_many` and the NumPy
+    based `to_numpy_dtype` and `unpack_numpy`), read records from a stream (`iter_from_stream` and the asyncio based
+    `read_from`) and lazily unpack a single record (`unpack_lazy`).
     """
     def __new__(cls, name, bases, attrs):
         # If we initialize our own class don't do any modifications.
         if name == "Buffer":
             return super(BufferType, cls).__new__(cls, name, bases, attrs)
 
+        inherits_compact = any(getattr(base, '__compact__', False) for base in bases)
+        compact = attrs.get('__compact__', inherits_compact)
+        compact_fields = []
+        if compact:
+            # The field references are replaced by slots, which can't coexist with class attributes of the same name.
+            attrs = dict(attrs)
+            for attr_name in sorted(attrs):
+                if isinstance(attrs[attr_name], FieldReference) and not attrs[attr_name].is_initialized():
+                    attrs[attr_name].init(attr_name)
+                    compact_fields.append(attrs.pop(attr_name))
+            attrs['__slots__'] = (tuple(attrs.get('__slots__', ())) +
+                                  tuple(field.attr_name() for field in compact_fields))
+
         new_cls = super(BufferType, cls).__new__(cls, name, bases, attrs)
+        for field in compact_fields:
+            setattr(new_cls, field.attr_name(), _CompactField(field, new_cls.__dict__[field.attr_name()]))
 
         # First off, assign names and getters/setters to all the field references and find all the fields.
-        fields = []
+        fields = compact_fields
         for attr_name in dir(new_cls):
             attr = getattr(new_cls, attr_name)
             if isinstance(attr, FieldReference) and not attr.is_initialized():
                 attr.init(attr_name)
                 fields.append(attr)
 
+        cls.check_static_positions(name, fields)
         setattr(new_cls, 'byte_size', attrs['byte_size'] if 'byte_size' in attrs else cls.calc_byte_size(name, fields))
         setattr(new_cls, '__fields__', fields)
+
+        all_fields = tuple(field for c in new_cls.mro() for field in getattr(c, '__fields__', []))
+        setattr(new_cls, '__all_fields__', all_fields)
+        setattr(new_cls, '__fields_by_name__', index_fields_by_name(all_fields))
+        setattr(new_cls, '__fused_struct__', compile_fused_struct(all_fields, new_cls.byte_size))
+        setattr(new_cls, '__evaluation_plan__', compile_plan(all_fields))
+        if (compact or inherits_compact) and '__init__' not in attrs and _is_generated_init(new_cls.__init__):
+            setattr(new_cls, '__init__', _compact_init(new_cls, all_fields))
         return new_cls
 
+    @classmethod
+    def check_static_positions(cls, class_name, fields):
+        """Checks the static positions of the fields once, so packing and unpacking don't need to check them."""
+        ctx = PackContext(None, fields)
+        for field in fields:
+            try:
+                for position_ref in (field.pack_absolute_position_ref, field.unpack_absolute_position_ref):
+                    if position_ref.static_position_list is not None:
+                        check_position_list(position_ref.static_position_list)
+            except:
+                raise chain_exceptions(InstructBufferError("Invalid field position", ctx, class_name,
+                                                           field.attr_name()))
+
     @classmethod
     def calc_byte_size(cls, class_name, fields):
         ctx = PackContext(None, fields)
@@ -81,70 +108,418 @@ class BufferType(type):
                                                            class_name, field.attr_name()))
         return positions.max_stop()
 
+    def iter_unpack(cls, buffer, count=None):
+        """
+        Unpacks a contiguous array of records of this (static byte size) class from buffer, like `struct.iter_unpack`.
+        If count is None the buffer's length must be a multiple of the byte size. Returns an iterator of the unpacked
+        instances. The buffer's size is checked right away, not when the iteration starts.
+        """
+        byte_size = cls._record_byte_size()
+        view = buffer if isinstance(buffer, BitView) else BitView(buffer)
+        available = view.length()
+        if count is None:
+            count = int(available // byte_size)
+            if count * byte_size != available:
+                raise ValueError("buffer size {0} is not a multiple of {1}'s byte size {2}".format(available, cls,
+                                                                                                   byte_size))
+        elif count * byte_size > available:
+            raise ValueError("unpacking {0} records of {1} requires a buffer of at least {2} bytes but its size is {3}"
+                             .format(count, cls, count * byte_size, available))
+        return cls._iter_unpack(view, byte_size, count)
+
+    def _iter_unpack(cls, view, byte_size, count):
+        fused_struct = cls.__fused_struct__
+        if fused_struct is not None and view.start_bit % 8 == 0:
+            for values in fused_struct.iter_unpack(view.buffer, view.start_bit // 8, count):
+                obj = cls()
+                fused_struct.set_values(obj, values)
+                yield obj
+        else:
+            for i in range(count):
+                start = view.start + i * byte_size
+                obj = cls()
+                obj.unpack(BitView(view.buffer, start, start + byte_size))
+                yield obj
+
+    def unpack_many(cls, buffer, count=None):
+        """Same as `iter_unpack`, but returns a list of the unpacked instances."""
+        return list(cls.iter_unpack(buffer, count))
+
+    def iter_from_stream(cls, stream):
+        """
+        Yields successive instances read from a binary stream (e.g. a file) until it ends. Records may have a variable
+        size: each record's size is learned from its header (length fields, etc.) and exactly that many bytes are read
+        into a reusable buffer. Classes with a field that extends to the end of the buffer can't be read this way.
+        """
+        return iter_from_stream(cls, stream)
+
+    def read_from(cls, reader):
+        """
+        Returns a coroutine that reads a single instance from an asyncio.StreamReader, e.g.
+        `obj = await Foo.read_from(reader)`. The coroutine returns None if the stream ended. Python 3 only (see aio.py).
+        """
+        return importlib.import_module(".aio", __package__).read_record(cls, reader)
+
+    def unpack_lazy(cls, buffer):
+        """
+        Returns a new instance that keeps a reference to buffer and decodes each field only on first access (along with
+        the fields it depends on), caching the result. Decoding errors are raised on access. Classes can also set
+        `__lazy__ = True` to make `unpack` lazy.
+        """
+        obj = cls()
+        obj._unpack_lazy(buffer)
+        return obj
+
+    def to_numpy_dtype(cls):
+        """
+        Returns a NumPy structured dtype with explicit offsets for this class. All the fields must be int, float or str
+        fields at static, byte-aligned positions. Requires NumPy, which is an optional dependency.
+        """
+        return numpy_dtype(cls, cls.__evaluation_plan__.fields, cls._record_byte_size())
+
+    def unpack_numpy(cls, buffer, count=-1, offset=0):
+        """
+        Returns a zero-copy NumPy record array of this class' records in buffer (see `to_numpy_dtype`), so fields can
+        be accessed as columns (e.g. `records.lba`). str fields are returned as raw, undecoded bytes.
+        """
+        return unpack_numpy_records(cls.to_numpy_dtype(), buffer, count, offset)
+
+    def _record_byte_size(cls):
+        byte_size = cls.byte_size
+        if byte_size is None or int(byte_size) != byte_size or byte_size == 0:
+            raise TypeError("{0} doesn't have a static, whole-byte size so it can't be used as an array of records"
+                            .format(cls))
+        return int(byte_size)
+
+
+class _CompactField(object):
+    """
+    Wraps the slot of a compact class' field. Accessing it through the class returns the field reference, like in
+    other classes (e.g. `after_ref(Foo.f_str)` in a subclass), and accessing it through an instance uses the slot.
+    """
+    __slots__ = ('field', 'slot')
+
+    def __init__(self, field, slot):
+        self.field = field
+        self.slot = slot
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self.field
+        return self.slot.__get__(obj, objtype)
+
+    def __set__(self, obj, value):
+        self.slot.__set__(obj, value)
+
+    def __delete__(self, obj):
+        self.slot.__delete__(obj)
+
+
+def _compact_init(buffer_type, fields):
+    """Returns an `__init__` for a compact class that sets all the fields without looking them up per instance."""
+    defaults = tuple((field.attr_name(), _slot_setter(buffer_type, field.attr_name()), field.default)
+                     for field in fields)
+
+    def __init__(self, **kwargs):
+        for name, set_value, default in defaults:
+            set_value(self, kwargs.pop(name, default) if kwargs else default)
+        assert not kwargs, ("fields {0} in class {1} are not defined but passed to Buffer's __init__"
+                            .format(sorted(kwargs), buffer_type))
+    __init__.__compact_init__ = True
+    return __init__
+
+
+def _slot_setter(buffer_type, name):
+    """Returns a function that sets the attribute name, setting the slot directly if it's a compact field."""
+    attr = next((c.__dict__[name] for c in buffer_type.__mro__ if name in c.__dict__), None)
+    if isinstance(attr, _CompactField):
+        return attr.slot.__set__
+    return lambda obj, value: setattr(obj, name, value)  # e.g. a field of a base class that isn't compact
+
+
+def _is_generated_init(init):
+    """Returns True if init is `Buffer.__init__` or one made by `_compact_init`, so it may be replaced by the latter."""
+    init = getattr(init, '__func__', init)
+    return init is getattr(Buffer.__init__, '__func__', Buffer.__init__) or getattr(init, '__compact_init__', False)
+
 
 @add_metaclass(BufferType)
 class Buffer(object):
+    __slots__ = ()  # so compact subclasses don't have a __dict__
+    __all_fields__ = ()
+    __fields_by_name__ = {}
+    __fused_struct__ = None
+    __evaluation_plan__ = None
+    __lazy__ = False
+    __compact__ = False
+    _lazy_unpack_context = None
 
     def __init__(self, **kwargs):
         super(Buffer, self).__init__()
 
-        field_names = self._all_field_names()
+        fields_by_name = type(self).__fields_by_name__
         for name, value in kwargs.items():
-            assert name in field_names, ("field {0} in class {1} is not defined but passed to Buffer's __init__"
-                                         .format(name, type(self)))
+            assert name in fields_by_name, ("field {0} in class {1} is not defined but passed to Buffer's __init__"
+                                            .format(name, type(self)))
             setattr(self, name, value)
 
-        # Set to default all fields that don't have a value (we know that since they're still FieldReference objects)
-        for field in self._all_fields():
-            if isinstance(getattr(self, field.attr_name()), FieldReference):
+        # Set to default all fields that don't have a value (we know that since they're still FieldReference objects,
+        # or unset slots in compact classes)
+        for field in type(self).__all_fields__:
+            value = getattr(self, field.attr_name(), field)
+            if isinstance(value, FieldReference):
                 setattr(self, field.attr_name(), field.default)
 
     def pack(self):
         """Packs the object and returns a buffer representing the packed object."""
-        fields = self._all_fields()
-        ctx = PackContext(self, fields)
+        fused_struct = type(self).__fused_struct__
+        if fused_struct is not None:
+            try:
+                return fused_struct.pack(self)
+            except Exception:
+                pass  # fall back to the generic path, which will raise a detailed error if it fails as well
 
-        for field in fields:
+        ctx, packed_fields, byte_size = self._resolve_packed_fields()
+        ctx.output_buffer = OutputBuffer(bytearray(byte_size))
+        self._write_packed_fields(ctx, packed_fields)
+        return ctx.output_buffer.to_bytearray()
+
+    def pack_into(self, target, offset=0):
+        """
+        Packs the object directly into a writable buffer (e.g. bytearray, memoryview or mmap) starting at offset, like
+        `struct.pack_into`. Returns the number of bytes written.
+        """
+        if offset < 0:
+            raise ValueError("offset must be non-negative but is {0}".format(offset))
+        fused_struct = type(self).__fused_struct__
+        if fused_struct is not None:
+            try:
+                return fused_struct.pack_into(self, target, offset)
+            except Exception:
+                pass
+
+        if PY2:
+            # Python 2's memoryview items are strings, so we can't do bit operations on them.
+            packed = self.pack()
+            target_view = memoryview(target)
+            self._check_pack_into_size(target_view, offset, len(packed))
+            target_view[offset:offset + len(packed)] = bytes(packed)
+            return len(packed)
+
+        ctx, packed_fields, byte_size = self._resolve_packed_fields()
+        # The views are released explicitly, since the context may outlive this call (e.g. mmap.close() would fail).
+        with memoryview(target) as target_view, target_view.cast('B') as byte_view:
+            self._check_pack_into_size(byte_view, offset, byte_size)
+            with byte_view[offset:offset + byte_size] as window:
+                window[:] = bytes(byte_size)  # gaps between the fields are zeroed, same as in pack()
+                ctx.output_buffer = OutputBuffer(window)
+                self._write_packed_fields(ctx, packed_fields)
+        return byte_size
+
+    def _check_pack_into_size(self, target_view, offset, byte_size):
+        if offset + byte_size > len(target_view):
+            raise ValueError("pack_into requires a buffer of at least {0} bytes for packing {1} bytes at offset {2} "
+                             "(actual buffer size is {3})".format(offset + byte_size, byte_size, offset,
+                                                                  len(target_view)))
+
+    def _resolve_packed_fields(self):
+        """
+        Resolves the packed value and position of each field, so we know the total size in advance and can write all
+        the fields into a preallocated buffer.
+        :returns: (ctx, list of (field, packed value, absolute positions), byte size)
+        """
+        plan = type(self).__evaluation_plan__
+        ctx = PackContext(self, plan.fields, check_cycles=not plan.pack_acyclic,
+                          fields_by_name=type(self).__fields_by_name__)
+
+        packed_fields = []
+        for field in plan.pack_order:
             if field.pack_if.deref(ctx):
-                try:
-                    ctx.output_buffer.set(field.pack_ref.deref(ctx), field.pack_absolute_position_ref.deref(ctx))
-                except:
-                    raise chain_exceptions(InstructBufferError("Pack error occured", ctx, type(self),
-                                                               field.attr_name()))
+                packed_fields.append(self._pack_field(ctx, field))
 
-        result = bytearray(ctx.output_buffer.get())
+        byte_size = int(math.ceil(max([positions.max_stop() for _, _, positions in packed_fields] + [0])))
 
         # We want to support the user defining the buffer's fixed byte size but not using it all:
         static_byte_size = type(self).byte_size
         if static_byte_size:
             static_byte_size = int(math.ceil(static_byte_size))
-            assert len(result) <= static_byte_size, \
+            assert byte_size <= static_byte_size, \
                 ("in type {0} computed pack size is {1} but declared byte size is {2} - perhaps you manually defined " +
-                 "the byte size in the type but the actual size is bigger?").format(type(self), len(result),
+                 "the byte size in the type but the actual size is bigger?").format(type(self), byte_size,
                                                                                     static_byte_size)
-            if len(result) < static_byte_size:
-                result += bytearray(static_byte_size - len(result))
-        return result
+            byte_size = static_byte_size
 
-    def unpack(self, buffer):
-        """Unpacks the object's fields from buffer."""
-        fields = self._all_fields()
-        ctx = UnpackContext(self, fields, buffer)
+        return ctx, packed_fields, byte_size
 
-        for field in fields:
+    def _pack_field(self, ctx, field):
+        """Returns (field, packed value, absolute positions)."""
+        try:
+            return field, field.pack_ref.deref(ctx), field.pack_absolute_position_ref.deref(ctx)
+        except:
+            raise chain_exceptions(InstructBufferError("Pack error occured", ctx, type(self), field.attr_name()))
+
+    def _write_packed_fields(self, ctx, packed_fields):
+        for field, value, positions in packed_fields:
             try:
-                if field.unpack_if.deref(ctx):
-                    # TODO: get rid of unpack_after once we use dependencies as we should.
-                    for prev_field in field.unpack_after:
-                        prev_field.unpack_value_ref.deref(ctx)
-                    field.unpack_value_ref.deref(ctx)
-                else:
-                    setattr(self, field.attr_name(), None)
+                ctx.output_buffer.set(value, positions)
             except:
-                raise chain_exceptions(InstructBufferError("Unpack error occurred", ctx, type(self), field.attr_name()))
+                raise chain_exceptions(InstructBufferError("Pack error occured", ctx, type(self), field.attr_name()))
+
+    def unpack(self, buffer, fields=None):
+        """
+        Unpacks the object's fields from buffer. If the class sets `__lazy__ = True` and has a static byte size the
+        fields are decoded on first access instead (see `BufferType.unpack_lazy`). Lazy classes with a dynamic size are
+        unpacked eagerly, since the returned size (which e.g. list_field and buffer_field rely on) requires decoding
+        all the fields.
+
+        If fields (a list of field names) is passed, only these fields and the fields they depend on (e.g. a length
+        field) are decoded. The rest of the fields may be left as they are (fused classes decode all the fields since
+        it's cheaper). In this case the byte size is returned only if it's static and None otherwise, since
+        calculating it requires decoding all the fields.
+        """
+        if fields is not None:
+            return self._unpack_fields(buffer, fields)
+        if type(self).__lazy__ and not type(self).__compact__ and type(self).byte_size is not None:
+            return self._unpack_lazy(buffer)
+        self._reset_lazy_unpack()
+
+        fused_struct = type(self).__fused_struct__
+        if fused_struct is not None:
+            try:
+                fused_struct.unpack(self, buffer)
+                return type(self).byte_size
+            except Exception:
+                pass  # e.g. buffer is too short or isn't a bytes-like object, so let the generic path handle it
+
+        plan = type(self).__evaluation_plan__
+        ctx = UnpackContext(self, plan.fields, buffer, check_cycles=not plan.unpack_acyclic,
+                            fields_by_name=type(self).__fields_by_name__)
+
+        # Fields are unpacked in dependency order (including unpack_after), so their dependencies are already cached.
+        for field in plan.unpack_order:
+            self._unpack_field(ctx, field)
 
         return self.calc_byte_size(ctx)
 
+    def _unpack_fields(self, buffer, field_names):
+        self._reset_lazy_unpack()
+
+        fused_struct = type(self).__fused_struct__
+        if fused_struct is not None:
+            try:
+                fused_struct.unpack(self, buffer)
+                return type(self).byte_size
+            except Exception:
+                pass
+
+        plan = type(self).__evaluation_plan__
+        fields_by_name = type(self).__fields_by_name__
+        for name in field_names:
+            assert name in fields_by_name, "field {0} in class {1} is not defined but passed to unpack".format(name,
+                                                                                                          type(self))
+        ctx = UnpackContext(self, plan.fields, buffer, check_cycles=not plan.unpack_acyclic,
+                            fields_by_name=type(self).__fields_by_name__)
+        for field in plan.unpack_closure([fields_by_name[name] for name in field_names]):
+            self._unpack_field(ctx, field)
+        return type(self).byte_size
+
+    def _unpack_field(self, ctx, field):
+        try:
+            if field.unpack_if.deref(ctx):
+                field.unpack_value_ref.deref(ctx)
+            else:
+                setattr(self, field.attr_name(), None)
+        except:
+            raise chain_exceptions(InstructBufferError("Unpack error occurred", ctx, type(self), field.attr_name()))
+
+    def _unpack_lazy(self, buffer):
+        """
+        Keeps a reference to buffer and decodes each field (and the fields it depends on) on first access. Fields with
+        a set_after_unpack hook are decoded right away. Returns the byte size if it's static or None otherwise, since
+        calculating it requires decoding all the fields.
+        """
+        if type(self).__compact__:
+            self.unpack(buffer)  # undecoded fields are tracked with the instance's __dict__, which compact ones lack
+            return type(self).byte_size
+        self._reset_lazy_unpack()
+
+        fused_struct = type(self).__fused_struct__
+        if fused_struct is not None:
+            try:
+                fused_struct.unpack(self, buffer)  # a single struct call is cheaper than decoding fields on access
+                return type(self).byte_size
+            except Exception:
+                pass
+
+        plan = type(self).__evaluation_plan__
+        ctx = UnpackContext(self, plan.fields, buffer, check_cycles=not plan.unpack_acyclic,
+                            fields_by_name=type(self).__fields_by_name__)
+        ctx.lazy_fields = dict((field.attr_name(), field) for field in plan.fields)
+        for field in plan.fields:
+            if field.set_after_unpack is None:
+                vars(self).pop(field.attr_name(), None)  # so FieldReference.__get__ is called on access
+        self._lazy_unpack_context = ctx
+
+        self._unpack_lazy_fields([field for field in plan.fields if field.set_after_unpack is not None])
+        return type(self).byte_size
+
+    def __getstate__(self):
+        # Used by copy, deepcopy and pickle. A lazy unpack context refers to this object and to the unpacked buffer, so
+        # sharing it with a copy would decode the copy's fields into this object - we decode everything first instead.
+        ctx = self._lazy_unpack_context
+        if ctx is not None:
+            self._unpack_lazy_fields(list(ctx.lazy_fields.values()), cache=False)
+        slots = dict((name, getattr(self, name)) for cls in type(self).__mro__
+                     for name in cls.__dict__.get('__slots__', ()) if hasattr(self, name))
+        return (dict(vars(self)) if hasattr(self, '__dict__') else None), slots
+
+    def _unpack_all_lazy_fields(self):
+        """Decodes the fields left undecoded by a lazy unpack, in this object and in the Buffers nested in it."""
+        ctx = self._lazy_unpack_context
+        if ctx is not None:
+            self._unpack_lazy_fields(list(ctx.lazy_fields.values()), cache=False)
+        for field in type(self).__all_fields__:
+            value = getattr(self, field.attr_name(), None)
+            for item in (value if isinstance(value, list) else [value]):
+                if isinstance(item, Buffer):
+                    item._unpack_all_lazy_fields()
+
+    def _reset_lazy_unpack(self):
+        """Drops the context of a previous lazy unpack. Fields that weren't decoded yet are set to their defaults."""
+        ctx = self._lazy_unpack_context
+        if ctx is not None:
+            self._lazy_unpack_context = None
+            for name, field in ctx.lazy_fields.items():
+                if name not in vars(self):
+                    setattr(self, name, field.default)
+
+    def _unpack_lazy_fields(self, fields, cache=True):
+        ctx = self._lazy_unpack_context
+        pending = ctx.lazy_fields
+        # Values assigned after the lazy unpack win over the ones decoded as a dependency of another field.
+        assigned = dict((name, value) for name, value in vars(self).items() if name in pending)
+        try:
+            for field in type(self).__evaluation_plan__.unpack_closure(fields, cache):
+                if field.attr_name() in pending:
+                    self._unpack_field(ctx, field)
+                    del pending[field.attr_name()]
+        finally:
+            vars(self).update(assigned)
+        if not pending:
+            self._lazy_unpack_context = None  # everything's decoded so we can let go of the buffer
+
+    def unpack_from(self, source, offset=0):
+        """
+        Unpacks the object's fields from source starting at offset without slicing (copying) it, like
+        `struct.unpack_from`. Returns the unpacked byte size.
+        """
+        if offset < 0:
+            raise ValueError("offset must be non-negative but is {0}".format(offset))
+        view = BitView(source)
+        if offset > view.length():
+            raise ValueError("offset {0} is out of range for a buffer of {1} bytes".format(offset, view.length()))
+        return self.unpack(BitView(view.buffer, offset))
+
     def calc_byte_size(self, ctx=None):
         """
         Returns this instance's size. If the size has to be calculated it may require packing some of the fields.
@@ -153,17 +528,10 @@ class Buffer(object):
             ctx = PackContext(self, type(self).__fields__)
         return TotalSizeReference().deref(ctx)
 
-    def _all_fields(self):
-        fields = []
-        for cls in type(self).mro():
-            cls_fields = getattr(cls, '__fields__', [])
-            fields.extend(cls_fields)
-        return fields
-
-    def _all_field_names(self):
-        return set(field.attr_name() for field in self._all_fields())
-
     def __repr__(self):
-        fields = type(self).__fields__
-        repr_fields = ["{0}={1!r}".format(field.attr_name(), getattr(self, field.attr_name())) for field in fields]
+        # Fields that weren't lazily decoded yet aren't decoded here, since repr is also used when formatting errors.
+        lazy_fields = self._lazy_unpack_context.lazy_fields if self._lazy_unpack_context is not None else ()
+        repr_fields = ["{0}={1}".format(field.attr_name(), "<lazy>" if field.attr_name() in lazy_fields and
+                                        field.attr_name() not in vars(self) else repr(getattr(self, field.attr_name())))
+                       for field in type(self).__fields__]
         return "{0}.{1}({2})".format(type(self).__module__, type(self).__name__, ", ".join(repr_fields))
@@ -1,4 +1,5 @@
 from .._compat import PY2
+from .stream import RecordReader
 
 class StructTypeAdapter(object):
     def __init__(self, buffer_type):
@@ -17,12 +18,10 @@ class StructTypeAdapter(object):
         stream.write(packed_data)
 
     def create_from_stream(self, stream, context=None, *args, **kwargs):
-        if self.buffer_type.byte_size is not None:
-            packed_data = stream.read(self.buffer_type.byte_size)
-            result = self.buffer_type()
-            result.unpack(packed_data)
-            return result
-        raise ValueError("cannot unpack a non-fixed size buffer")
+        result = RecordReader(self.buffer_type, stream).read()
+        if result is None:
+            raise EOFError("stream ended before a {0} record could be read".format(self.buffer_type))
+        return result
 
     def min_max_sizeof(self):
         raise NotImplementedError()
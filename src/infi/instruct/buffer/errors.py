@@ -0,0 +1,52 @@
+import itertools
+import six
+
+from infi.instruct.utils.safe_repr import safe_repr
+from infi.instruct.errors import InstructError
+
+
+class InstructBufferError(InstructError):
+    MESSAGE = """{error_msg} - attribute '{attr_name}' in class '{clazz}':
+  Resolved References:
+{resolved_references}
+
+  Instruct internal call stack:
+{context_call_stack}"""
+
+    def __init__(self, error_msg, ctx, clazz, attr_name):
+        # Formatting the message requires repr-ing every resolved reference, so we only take a snapshot of the context
+        # here and format it on first str() - callers that expect failures (e.g. probing formats) never pay for it.
+        super(InstructBufferError, self).__init__(error_msg)
+        self.error_msg = error_msg
+        self.clazz = clazz
+        self.attr_name = attr_name
+        self._call_stack = list(ctx.exception_call_stack) if ctx.exception_call_stack is not None else []
+        self._cached_results = dict(ctx.cached_results)
+        self._message = None
+
+    def __str__(self):
+        if self._message is None:
+            self._message = self._format_message()
+        return self._message
+
+    @property
+    def args(self):
+        # args[0] is the full message, like it was when it was formatted in __init__.
+        return (str(self),)
+
+    @args.setter
+    def args(self, value):
+        self._message = str(value[0]) if len(value) == 1 else str(tuple(value))
+
+    def _format_message(self):
+        # Format the context call stack, so it will be clearer.
+        context_call_stack = "\n".join(["    {0!r}".format(line) for line in self._call_stack])
+
+        # Format a list of all resolved references, remove identity ones (e.g. 1=1, etc.) and show only uniques
+        resolved_reference_pairs = [(safe_repr(key), repr(value)) for key, value in six.iteritems(self._cached_results)]
+        resolved_reference_str_list = sorted(["    {0}={1}".format(a, b) for a, b in resolved_reference_pairs
+                                              if a != b])
+        resolved_references = "\n".join(s for s, _ in itertools.groupby(resolved_reference_str_list))
+        return type(self).MESSAGE.format(error_msg=self.error_msg, attr_name=self.attr_name, clazz=self.clazz,
+                                         context_call_stack=context_call_stack,
+                                         resolved_references=resolved_references)
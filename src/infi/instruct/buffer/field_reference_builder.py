@@ -8,19 +8,40 @@ from .reference import (Reference, Context, ContextGetAttrReference, ObjectRefer
 from .range import SequentialRangeList
 
 
+def resolve_static_position_list(position_ref):
+    """
+    Returns the range list of a position that depends neither on the object nor on the buffer (e.g. bytes_ref[2:4])
+    or None. The result is computed once, when the field is defined, and is shared (and never modified) by every pack
+    and unpack of the class, so static positions don't allocate new ranges each time.
+    """
+    return position_ref.deref(Context()) if position_ref.is_static() else None
+
+
+def check_position_list(position_list):
+    if position_list.has_overlaps():
+        raise ValueError("field position list has overlapping ranges")
+
+
 class PackAbsolutePositionReference(Reference):
     def __init__(self, field, pack_position_ref):
         super(PackAbsolutePositionReference, self).__init__(False)
         self.field = field
         self.pack_position_ref = pack_position_ref
+        self.static_position_list = resolve_static_position_list(pack_position_ref)
 
     def is_open(self, ctx):
-        return self.pack_position_ref.deref(ctx).is_open()
+        return self._position_list(ctx).is_open()
+
+    def _position_list(self, ctx):
+        if self.static_position_list is not None:
+            return self.static_position_list
+        return self.pack_position_ref.deref(ctx)
 
     def evaluate(self, ctx):
-        position_list = self.pack_position_ref.deref(ctx)
-        if position_list.has_overlaps():
-            raise ValueError("field position list has overlapping ranges")
+        position_list = self.static_position_list
+        if position_list is None:  # static positions are checked once by BufferType
+            position_list = self.pack_position_ref.deref(ctx)
+            check_position_list(position_list)
 
         if position_list.is_open():
             # We need the serialization result of this field to set the range. Note that we already checked if the
@@ -32,12 +53,12 @@ class PackAbsolutePositionReference(Reference):
                 abs_pos = pos.to_closed(pos.start + len(packed_field) - current_length)
                 absolute_position_list.append(abs_pos)
                 current_length += abs_pos.byte_length()
-            return absolute_position_list
+            return SequentialRangeList(absolute_position_list)
         else:
             return position_list
 
     def __safe_repr__(self):
-        return "pack_abs_position({0!r}, {1!r})".format(self.field, self.position_list)
+        return "pack_abs_position({0!r}, {1!r})".format(self.field, self.pack_position_ref)
 
 
 class UnpackAbsolutePositionReference(Reference):
@@ -47,14 +68,21 @@ class UnpackAbsolutePositionReference(Reference):
         super(UnpackAbsolutePositionReference, self).__init__(False)
         self.field = field
         self.unpack_position_ref = unpack_position_ref
+        self.static_position_list = resolve_static_position_list(unpack_position_ref)
 
     def is_open(self, ctx):
-        return self.unpack_position_ref.deref(ctx).is_open()
+        return self._position_list(ctx).is_open()
+
+    def _position_list(self, ctx):
+        if self.static_position_list is not None:
+            return self.static_position_list
+        return self.unpack_position_ref.deref(ctx)
 
     def evaluate(self, ctx):
-        position_list = self.unpack_position_ref.deref(ctx)
-        if position_list.has_overlaps():
-            raise ValueError("field position list has overlapping ranges")
+        position_list = self.static_position_list
+        if position_list is None:  # static positions are checked once by BufferType
+            position_list = self.unpack_position_ref.deref(ctx)
+            check_position_list(position_list)
 
         if position_list.is_open():
             buffer_len = ctx.input_buffer.length()
@@ -175,6 +203,8 @@ class FieldReferenceBuilder(object):
         # on Buffer, it will fill it in for us.
         self.field = FieldReference(self.numeric, None)
         self.field.default = self.default
+        self.field.set_before_pack = self.set_before_pack
+        self.field.set_after_unpack = self.set_after_unpack
         self.field.pack_if = Reference.to_ref(self.pack_if) if self.pack_if is not None else Reference.to_ref(True)
         self.field.unpack_if = Reference.to_ref(self.unpack_if) if self.unpack_if is not None else Reference.to_ref(True)
 
@@ -192,12 +222,16 @@ class FieldReferenceBuilder(object):
         pack_kwargs = dict(byte_size=PackSequentialRangeListByteLengthReference(self.field.pack_absolute_position_ref),
                            pack_size=self.pack_size)
         pack_kwargs.update(kwargs)
+        self.field.packer = packer
+        self.field.packer_kwargs = kwargs
         self.field.pack_ref = FuncCallReference(self.numeric, packer, self.field.pack_value_ref, **pack_kwargs)
 
     def set_unpacker(self, unpacker, **kwargs):
         unpack_kwargs = dict(byte_size=SequentialRangeListByteLengthReference(self.field.unpack_absolute_position_ref),
                              unpack_size=self.unpack_size)
         unpack_kwargs.update(kwargs)
+        self.field.unpacker = unpacker
+        self.field.unpacker_kwargs = kwargs
 
         self.field.unpack_ref = UnpackerReference(self.numeric, unpacker, self.field.unpack_absolute_position_ref,
                                                   **unpack_kwargs)
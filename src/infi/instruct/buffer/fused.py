@@ -0,0 +1,189 @@
+import struct
+import operator
+from sys import byteorder
+
+from .reference import Context, Reference
+from .io_buffer import BitView
+from .._compat import range
+
+# Maps a packer function to a (unpacker, struct_format) pair, where struct_format(kwargs) returns a struct format
+# string (e.g. '>H') for the marshaller's keyword arguments or None if the marshaller can't be expressed as a single
+# struct format character. Populated by serialize.py.
+STRUCT_MARSHALLERS = dict()
+
+# Maps both the packer and the unpacker function to struct_format.
+STRUCT_FORMATS = dict()
+
+NATIVE_BYTE_ORDER = '<' if byteorder == 'little' else '>'
+
+
+def register_struct_marshaller(packer, unpacker, struct_format):
+    STRUCT_MARSHALLERS[packer] = (unpacker, struct_format)
+    STRUCT_FORMATS[packer] = STRUCT_FORMATS[unpacker] = struct_format
+
+
+def marshaller_struct_format(marshaller):
+    """
+    Returns the struct format (e.g. '>H') of a fixed-width packer or unpacker created with `keep_kwargs_partial` (e.g.
+    the ones returned by `int_marshal`) or None if it isn't one.
+    """
+    struct_format = STRUCT_FORMATS.get(getattr(marshaller, 'func', None))
+    keywords = getattr(marshaller, 'keywords', None)
+    if struct_format is None or not keywords or keywords.get('byte_size') is None:
+        return None
+    format = struct_format(keywords)
+    if format is None or struct.calcsize(format) != keywords['byte_size']:
+        return None
+    return format
+
+
+class FusedStruct(object):
+    """
+    A precompiled `struct.Struct` covering all the fields of a static-layout Buffer class, used by `Buffer.pack` and
+    `Buffer.unpack` instead of resolving each field's references. Fields with a constant set_before_pack are set to
+    their constant before packing, like the generic path does.
+    """
+    def __init__(self, format, field_names, constants=()):
+        self.struct = struct.Struct(format)
+        self.byte_size = self.struct.size
+        self.field_names = tuple(field_names)
+        self.constants = tuple(constants)
+        self._get_values = operator.attrgetter(*self.field_names)
+
+    def pack(self, obj):
+        result = bytearray(self.byte_size)
+        self.pack_into(obj, result, 0)
+        return result
+
+    def pack_into(self, obj, target, offset):
+        for name, value in self.constants:
+            setattr(obj, name, value)
+        values = self._get_values(obj)
+        if len(self.field_names) == 1:
+            self.struct.pack_into(target, offset, values)
+        else:
+            self.struct.pack_into(target, offset, *values)
+        return self.byte_size
+
+    def unpack(self, obj, buffer):
+        if isinstance(buffer, BitView):
+            # e.g. a nested buffer_field - read from the underlying buffer at the view's offset.
+            if buffer.start_bit % 8 != 0 or buffer.bit_length() < self.byte_size * 8:
+                raise ValueError("{0!r} is not byte-aligned or is too short for {1!r}".format(buffer, self))
+            values = self.struct.unpack_from(buffer.buffer, buffer.start_bit // 8)
+        else:
+            values = self.struct.unpack_from(buffer)
+        self.set_values(obj, values)
+
+    def iter_unpack(self, buffer, offset, count):
+        """Yields the field values of count consecutive records in buffer, starting at offset."""
+        unpack_from = self.struct.unpack_from
+        for record_offset in range(offset, offset + count * self.byte_size, self.byte_size):
+            yield unpack_from(buffer, record_offset)
+
+    def set_values(self, obj, values):
+        for name, value in zip(self.field_names, values):
+            setattr(obj, name, value)
+
+    def __repr__(self):
+        return "FusedStruct(format={0!r}, field_names={1!r}, constants={2!r})".format(self.struct.format,
+                                                                                      self.field_names, self.constants)
+
+
+def _static_value(ref):
+    return ref.deref(Context()) if ref.is_static() else None
+
+
+def static_byte_range(field):
+    """
+    Returns (start, byte_size) if the field is always packed and unpacked at the same static, byte-aligned and closed
+    range, or None otherwise.
+    """
+    if _static_value(field.pack_if) is not True or _static_value(field.unpack_if) is not True:
+        return None
+
+    pack_position_ref = field.pack_absolute_position_ref.pack_position_ref
+    unpack_position_ref = field.unpack_absolute_position_ref.unpack_position_ref
+    if not (pack_position_ref.is_static() and unpack_position_ref.is_static()):
+        return None
+    position_list = pack_position_ref.deref(Context())
+    if len(position_list) != 1 or position_list != unpack_position_ref.deref(Context()):
+        return None
+    position = position_list[0]
+    if position.is_open() or (position.start_bit | position.stop_bit) % 8 != 0:
+        return None
+    return position.start_bit // 8, position.bit_length() // 8
+
+
+def field_struct_format(field):
+    """Returns (start, byte_size, byte_order, format_char) for a standard-width int/float field or None."""
+    if field.packer not in STRUCT_MARSHALLERS:
+        return None
+    unpacker, struct_format = STRUCT_MARSHALLERS[field.packer]
+    if field.unpacker is not unpacker:
+        return None
+    byte_range = static_byte_range(field)
+    if byte_range is None:
+        return None
+    start, byte_size = byte_range
+
+    kwargs = dict(byte_size=byte_size)
+    kwargs.update(field.packer_kwargs)
+    if kwargs['byte_size'] != byte_size:
+        return None
+    format = struct_format(kwargs)
+    if format is None or struct.calcsize(format) != byte_size:
+        return None
+    byte_order, format_char = format[0], format[1:]
+    if byte_order == '@':
+        return None
+    elif byte_order == '=':
+        byte_order = NATIVE_BYTE_ORDER
+    return start, byte_size, byte_order, format_char
+
+
+def compile_fused_struct(fields, byte_size):
+    """
+    Tries to compile a `FusedStruct` for a Buffer class. This is possible only if the class has a static integral byte
+    size and all its fields are standard-width ints or floats placed at static, byte-aligned and non-overlapping
+    positions, have no set_before_pack/set_after_unpack hooks (other than a constant set_before_pack, e.g. a CDB's
+    opcode) and are always packed/unpacked.
+    :returns: FusedStruct or None if the fields can't be fused
+    """
+    if not fields or byte_size is None or int(byte_size) != byte_size:
+        return None
+
+    field_formats = []
+    constants = []
+    for field in fields:
+        if field.set_after_unpack is not None:
+            return None
+        if field.set_before_pack is not None:
+            if isinstance(field.set_before_pack, Reference) or callable(field.set_before_pack):
+                return None
+            constants.append((field.attr_name(), field.set_before_pack))
+        field_format = field_struct_format(field)
+        if field_format is None:
+            return None
+        field_formats.append((field_format, field.attr_name()))
+    field_formats.sort(key=lambda pair: pair[0][0])
+
+    byte_orders = set(field_format[2] for field_format, _ in field_formats if field_format[1] > 1)
+    if len(byte_orders) > 1:
+        return None
+
+    format = [byte_orders.pop() if byte_orders else '<']
+    offset = 0
+    for (start, size, _, format_char), _ in field_formats:
+        if start < offset:
+            return None  # overlapping fields
+        if start > offset:
+            format.append("{0}x".format(start - offset))
+        format.append(format_char)
+        offset = start + size
+    if offset > byte_size:
+        return None
+    if offset < byte_size:
+        format.append("{0}x".format(int(byte_size) - offset))
+
+    return FusedStruct("".join(format), [name for _, name in field_formats], constants)
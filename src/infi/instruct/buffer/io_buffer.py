@@ -1,5 +1,5 @@
-import math
-from .._compat import is_string_or_bytes, range, PY2, abc
+from .._compat import is_string_or_bytes, range, PY2, abc, int_from_bytes_le, int_to_bytes_le
+from .range import bytes_to_bits, bits_to_bytes
 from six import integer_types
 
 
@@ -16,34 +16,70 @@ class BitView(abc.Sequence):
     bits_2_and_3 = bit_view[0.125 * 2:0.125 * 4]
 
     Basically, you can access the buffer with 1/8 fractions.
+
+    Slicing a BitView doesn't copy the underlying buffer - it returns a new view over the same buffer with different
+    start/stop offsets (start and stop are always in the underlying buffer's coordinates). On Python 3 bytes and
+    memoryview objects are wrapped by a memoryview, so the caller's buffer isn't copied either.
+
+    Internally the view keeps integer bit offsets (start_bit and stop_bit); start and stop are the same offsets in
+    (possibly fractional) bytes.
     """
 
     def __init__(self, buffer, start=0, stop=None):
         super(BitView, self).__init__()
-        # FIXME: On Python 2.7 there's no bytes() type (immutable byte sequence).
-        if is_string_or_bytes(buffer):
+        if not PY2 and isinstance(buffer, bytes):
+            self.buffer = memoryview(buffer)
+        elif not PY2 and isinstance(buffer, memoryview) and buffer.format != 'B':
+            self.buffer = buffer.cast('B')
+        elif is_string_or_bytes(buffer):
+            # FIXME: On Python 2.7 there's no bytes() type (immutable byte sequence).
             self.buffer = bytearray(buffer)
         else:
             self.buffer = buffer
-        self.start = start if start is not None else 0
-        self.stop = stop if stop is not None else len(buffer)
-        assert self.start >= 0
-        assert self.stop <= len(buffer)
-        assert self.start <= self.stop
+        self.start_bit = bytes_to_bits(start) if start is not None else 0
+        # len() of the (possibly cast) underlying buffer, since a non-byte memoryview's len() counts items.
+        self.stop_bit = bytes_to_bits(stop) if stop is not None else len(self.buffer) * 8
+        assert self.start_bit >= 0
+        assert self.stop_bit <= len(self.buffer) * 8
+        assert self.start_bit <= self.stop_bit
+
+    @classmethod
+    def _from_bits(cls, buffer, start_bit, stop_bit):
+        """Creates a view over a buffer that doesn't need wrapping, without converting or checking the offsets."""
+        view = cls.__new__(cls)
+        view.buffer, view.start_bit, view.stop_bit = buffer, start_bit, stop_bit
+        return view
+
+    @property
+    def start(self):
+        return bits_to_bytes(self.start_bit)
+
+    @start.setter
+    def start(self, value):
+        self.start_bit = bytes_to_bits(value)
+
+    @property
+    def stop(self):
+        return bits_to_bytes(self.stop_bit)
+
+    @stop.setter
+    def stop(self, value):
+        self.stop_bit = bytes_to_bits(value)
 
     def __getitem__(self, key):
-        start, stop = self._key_to_range(key)
+        start_bit, stop_bit = self._key_to_range(key)
         if isinstance(key, slice):
-            return self._get_range(start, stop)
+            return self._get_range(start_bit, stop_bit)
         else:  # must be int/float otherwise _key_to_range would raise an error
-            return self._get_byte_bits(start, min(8, int((self.stop - start) * 8)))
+            return self._get_byte_bits(start_bit, min(8, self.stop_bit - start_bit))
 
     def __len__(self):
-        return int(math.ceil(self.stop - self.start))
+        return (self.stop_bit - self.start_bit + 7) // 8
 
     def __iter__(self):
-        for i in range(len(self)):
-            yield self._get_byte_bits(i + self.start, min(int((self.stop - i - self.start) * 8), 8))
+        if self.is_byte_aligned():
+            return iter(bytearray(self.buffer[self.start_bit // 8:self.stop_bit // 8]))
+        return iter(self._get_unaligned_bytes())
 
     def __str__(self):
         if PY2:
@@ -56,103 +92,152 @@ class BitView(abc.Sequence):
 
     def to_bitstr(self):
         result = []
-        for i in range(int(self.start * 8), int(self.stop * 8)):
-            byte_i, bit_i = float_to_byte_bit_pair(float(i) / 8)
-            result.append((self.buffer[byte_i] >> bit_i) & 1)
+        for i in range(self.start_bit, self.stop_bit):
+            result.append((self.buffer[i // 8] >> (i % 8)) & 1)
         return "".join(str(n) for n in reversed(result))
 
     def to_bytearray(self):
-        if int(self.start) == self.start:
-            return self.buffer[int(self.start):int(math.ceil(self.stop))]
+        if self.start_bit % 8 == 0:
+            return bytearray(self.buffer[self.start_bit // 8:(self.stop_bit + 7) // 8])
         else:
-            return bytearray(list(self))  # very inefficient.
+            return self._get_unaligned_bytes()
 
     def length(self):
-        return self.stop - self.start
+        return bits_to_bytes(self.stop_bit - self.start_bit)
+
+    def bit_length(self):
+        return self.stop_bit - self.start_bit
+
+    def is_byte_aligned(self):
+        """
+        :returns: True if the view starts and stops on a byte boundary.
+        :rtype: bool
+        """
+        return (self.start_bit | self.stop_bit) % 8 == 0
 
-    def _get_range(self, start, stop):
-        start_byte_ofs = int(start)
-        stop_byte_ofs = int(math.ceil(stop))
-        return type(self)(self.buffer[start_byte_ofs:stop_byte_ofs], start - start_byte_ofs, stop - start_byte_ofs)
+    def bit_slice(self, start_bit, stop_bit):
+        """Same as view[start:stop] with start and stop in bits (relative to the view) instead of bytes."""
+        return self._get_range(self._translate_bit_offset(start_bit), self._translate_bit_offset(stop_bit))
 
-    def _get_byte_bits(self, ofs, bit_len):
-        # assert ofs >= 0 and bit_len >= 0, "ofs={0!r}, bit_len={1!r}".format(ofs, bit_len)
-        byte_ofs, bit_ofs = float_to_byte_bit_pair(ofs)
+    def _get_range(self, start_bit, stop_bit):
+        return BitView._from_bits(self.buffer, start_bit, stop_bit)
+
+    def _get_byte_bits(self, ofs_bit, bit_len):
+        # assert ofs_bit >= 0 and bit_len >= 0, "ofs_bit={0!r}, bit_len={1!r}".format(ofs_bit, bit_len)
         bit_mask = ((1 << bit_len) - 1)
+        if ofs_bit < 0:
+            bit_mask = ((1 << (bit_len + ofs_bit)) - 1)
+            return self.buffer[0] & bit_mask
+        byte_ofs, bit_ofs = ofs_bit // 8, ofs_bit % 8
         if bit_ofs == 0:
             return self.buffer[byte_ofs] & bit_mask
-        elif bit_ofs < 0:
-            bit_mask = ((1 << (bit_len + bit_ofs)) - 1)
-            return self.buffer[0] & bit_mask
         elif bit_ofs + bit_len <= 8:
             return (self.buffer[byte_ofs] >> bit_ofs) & bit_mask
         else:
             cur_byte = self.buffer[byte_ofs]
             next_byte = self.buffer[byte_ofs + 1] if byte_ofs + 1 < len(self.buffer) else 0
             return (((cur_byte >> bit_ofs) & 0xFF) | ((next_byte << (8 - bit_ofs)) & 0xFF)) & bit_mask
+
+    def _get_bits(self, start_bit, stop_bit):
+        """
+        Returns the bits in [start_bit, stop_bit) (in the underlying buffer's coordinates) as an int whose least
+        significant bit is the bit at start_bit. The bytes covering the range are converted to an int at once and then
+        shifted and masked, instead of assembling the value byte by byte.
+        """
+        start_byte = start_bit // 8
+        value = int_from_bytes_le(self.buffer[start_byte:(stop_bit + 7) // 8])
+        return (value >> (start_bit - start_byte * 8)) & ((1 << (stop_bit - start_bit)) - 1)
+
+    def _get_unaligned_bytes(self):
+        """Returns the view's bits as a bytearray, the last byte padded with zero bits (same as iterating)."""
+        return bytearray(int_to_bytes_le(self._get_bits(self.start_bit, self.stop_bit), len(self)))
+
     def _key_to_range(self, key):
+        """Translates an index or a slice (in bytes, relative to the view) to a bit range in the buffer."""
         if isinstance(key, slice):
             if key.step not in (None, 1):
                 raise NotImplementedError("step must be 1 or None")
             start = self._translate_offset(key.start if key.start is not None else 0)
-            stop = self._translate_offset(key.stop if key.stop is not None else self.length())
+            stop = self._translate_offset(key.stop) if key.stop is not None else self.stop_bit
             assert start <= stop and start >= 0, "start={0!r}, stop={1!r}".format(start, stop)
         elif isinstance(key, integer_types + (float,)):
             start = self._translate_offset(key)
-            stop = start + 1
+            stop = start + 8
         else:
             raise TypeError("index must be int, float or a slice")
         return start, stop
 
     def _translate_offset(self, ofs):
-        length = self.length()
-        ofs = max(ofs + length, 0) if ofs < 0 else min(ofs, length)
-        return ofs + self.start
+        return self._translate_bit_offset(bytes_to_bits(ofs))
+
+    def _translate_bit_offset(self, ofs_bit):
+        length = self.stop_bit - self.start_bit
+        ofs_bit = max(ofs_bit + length, 0) if ofs_bit < 0 else min(ofs_bit, length)
+        return ofs_bit + self.start_bit
 
     def to_bytes(self):
-        ba = bytearray(b for b in self)
+        if self.is_byte_aligned():
+            ba = self.buffer[self.start_bit // 8:self.stop_bit // 8]
+        else:
+            ba = self._get_unaligned_bytes()
         return str(ba) if PY2 else bytes(ba)
 
 
 class BitAwareByteArray(BitView, abc.MutableSequence):
     """
-    Similar to BitView, but this class is mutable.
+    Similar to BitView, but this class is mutable. A memoryview source can be modified in place but can't be resized.
     """
     def __init__(self, source, start=0, stop=None):
-        assert isinstance(source, bytearray)
+        assert isinstance(source, (bytearray, memoryview))
         super(BitAwareByteArray, self).__init__(source, start, stop)
 
     def __setitem__(self, key, value):
-        start, stop = self._key_to_range(key)
-        value, value_len = self._value_to_value_and_length(value, stop - start)
-        self._set_range(start, stop, value, value_len)
+        start_bit, stop_bit = self._key_to_range(key)
+        value, value_bit_len = self._value_to_value_and_bit_length(value, stop_bit - start_bit)
+        self._set_range(start_bit, stop_bit, value, value_bit_len)
 
     def __delitem__(self, key):
-        start, stop = self._key_to_range(key)
-        self._del_range(start, stop)
+        start_bit, stop_bit = self._key_to_range(key)
+        self._del_range(start_bit, stop_bit)
+
+    def set_bits(self, start_bit, stop_bit, value):
+        """Same as array[start:stop] = value with start and stop in bits (relative to the array) instead of bytes."""
+        start_bit, stop_bit = self._translate_bit_offset(start_bit), self._translate_bit_offset(stop_bit)
+        value, value_bit_len = self._value_to_value_and_bit_length(value, stop_bit - start_bit)
+        self._set_range(start_bit, stop_bit, value, value_bit_len)
+
+    def _get_range(self, start_bit, stop_bit):
+        # Since this array is mutable (and may change its length), slices are copies and not views.
+        start_byte_ofs = start_bit // 8
+        stop_byte_ofs = (stop_bit + 7) // 8
+        return type(self)._from_bits(self.buffer[start_byte_ofs:stop_byte_ofs], start_bit - start_byte_ofs * 8,
+                                     stop_bit - start_byte_ofs * 8)
 
     def insert(self, i, value):
         i = self._translate_offset(i)
-        value, value_len = self._value_to_value_and_length(value)
-        self._insert_zeros(i, i + value_len)
-        self._copy_to_range(i, value, value_len)
+        value, value_bit_len = self._value_to_value_and_bit_length(value)
+        self._insert_zeros(i, i + value_bit_len)
+        self._copy_to_range(i, value, value_bit_len)
 
     def extend(self, other):
         if isinstance(other, BitView):
-            offset = self.stop
-            self._insert_zeros(offset, offset + other.length())
-            self._copy_to_range(offset, other, other.length())
+            offset = self.stop_bit
+            self._insert_zeros(offset, offset + other.bit_length())
+            self._copy_to_range(offset, other, other.bit_length())
         else:
             super(BitAwareByteArray, self).extend(other)
 
     def zfill(self, length):
-        if length > self.length():
-            self._insert_zeros(self.stop, self.stop + length - self.length())
+        self._zfill_bits(bytes_to_bits(length))
+
+    def _zfill_bits(self, bit_length):
+        if bit_length > self.stop_bit - self.start_bit:
+            self._insert_zeros(self.stop_bit, self.start_bit + bit_length)
 
     def __add__(self, other):
         if not isinstance(other, BitView):
             return NotImplemented
-        copy = BitAwareByteArray(bytearray(self.buffer), start=self.start, stop=self.stop)
+        copy = BitAwareByteArray._from_bits(bytearray(self.buffer), self.start_bit, self.stop_bit)
         copy.extend(other)
         return copy
 
@@ -160,83 +245,82 @@ class BitAwareByteArray(BitView, abc.MutableSequence):
         if not isinstance(other, BitView):
             return NotImplemented
 
-        copy = BitAwareByteArray(bytearray(other.buffer), start=other.start, stop=other.stop)
+        copy = BitAwareByteArray._from_bits(bytearray(other.buffer), other.start_bit, other.stop_bit)
         copy.extend(self)
         return copy
 
-    def _set_range(self, start, stop, value, value_len):
+    def _set_range(self, start_bit, stop_bit, value, value_bit_len):
         """
-        Assumes that start and stop are already in 'buffer' coordinates. value is a byte iterable.
-        value_len is fractional.
+        Assumes that start_bit and stop_bit are already in 'buffer' coordinates. value is a byte iterable.
         """
-        assert stop >= start and value_len >= 0
-        range_len = stop - start
-        if range_len < value_len:
-            self._insert_zeros(stop, stop + value_len - range_len)
-            self._copy_to_range(start, value, value_len)
-        elif range_len > value_len:
-            self._del_range(stop - (range_len - value_len), stop)
-            self._copy_to_range(start, value, value_len)
+        assert stop_bit >= start_bit and value_bit_len >= 0
+        range_bit_len = stop_bit - start_bit
+        if range_bit_len < value_bit_len:
+            self._insert_zeros(stop_bit, stop_bit + value_bit_len - range_bit_len)
+            self._copy_to_range(start_bit, value, value_bit_len)
+        elif range_bit_len > value_bit_len:
+            self._del_range(stop_bit - (range_bit_len - value_bit_len), stop_bit)
+            self._copy_to_range(start_bit, value, value_bit_len)
         else:
-            self._copy_to_range(start, value, value_len)
+            self._copy_to_range(start_bit, value, value_bit_len)
 
-    def _copy_to_range(self, offset, iterable, iterable_len):
-        remaining_bit_len = int(iterable_len * 8)
+    def _copy_to_range(self, offset_bit, iterable, bit_len):
+        remaining_bit_len = bit_len
         for byte in iterable:
-            self._set_byte_bits(offset, min(remaining_bit_len, 8), byte)
-            offset += 1
+            self._set_byte_bits(offset_bit, min(remaining_bit_len, 8), byte)
+            offset_bit += 8
             remaining_bit_len -= 8
 
-    def _del_range(self, start, stop):
-        assert stop >= start
-        start_byte, stop_byte = int(math.ceil(start)), int(math.floor(stop))
+    def _del_range(self, start_bit, stop_bit):
+        assert stop_bit >= start_bit
+        start_byte, stop_byte = (start_bit + 7) // 8, stop_bit // 8
         whole_byte_delta = stop_byte - start_byte
 
         # If we can remove whole bytes from the buffer, we'll do that first.
         if whole_byte_delta >= 1:
             del self.buffer[start_byte:stop_byte]
-            self.stop -= whole_byte_delta
-            stop -= whole_byte_delta
+            self.stop_bit -= whole_byte_delta * 8
+            stop_bit -= whole_byte_delta * 8
 
         # Here we have at most 8 bits to remove, so we need to "shift" the entire array.
-        if stop > start:
-            ofs = start
-            bit_len_frac = stop - start
-            while (ofs + bit_len_frac) < self.stop:
-                self._set_byte_bits(ofs, 8, self._get_byte_bits(ofs + bit_len_frac, 8))
-                ofs += 1
-            self.stop -= bit_len_frac
-            if int(math.ceil(self.stop)) < len(self.buffer):
+        if stop_bit > start_bit:
+            ofs_bit = start_bit
+            bit_len = stop_bit - start_bit
+            while (ofs_bit + bit_len) < self.stop_bit:
+                self._set_byte_bits(ofs_bit, 8, self._get_byte_bits(ofs_bit + bit_len, 8))
+                ofs_bit += 8
+            self.stop_bit -= bit_len
+            if (self.stop_bit + 7) // 8 < len(self.buffer):
                 del self.buffer[-1]
 
-    def _insert_zeros(self, start, stop):
-        assert start >= 0 and start <= stop, "start={0!r}, stop={1!r}".format(start, stop)
-        assert start <= self.stop
-        start_byte, stop_byte = int(math.ceil(start)), int(math.floor(stop))
+    def _insert_zeros(self, start_bit, stop_bit):
+        assert start_bit >= 0 and start_bit <= stop_bit, "start_bit={0!r}, stop_bit={1!r}".format(start_bit, stop_bit)
+        assert start_bit <= self.stop_bit
+        start_byte, stop_byte = (start_bit + 7) // 8, stop_bit // 8
         whole_byte_delta = stop_byte - start_byte
 
         # If we can insert whole bytes to the buffer, we'll do that first.
         if whole_byte_delta >= 1:
             self.buffer[start_byte:start_byte] = bytearray(whole_byte_delta)
-            self.stop += whole_byte_delta
-            stop -= whole_byte_delta
+            self.stop_bit += whole_byte_delta * 8
+            stop_bit -= whole_byte_delta * 8
 
-        if stop > start:
-            assert stop - start <= 2, "start={0}, stop={1}".format(start, stop)
-            bit_len_frac = stop - start
-            while int(math.ceil(self.stop + bit_len_frac)) > len(self.buffer):
+        if stop_bit > start_bit:
+            assert stop_bit - start_bit <= 16, "start_bit={0}, stop_bit={1}".format(start_bit, stop_bit)
+            bit_len = stop_bit - start_bit
+            while (self.stop_bit + bit_len + 7) // 8 > len(self.buffer):
                 self.buffer.append(0)
 
-            if start < self.stop:
+            if start_bit < self.stop_bit:
                 # Inserting in the middle, so we copy from end to start.
-                ofs = self.stop + bit_len_frac - 1
-                while ofs >= start:
-                    self._set_byte_bits(ofs, 8, self._get_byte_bits(ofs - bit_len_frac, 8))
-                    ofs -= 1
-            self.stop += bit_len_frac
-
-    def _set_byte_bits(self, ofs, bit_len, value):
-        byte_ofs, bit_ofs = float_to_byte_bit_pair(ofs)
+                ofs_bit = self.stop_bit + bit_len - 8
+                while ofs_bit >= start_bit:
+                    self._set_byte_bits(ofs_bit, 8, self._get_byte_bits(ofs_bit - bit_len, 8))
+                    ofs_bit -= 8
+            self.stop_bit += bit_len
+
+    def _set_byte_bits(self, ofs_bit, bit_len, value):
+        byte_ofs, bit_ofs = ofs_bit // 8, ofs_bit % 8
         if bit_ofs == 0 and bit_len == 8:
             self.buffer[byte_ofs] = value  # shortcut
         elif (bit_ofs + bit_len) <= 8:
@@ -244,35 +328,35 @@ class BitAwareByteArray(BitView, abc.MutableSequence):
             self.buffer[byte_ofs] |= (value << bit_ofs) & 0xFF
         else:
             first_byte_bit_len = 8 - bit_ofs
-            self._set_byte_bits(ofs, first_byte_bit_len, value & ((1 << first_byte_bit_len) - 1))
-            self._set_byte_bits(byte_ofs + 1, bit_len - first_byte_bit_len, value >> first_byte_bit_len)
+            self._set_byte_bits(ofs_bit, first_byte_bit_len, value & ((1 << first_byte_bit_len) - 1))
+            self._set_byte_bits((byte_ofs + 1) * 8, bit_len - first_byte_bit_len, value >> first_byte_bit_len)
 
-    def _value_to_value_and_length(self, value, int_value_len=1):
-        value_len = 0
+    def _value_to_value_and_bit_length(self, value, int_value_bit_len=8):
+        value_bit_len = 0
         if isinstance(value, BitView):
-            value_len = value.length()
+            value_bit_len = value.bit_length()
         elif isinstance(value, abc.Sized):
-            value_len = len(value)
+            value_bit_len = len(value) * 8
         elif isinstance(value, abc.Iterable):
             value = bytearray(value)
-            value_len = len(value)
+            value_bit_len = len(value) * 8
         elif isinstance(value, integer_types):
             # Short circuit: make bit ranges accept int values by their bit length.
             bit_length = max(1, value.bit_length())
-            if bit_length > int_value_len * 8:
+            if bit_length > int_value_bit_len:
                 # Safety measure for short circuit: if user is assigning an int with more bits than the range of
                 # bits that he specified we shout.
                 raise ValueError("trying to assign int {0} with bit length {1} to bit length {2}".format(value,
-                                 bit_length, int(int_value_len * 8)))
+                                 bit_length, int_value_bit_len))
             l = []
             for n in range(0, bit_length, 8):
                 l.append(value % 256)
                 value //= 256
             value = l
-            value_len = max(float(bit_length) / 8, int_value_len)
+            value_bit_len = max(bit_length, int_value_bit_len)
         else:
             raise TypeError("value must be iterable or int")
-        return value, value_len
+        return value, value_bit_len
 
 
 class InputBuffer(object):
@@ -287,12 +371,12 @@ class InputBuffer(object):
             # Shortcut: if it's a simple range we can just return a subset of the bit view.
             range = range_list[0]
             assert not range.is_open()
-            result = self.buffer[range.start:range.stop]
+            result = self.buffer.bit_slice(range.start_bit, range.stop_bit)
         else:
             result = BitAwareByteArray(bytearray())
             for range in range_list:
                 assert not range.is_open()
-                result += self.buffer[range.start:range.stop]
+                result += self.buffer.bit_slice(range.start_bit, range.stop_bit)
 
         return result
 
@@ -304,29 +388,76 @@ class InputBuffer(object):
 
 
 class OutputBuffer(object):
+    """
+    Buffer used when packing. If the buffer is preallocated to its final size (see `Buffer.pack`), its length never
+    changes: byte-aligned ranges are copied directly into the underlying bytearray and sub-byte ranges are masked into
+    the bytes covering them, without inserting, deleting or shifting anything. Only ranges that grow the buffer go
+    through the bit-aware path.
+    """
     def __init__(self, buffer=None):
         if isinstance(buffer, BitAwareByteArray):
             self.buffer = buffer
-        elif isinstance(buffer, bytearray):
+        elif isinstance(buffer, (bytearray, memoryview)):
             self.buffer = BitAwareByteArray(buffer)
         elif buffer is None:
             self.buffer = BitAwareByteArray(bytearray())
         else:
-            raise TypeError("buffer must be either BitAwareByteArray, bytearray or None but instead is {0}".
-                            format(type(buffer)))
+            raise TypeError("buffer must be either BitAwareByteArray, bytearray, memoryview or None but instead is " +
+                            "{0}".format(type(buffer)))
 
     def set(self, value, range_list):
-        value = BitView(value)
-        value_start = 0
+        if not isinstance(value, BitView):
+            value = BitView(value)
+        value_start_bit = 0
 
         for range in range_list:
             assert not range.is_open()
-            assert range.start >= 0 and range.start <= range.stop
-            if range.byte_length() > len(value) - value_start:
+            assert range.start_bit >= 0 and range.start_bit <= range.stop_bit
+            range_bit_len = range.stop_bit - range.start_bit
+            if range_bit_len > len(value) * 8 - value_start_bit:
                 raise ValueError("trying to assign a value with smaller length than the range it's given")
-            self.buffer.zfill(range.start)
-            self.buffer[range.start:range.stop] = value[value_start:value_start + range.byte_length()]
-            value_start += range.byte_length()
+            if not (self._set_bytes(range.start_bit, range.stop_bit, value, value_start_bit) or
+                    self._set_bits(range.start_bit, range.stop_bit, value, value_start_bit)):
+                self.buffer._zfill_bits(range.start_bit)
+                self.buffer.set_bits(range.start_bit, range.stop_bit,
+                                     value.bit_slice(value_start_bit, value_start_bit + range_bit_len))
+            value_start_bit += range_bit_len
+
+    def _set_bytes(self, start_bit, stop_bit, value, value_start_bit):
+        """Copies whole bytes in place if possible. Returns False if the bit-aware path needs to be used instead."""
+        value_start_bit += value.start_bit
+        value_stop_bit = value_start_bit + (stop_bit - start_bit)
+        if not ((start_bit | stop_bit | value_start_bit) % 8 == 0
+                and self.buffer.start_bit == 0 and stop_bit <= self.buffer.stop_bit and value_stop_bit <= value.stop_bit
+                and isinstance(value.buffer, (bytearray, bytes, memoryview))):
+            return False
+        self.buffer.buffer[start_bit // 8:stop_bit // 8] = value.buffer[value_start_bit // 8:value_stop_bit // 8]
+        return True
+
+    def _set_bits(self, start_bit, stop_bit, value, value_start_bit):
+        """
+        Writes a sub-byte range in place by converting the bytes covering it to an int, clearing the range's bits and
+        OR-ing in the value's bits. Returns False if the bit-aware path needs to be used instead.
+        """
+        value_start_bit += value.start_bit
+        value_stop_bit = value_start_bit + (stop_bit - start_bit)
+        if not (self.buffer.start_bit == 0 and stop_bit <= self.buffer.stop_bit and value_stop_bit <= value.stop_bit
+                and isinstance(value.buffer, (bytearray, bytes, memoryview))):
+            return False
+        start_byte, stop_byte = start_bit // 8, (stop_bit + 7) // 8
+        shift = start_bit - start_byte * 8
+        mask = ((1 << (stop_bit - start_bit)) - 1) << shift
+        target = self.buffer.buffer
+        bits = int_from_bytes_le(target[start_byte:stop_byte]) & ~mask
+        bits |= value._get_bits(value_start_bit, value_stop_bit) << shift
+        target[start_byte:stop_byte] = int_to_bytes_le(bits, stop_byte - start_byte)
+        return True
 
     def get(self):
         return self.buffer
+
+    def to_bytearray(self):
+        """Returns the packed bytes. If the buffer covers its entire underlying bytearray it's returned as is."""
+        if self.buffer.start_bit == 0 and self.buffer.stop_bit == len(self.buffer.buffer) * 8:
+            return self.buffer.buffer
+        return self.buffer.to_bytearray()
@@ -0,0 +1,65 @@
+import importlib
+
+from infi.exceptools import chain as chain_exceptions
+
+from .fused import field_struct_format, static_byte_range
+
+STRUCT_FORMAT_CHAR_KINDS = dict([(c, 'i') for c in 'bhilq'] + [(c, 'u') for c in 'BHILQ'] +
+                                [(c, 'f') for c in 'efd'])
+
+# Maps a packer function to its unpacker for marshallers whose packed form is a plain byte string (NumPy 'S' type).
+# Populated by serialize.py.
+BYTES_MARSHALLERS = dict()
+
+
+def register_bytes_marshaller(packer, unpacker):
+    BYTES_MARSHALLERS[packer] = unpacker
+
+
+def import_numpy():
+    """NumPy is an optional dependency (`pip install infi.instruct[numpy]`), so it's imported only when needed."""
+    try:
+        return importlib.import_module("numpy")
+    except ImportError:
+        raise chain_exceptions(ImportError("NumPy is required for NumPy support in infi.instruct - install it with " +
+                                           "`pip install infi.instruct[numpy]`"))
+
+
+def field_numpy_format(field):
+    """
+    Returns (offset, NumPy type string) for an int/float/str field at a static, byte-aligned position or None.
+    str fields are represented as raw byte strings (i.e. they are not decoded, stripped or justified).
+    """
+    struct_format = field_struct_format(field)
+    if struct_format is not None:
+        start, byte_size, byte_order, format_char = struct_format
+        return start, "{0}{1}{2}".format(byte_order, STRUCT_FORMAT_CHAR_KINDS[format_char], byte_size)
+    if field.packer in BYTES_MARSHALLERS and field.unpacker is BYTES_MARSHALLERS[field.packer]:
+        byte_range = static_byte_range(field)
+        if byte_range is not None:
+            return byte_range[0], "S{0}".format(byte_range[1])
+    return None
+
+
+def numpy_dtype(buffer_type, fields, byte_size):
+    """Returns a structured NumPy dtype with explicit offsets that matches the layout of the fields."""
+    numpy = import_numpy()
+    field_formats = []
+    for field in fields:
+        field_format = field_numpy_format(field)
+        if field_format is None:
+            raise TypeError(("field {0} of {1} can't be represented by a NumPy dtype - only int, float and str " +
+                             "fields at static, byte-aligned positions are supported").format(field.attr_name(),
+                                                                                               buffer_type))
+        field_formats.append((field_format, field.attr_name()))
+    field_formats.sort(key=lambda pair: pair[0][0])
+    return numpy.dtype(dict(names=[name for _, name in field_formats],
+                            formats=[format for (_, format), _ in field_formats],
+                            offsets=[offset for (offset, _), _ in field_formats],
+                            itemsize=byte_size))
+
+
+def unpack_numpy_records(dtype, buffer, count=-1, offset=0):
+    """Returns a zero-copy record array over buffer (see `numpy.frombuffer`)."""
+    numpy = import_numpy()
+    return numpy.frombuffer(buffer, dtype=dtype, count=count, offset=offset).view(numpy.recarray)
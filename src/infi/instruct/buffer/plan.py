@@ -0,0 +1,162 @@
+from .reference import (Reference, ObjectReference, FieldReference, FieldOrAttrReference, TotalSizeReference)
+from .field_reference_builder import PackAbsolutePositionReference, UnpackAbsolutePositionReference
+
+PACK = "pack"
+UNPACK = "unpack"
+
+
+class EvaluationPlan(object):
+    """
+    A per-class plan of the order in which fields are packed and unpacked.
+
+    The fields are topologically sorted once, when the class is created, according to the references between them
+    (e.g. a position that uses `after_ref(other_field)` or a `len_ref` of another field). When walking the fields in
+    plan order, everything a field depends on is already resolved and cached in the context, so dereferencing a field
+    never recurses into other fields' reference graphs.
+
+    If the field graph of a mode is acyclic, `pack_acyclic`/`unpack_acyclic` is True and the context may skip the
+    cyclic reference bookkeeping in `Reference.deref`. Otherwise (e.g. a length field that is set from the size of a
+    field whose position depends on the length field) the order is kept as close as possible to the original order and
+    cycles are detected at runtime as before.
+    """
+    def __init__(self, fields):
+        self.fields = list(fields)
+        self.pack_order, self.pack_acyclic, _ = _sort_fields(self.fields, PACK)
+        self.unpack_order, self.unpack_acyclic, self._unpack_dependencies = _sort_fields(self.fields, UNPACK)
+        self._unpack_closures = dict()
+        self._field_indices = dict((id(field), index) for index, field in enumerate(self.fields))
+
+    def unpack_closure(self, fields, cache=True):
+        """
+        Returns the given fields and all the fields they (transitively) depend on when unpacking, in unpack order.
+        Used to unpack only some of the fields (e.g. lazy unpacking). The result is cached per set of fields unless
+        cache is False, which callers with an unbounded number of different sets (e.g. the fields a lazy unpack left
+        undecoded) should pass.
+        """
+        key = frozenset(self._field_indices[id(field)] for field in fields)
+        closure = self._unpack_closures.get(key)
+        if closure is None:
+            needed = set()
+            stack = list(fields)
+            while stack:
+                field = stack.pop()
+                if id(field) not in needed:
+                    needed.add(id(field))
+                    stack.extend(self._unpack_dependencies.get(id(field), []))
+            closure = [field for field in self.unpack_order if id(field) in needed]
+            if cache:
+                self._unpack_closures[key] = closure
+        return closure
+
+    def __repr__(self):
+        return "EvaluationPlan(pack_order={0!r}, unpack_order={1!r})".format(self.pack_order, self.unpack_order)
+
+
+def compile_plan(fields):
+    return EvaluationPlan(fields)
+
+
+def field_step_refs(field, mode):
+    """Returns the references a field's pack/unpack step dereferences."""
+    if mode == PACK:
+        return [field.pack_if, field.pack_ref, field.pack_absolute_position_ref]
+    else:
+        return [field.unpack_if, field.unpack_value_ref]
+
+
+def field_dependencies(field, fields, mode, fields_by_name=None):
+    """
+    Statically walks a field's reference graph and returns the list of fields it references, in the order they were
+    found. A field referencing itself is returned as well, since that's a cycle (the size of the buffer, on the other
+    hand, can be referenced by any field). Function calls (e.g. `member_func_ref`) are opaque, so dependencies hidden
+    inside them are not found.
+    """
+    if fields_by_name is None:
+        fields_by_name = dict((f.attr_name(), f) for f in fields)
+    result = []
+    found = set()
+
+    def add_dependency(other):
+        # Note that we can't use `in` on a list of references since Reference overrides __eq__.
+        if id(other) not in found:
+            found.add(id(other))
+            result.append(other)
+
+    if mode == UNPACK:
+        for other in (field.unpack_after or []):
+            add_dependency(other)
+
+    visited = set()
+    stack = list(reversed(field_step_refs(field, mode)))
+    while stack:
+        ref = stack.pop()
+        if id(ref) in visited:
+            continue
+        visited.add(id(ref))
+
+        if isinstance(ref, FieldReference):
+            add_dependency(ref)
+        elif isinstance(ref, FieldOrAttrReference):
+            if ref.name in fields_by_name:
+                add_dependency(fields_by_name[ref.name])
+        elif isinstance(ref, TotalSizeReference):
+            for other in fields:
+                if other is not field:
+                    add_dependency(other)
+        else:
+            stack.extend(reversed(child_refs(ref)))
+    return result
+
+
+def child_refs(ref):
+    if isinstance(ref, (PackAbsolutePositionReference, UnpackAbsolutePositionReference)):
+        # These point back to their own field (to pack it if the position is open), which isn't a dependency.
+        names = [name for name in vars(ref) if name != 'field']
+    elif isinstance(ref, ObjectReference):
+        return [ref.obj] if isinstance(ref.obj, Reference) else []
+    else:
+        names = list(vars(ref))
+
+    result = []
+    for name in names:
+        value = getattr(ref, name)
+        if isinstance(value, Reference):
+            result.append(value)
+        elif isinstance(value, (list, tuple)):
+            result.extend(v for v in value if isinstance(v, Reference))
+        elif isinstance(value, dict):
+            result.extend(value[k] for k in sorted(value) if isinstance(value[k], Reference))
+    return result
+
+
+def _sort_fields(fields, mode):
+    """
+    Topologically sorts the fields (dependencies first) while keeping the original order wherever possible.
+    :returns: (ordered fields, True if no cycles were found, dict of id(field) to the fields it depends on)
+    """
+    fields_by_name = dict((field.attr_name(), field) for field in fields)
+    dependencies = dict((id(field), field_dependencies(field, fields, mode, fields_by_name)) for field in fields)
+    order = []
+    done = set()
+    acyclic = True
+    for root in fields:
+        if id(root) in done:
+            continue
+        # Iterative DFS so long dependency chains don't hit the recursion limit.
+        in_progress = set([id(root)])
+        stack = [(root, iter(dependencies[id(root)]))]
+        while stack:
+            field, deps = stack[-1]
+            for dep in deps:
+                if id(dep) in in_progress:
+                    acyclic = False
+                elif id(dep) not in done and id(dep) in dependencies:
+                    in_progress.add(id(dep))
+                    stack.append((dep, iter(dependencies[id(dep)])))
+                    break
+            else:
+                stack.pop()
+                in_progress.remove(id(field))
+                done.add(id(field))
+                order.append(field)
+    return order, acyclic, dependencies
@@ -0,0 +1,128 @@
+"""
+Instrumentation of Buffer packing and unpacking, for finding out which classes and fields are expensive:
+
+    with profile_buffers() as profile:
+        page.unpack(data)
+    print(profile.format())
+
+The hooks are installed by `profile_buffers` on entry and removed on exit, so there's no cost when not profiling.
+"""
+from contextlib import contextmanager
+from collections import defaultdict
+from timeit import default_timer
+
+from .buffer import Buffer
+from .reference import Reference
+from .io_buffer import OutputBuffer
+
+PACK = "pack"
+UNPACK = "unpack"
+
+_active_profile = None
+
+
+class BufferProfile(object):
+    """
+    The measurements of a `profile_buffers` block. Times are in seconds and inclusive - e.g. the time of a
+    buffer_field includes the time of packing/unpacking the nested buffer, which is also counted for its class.
+
+    :ivar class_stats: maps (class, PACK/UNPACK) to [calls, seconds]
+    :ivar field_stats: maps (class, field name, PACK/UNPACK) to [calls, seconds]
+    :ivar deref_evaluations: number of `Reference.deref` calls that evaluated the reference
+    :ivar deref_cache_hits: number of `Reference.deref` calls that returned a result cached in the context
+    :ivar bytes_set: number of bytes (possibly fractional, for bit ranges) written by `OutputBuffer.set`
+    """
+    def __init__(self):
+        self.class_stats = defaultdict(lambda: [0, 0.0])
+        self.field_stats = defaultdict(lambda: [0, 0.0])
+        self.deref_evaluations = 0
+        self.deref_cache_hits = 0
+        self.bytes_set = 0
+
+    def format(self, limit=20):
+        """Returns a human readable report of the most expensive classes and fields."""
+        lines = ["deref evaluations: {0}, deref cache hits: {1}, bytes set: {2}".format(
+            self.deref_evaluations, self.deref_cache_hits, self.bytes_set)]
+        lines.append("{0:<60} {1:<7} {2:>9} {3:>12}".format("class", "op", "calls", "total ms"))
+        for (cls, op), (calls, seconds) in self._most_expensive(self.class_stats, limit):
+            lines.append("{0:<60} {1:<7} {2:>9} {3:>12.3f}".format(cls.__name__, op, calls, seconds * 1000))
+        lines.append("{0:<60} {1:<7} {2:>9} {3:>12}".format("field", "op", "calls", "total ms"))
+        for (cls, name, op), (calls, seconds) in self._most_expensive(self.field_stats, limit):
+            lines.append("{0:<60} {1:<7} {2:>9} {3:>12.3f}".format("{0}.{1}".format(cls.__name__, name), op, calls,
+                                                                   seconds * 1000))
+        return "\n".join(lines)
+
+    def _most_expensive(self, stats, limit):
+        return sorted(stats.items(), key=lambda item: item[1][1], reverse=True)[:limit]
+
+
+def _timed(stats, key, func, *args):
+    start = default_timer()
+    try:
+        return func(*args)
+    finally:
+        entry = stats[key]
+        entry[0] += 1
+        entry[1] += default_timer() - start
+
+
+def _hooks(profile):
+    """Returns a list of (owner class, method name, hook) for the methods we instrument."""
+    pack, pack_into, unpack = Buffer.pack, Buffer.pack_into, Buffer.unpack
+    pack_field, unpack_field = Buffer._pack_field, Buffer._unpack_field
+    deref, output_buffer_set = Reference.deref, OutputBuffer.set
+
+    def pack_hook(self):
+        return _timed(profile.class_stats, (type(self), PACK), pack, self)
+
+    def pack_into_hook(self, target, offset=0):
+        return _timed(profile.class_stats, (type(self), PACK), pack_into, self, target, offset)
+
+    def unpack_hook(self, buffer, fields=None):
+        return _timed(profile.class_stats, (type(self), UNPACK), unpack, self, buffer, fields)
+
+    def pack_field_hook(self, ctx, field):
+        return _timed(profile.field_stats, (type(self), field.attr_name(), PACK), pack_field, self, ctx, field)
+
+    def unpack_field_hook(self, ctx, field):
+        return _timed(profile.field_stats, (type(self), field.attr_name(), UNPACK), unpack_field, self, ctx, field)
+
+    def deref_hook(self, ctx):
+        if self in ctx.cached_results:
+            profile.deref_cache_hits += 1
+        else:
+            profile.deref_evaluations += 1
+        return deref(self, ctx)
+
+    def output_buffer_set_hook(self, value, range_list):
+        output_buffer_set(self, value, range_list)
+        profile.bytes_set += sum(position.byte_length() for position in range_list)
+
+    return [(Buffer, "pack", pack_hook), (Buffer, "pack_into", pack_into_hook), (Buffer, "unpack", unpack_hook),
+            (Buffer, "_pack_field", pack_field_hook), (Buffer, "_unpack_field", unpack_field_hook),
+            (Reference, "deref", deref_hook), (OutputBuffer, "set", output_buffer_set_hook)]
+
+
+@contextmanager
+def profile_buffers():
+    """
+    Instruments Buffer packing and unpacking inside the with block and yields a `BufferProfile` with the results.
+    The instrumentation is process-wide (so it isn't thread-safe) and profile_buffers blocks can't be nested.
+    Subclasses that override the instrumented Buffer methods (e.g. pack) are measured only when they call the base
+    implementation.
+    """
+    global _active_profile
+    if _active_profile is not None:
+        raise RuntimeError("profile_buffers() is already active")
+    profile = BufferProfile()
+    hooks = _hooks(profile)
+    originals = [(owner, name, owner.__dict__[name]) for owner, name, _ in hooks]
+    _active_profile = profile
+    try:
+        for owner, name, hook in hooks:
+            setattr(owner, name, hook)
+        yield profile
+    finally:
+        for owner, name, original in originals:
+            setattr(owner, name, original)
+        _active_profile = None
@@ -1,10 +1,23 @@
-import sys
 import functools
+from six import integer_types
 from .._compat import range
 
+# Ranges (and BitViews) keep integer bit offsets internally. The byte offsets in the public API (start, stop,
+# byte_length(), etc.) are fractional for ranges that don't start or stop on a byte boundary, e.g. 2.125 is bit 1 of
+# byte 2. BIT is the byte length of a single bit in this notation.
 BIT = 0.125
 
 
+def bytes_to_bits(n):
+    """Converts a (possibly fractional) byte offset or length to an integer number of bits."""
+    return n * 8 if isinstance(n, integer_types) else int(round(n * 8))
+
+
+def bits_to_bytes(n):
+    """Converts a number of bits to a byte offset or length: an int on a byte boundary and a float otherwise."""
+    return n // 8 if n % 8 == 0 else n / 8.0
+
+
 class SequentialRangeMixin(object):
     """Common interface between SquentialRange and SequentialRangeList"""
 
@@ -34,20 +47,55 @@ class SequentialRange(SequentialRangeMixin):
         :param stop: range stop (can be None for open range). If not None, must be >= start.
         :type stop: int, float or None
         """
-        self.start = start if start is not None else 0
-        self.stop = stop
+        self._init_bits(bytes_to_bits(start) if start is not None else 0,
+                        bytes_to_bits(stop) if stop is not None else None)
+
+    @classmethod
+    def from_bits(cls, start_bit, stop_bit):
+        """
+        :param start_bit: range start in bits (non-negative)
+        :type start_bit: int
+        :param stop_bit: range stop in bits (can be None for open range). If not None, must be >= start_bit.
+        :type stop_bit: int or None
+        :returns: a new range
+        :rtype: SequentialRange
+        """
+        result = cls.__new__(cls)
+        result._init_bits(start_bit, stop_bit)
+        return result
+
+    def _init_bits(self, start_bit, stop_bit):
+        self.start_bit = start_bit
+        self.stop_bit = stop_bit
+
+        assert self.start_bit >= 0, "start={0!r}".format(self.start)
+        if self.stop_bit is not None:
+            assert self.stop_bit >= 0, "stop={0!r}".format(self.stop)
+            assert self.start_bit <= self.stop_bit, "start={0!r}, stop={1!r}".format(self.start, self.stop)
+
+    # start and stop (in bytes) are assignable attributes as well, backed by start_bit and stop_bit.
+    @property
+    def start(self):
+        return bits_to_bytes(self.start_bit)
+
+    @start.setter
+    def start(self, value):
+        self.start_bit = bytes_to_bits(value)
 
-        assert self.start >= 0, "start={0!r}".format(self.start)
-        if self.stop is not None:
-            assert self.stop >= 0, "stop={0!r}".format(self.stop)
-            assert self.start <= self.stop, "start={0!r}, stop={1!r}".format(self.start, self.stop)
+    @property
+    def stop(self):
+        return bits_to_bytes(self.stop_bit) if self.stop_bit is not None else None
+
+    @stop.setter
+    def stop(self, value):
+        self.stop_bit = bytes_to_bits(value) if value is not None else None
 
     def is_open(self):
         """
         :returns: True if the range is open, i.e. stop is None
         :rtype: bool
         """
-        return self.stop is None
+        return self.stop_bit is None
 
     def to_closed(self, new_stop):
         """
@@ -56,17 +104,30 @@ class SequentialRange(SequentialRangeMixin):
         :returns: new closed range, using the current stop if self is a closed range or new_stop if self is open.
         :rtype: SequentialRange
         """
-        assert new_stop >= self.start, "self.start ({0}) is bigger than new_stop ({1})".format(self.start, new_stop)
-        return SequentialRange(self.start, self.stop if self.stop is not None else new_stop)
+        if self.stop_bit is not None:
+            return SequentialRange.from_bits(self.start_bit, self.stop_bit)
+        new_stop_bit = bytes_to_bits(new_stop)
+        assert new_stop_bit >= self.start_bit, "self.start ({0}) is bigger than new_stop ({1})".format(self.start,
+                                                                                                     new_stop)
+        return SequentialRange.from_bits(self.start_bit, new_stop_bit)
 
     def byte_length(self):
         """
         :returns: length of range if a closed range or None if open range.
         :rtype: int or float or None
         """
-        if self.is_open():
+        if self.stop_bit is None:
+            return None
+        return bits_to_bytes(self.stop_bit - self.start_bit)
+
+    def bit_length(self):
+        """
+        :returns: length of range in bits if a closed range or None if open range.
+        :rtype: int or None
+        """
+        if self.stop_bit is None:
             return None
-        return self.stop - self.start
+        return self.stop_bit - self.start_bit
 
     def max_stop(self):
         """
@@ -87,9 +148,8 @@ class SequentialRange(SequentialRangeMixin):
         :returns: True if there's an overlap (non-empty intersection) between two ranges
         :rtype: bool
         """
-        a, b = (self, other) if self.start <= other.start else (other, self)
-        a_imag_stop = a.to_closed(sys.maxsize).stop
-        return a_imag_stop > b.start
+        a, b = (self, other) if self.start_bit <= other.start_bit else (other, self)
+        return a.stop_bit is None or a.stop_bit > b.start_bit
 
     def contains(self, point):
         """
@@ -98,13 +158,17 @@ class SequentialRange(SequentialRangeMixin):
         :returns: True if the range contains `point`
         :rtype: bool
         """
-        return self.start <= point and (self.stop is None or self.stop > point)
+        point_bit = bytes_to_bits(point)
+        return self.start_bit <= point_bit and (self.stop_bit is None or self.stop_bit > point_bit)
 
     def __eq__(self, other):
-        return self.start == other.start and self.stop == other.stop
+        return self.start_bit == other.start_bit and self.stop_bit == other.stop_bit
 
     def __lt__(self, other):
-        return self.start < other.start and self.to_closed(sys.maxsize).stop < other.to_closed(sys.maxsize).stop
+        return self.start_bit < other.start_bit and self._closed_stop_bit() < other._closed_stop_bit()
+
+    def _closed_stop_bit(self):
+        return self.stop_bit if self.stop_bit is not None else float("inf")
 
     def __repr__(self):
         return "SequentialRange(start={0!r}, stop={1!r})".format(self.start, self.stop)
@@ -126,11 +190,19 @@ class SequentialRangeList(list, SequentialRangeMixin):
         :returns: sum of lengthes of all ranges or None if one of the ranges is open
         :rtype: int, float or None
         """
+        bit_length = self.bit_length()
+        return bits_to_bytes(bit_length) if bit_length is not None else None
+
+    def bit_length(self):
+        """
+        :returns: sum of lengthes of all ranges in bits or None if one of the ranges is open
+        :rtype: int or None
+        """
         sum = 0
         for r in self:
-            if r.is_open():
+            if r.stop_bit is None:
                 return None
-            sum += r.byte_length()
+            sum += r.stop_bit - r.start_bit
         return sum
 
     def has_overlaps(self):
@@ -138,6 +210,8 @@ class SequentialRangeList(list, SequentialRangeMixin):
         :returns: True if one or more range in the list overlaps with another
         :rtype: bool
         """
+        if len(self) < 2:
+            return False
         sorted_list = sorted(self)
         for i in range(0, len(sorted_list) - 1):
             if sorted_list[i].overlaps(sorted_list[i + 1]):
@@ -151,10 +225,10 @@ class SequentialRangeList(list, SequentialRangeMixin):
         """
         m = 0
         for r in self:
-            if r.is_open():
+            if r.stop_bit is None:
                 return None
-            m = max(m, r.stop)
-        return m
+            m = max(m, r.stop_bit)
+        return bits_to_bytes(m)
 
     def sorted(self):
         """
@@ -171,20 +245,29 @@ class SequentialRangeList(list, SequentialRangeMixin):
         :returns: actual offset in one of the sequences in the range for request byte length.
         :rtype: int or float
         """
-        remaining_bytes = bytes
+        remaining_bits = bytes_to_bits(bytes)
         for r in self:
-            if r.is_open() or r.byte_length() >= remaining_bytes:
-                return r.start + remaining_bytes
+            if r.stop_bit is None or r.stop_bit - r.start_bit >= remaining_bits:
+                return bits_to_bytes(r.start_bit + remaining_bits)
             else:
-                remaining_bytes -= r.byte_length()
+                remaining_bits -= r.stop_bit - r.start_bit
         assert False, "requested byte offset {0!r} is outside the range list {1!r}".format(bytes, self)
 
     def find_relative_container_index(self, point):
-        sum_length = 0
+        result = self.find_relative_container_bit_index(bytes_to_bits(point))
+        return (result[0], bits_to_bytes(result[1])) if result is not None else None
+
+    def find_relative_container_bit_index(self, point_bit):
+        """
+        :returns: (index of the range containing the bit offset `point_bit`, sum of the bit lengths of the ranges
+                  before it) or None if `point_bit` is after the last range
+        """
+        sum_bits = 0
         for i in range(len(self)):
-            if self[i].is_open() or ((point - sum_length - self[i].byte_length()) <= 0):
-                return i, sum_length
-            sum_length += self[i].byte_length()
+            r = self[i]
+            if r.stop_bit is None or point_bit - sum_bits <= r.stop_bit - r.start_bit:
+                return i, sum_bits
+            sum_bits += r.stop_bit - r.start_bit
         return None
 
     def __add__(self, other):
@@ -4,7 +4,7 @@ from .func_call import FuncCallReference
 from .builtins import (LengthFuncCallReference, GetAttrReference, SetAttrReference, AssignAttrReference,
                        MinFuncCallReference, MaxFuncCallReference)
 from .contexts import (BufferContext, PackContext, UnpackContext, ReturnContextReference, ContextGetAttrReference,
-                       InputBufferLengthReference)
+                       InputBufferLengthReference, index_fields_by_name)
 from .field import FieldReference
 from .field_or_attr import FieldOrAttrReference, SelfProxy
 from .after_field import AfterFieldReference
@@ -27,4 +27,4 @@ class AfterFieldReference(Reference):
         return offset
 
     def __safe_repr__(self):
-        return "after({0})".format(self.field_ref.attr_name_ref.deref(Context()))
+        return "after({0})".format(self.field_ref.attr_name())
@@ -4,13 +4,22 @@ from .reference import Reference, Context
 from .builtins import GetAttrReference
 
 
+def index_fields_by_name(fields):
+    """Returns a dict of the fields by their names. If several fields have the same name, the first one is kept."""
+    result = dict()
+    for field in fields:
+        result.setdefault(field.attr_name(), field)
+    return result
+
+
 class BufferContext(Context):
     """Base class for buffer context. Contains the object we're packing/unpacking and the list of fields."""
 
-    def __init__(self, obj, fields):
-        super(BufferContext, self).__init__()
+    def __init__(self, obj, fields, check_cycles=True, fields_by_name=None):
+        super(BufferContext, self).__init__(check_cycles)
         self.obj = obj
         self.fields = fields
+        self._fields_by_name = fields_by_name
 
     def is_pack(self):
         return isinstance(self, PackContext)
@@ -19,25 +28,31 @@ class BufferContext(Context):
         return isinstance(self, UnpackContext)
 
     def has_field(self, name):
-        return any(field.attr_name() == name for field in self.fields)
+        return name in self._get_fields_by_name()
 
     def get_field(self, name):
-        return next(field for field in self.fields if field.attr_name() == name)
+        return self._get_fields_by_name()[name]
+
+    def _get_fields_by_name(self):
+        # Buffer classes pass their precomputed dict (see BufferType), otherwise we build it on first use.
+        if self._fields_by_name is None:
+            self._fields_by_name = index_fields_by_name(self.fields)
+        return self._fields_by_name
 
 
 class PackContext(BufferContext):
     """Context used when packing. Contains the object, fields and output buffer."""
 
-    def __init__(self, obj, fields, output_buffer=None):
-        super(PackContext, self).__init__(obj, fields)
+    def __init__(self, obj, fields, output_buffer=None, check_cycles=True, fields_by_name=None):
+        super(PackContext, self).__init__(obj, fields, check_cycles, fields_by_name)
         self.output_buffer = OutputBuffer() if not output_buffer else output_buffer
 
 
 class UnpackContext(BufferContext):
     """Context used when unpacking. Contains the object, fields and input buffer."""
 
-    def __init__(self, obj, fields, input_buffer):
-        super(UnpackContext, self).__init__(obj, fields)
+    def __init__(self, obj, fields, input_buffer, check_cycles=True, fields_by_name=None):
+        super(UnpackContext, self).__init__(obj, fields, check_cycles, fields_by_name)
         self.input_buffer = InputBuffer(input_buffer)
 
 
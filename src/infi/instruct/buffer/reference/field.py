@@ -15,6 +15,12 @@ class FieldReference(Reference):
     unpack_absolute_position_ref = None
     unpack_after = None
     default = None
+    packer = None
+    packer_kwargs = None
+    unpacker = None
+    unpacker_kwargs = None
+    set_before_pack = None
+    set_after_unpack = None
 
     def __init__(self, numeric, name):
         super(FieldReference, self).__init__(numeric)
@@ -29,6 +35,16 @@ class FieldReference(Reference):
     def attr_name(self):
         return self.attr_name_ref.obj
 
+    def __get__(self, obj, objtype=None):
+        # This is a non-data descriptor, so it's called only if the instance doesn't have a value for the field yet,
+        # e.g. a field that wasn't decoded yet after a lazy unpack (see Buffer._unpack_lazy).
+        if obj is not None:
+            ctx = getattr(obj, '_lazy_unpack_context', None)
+            if ctx is not None and self.attr_name() in ctx.lazy_fields:
+                obj._unpack_lazy_fields([self])
+                return getattr(obj, self.attr_name())
+        return self
+
     def evaluate(self, ctx):
         if ctx.is_pack():
             return self.pack_value_ref.deref(ctx)
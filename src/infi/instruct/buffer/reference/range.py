@@ -1,7 +1,7 @@
 import operator
 
 from infi.instruct.utils.safe_repr import safe_repr
-from infi.instruct.buffer.range import BIT, SequentialRange, SequentialRangeList
+from infi.instruct.buffer.range import SequentialRange, SequentialRangeList
 from infi.instruct._compat import long, range
 from functools import reduce
 
@@ -115,15 +115,15 @@ class BitNumericRangeReference(BitRangeReference):
         range_list = self.parent_range_ref.deref(ctx)
         assert len(range_list) >= 1
 
-        byte_offset = float(self.ref.deref(ctx)) / 8
-        assert byte_offset >= 0
+        bit_offset = int(self.ref.deref(ctx))
+        assert bit_offset >= 0
 
-        i, sum_length = range_list.find_relative_container_index(byte_offset)
-        if i is None:
-            raise ValueError("Bit offset {0} is out of range for range sequence {1!r}".format(self.ref.deref(ctx),
-                                                                                              range_list))
-        return SequentialRangeList([SequentialRange(byte_offset - sum_length + range_list[i].start,
-                                                    byte_offset - sum_length + range_list[i].start + BIT)])
+        container = range_list.find_relative_container_bit_index(bit_offset)
+        if container is None:
+            raise ValueError("Bit offset {0} is out of range for range sequence {1!r}".format(bit_offset, range_list))
+        i, sum_bits = container
+        start_bit = range_list[i].start_bit + bit_offset - sum_bits
+        return SequentialRangeList([SequentialRange.from_bits(start_bit, start_bit + 1)])
 
     def __safe_repr__(self):
         return "{0}.bits[{1}]".format(safe_repr(self.parent_range_ref), safe_repr(self.ref))
@@ -144,32 +144,37 @@ class BitSliceRangeReference(BitRangeReference):
         range_list = self.parent_range_ref.deref(ctx)
         assert len(range_list) >= 1
 
-        bit_range = SequentialRange(float(self.start.deref(ctx)) / 8, float(self.stop.deref(ctx)) / 8)
+        start_bit, stop_bit = self.start.deref(ctx), self.stop.deref(ctx)
+        bit_range = SequentialRange.from_bits(int(start_bit) if start_bit is not None else 0,
+                                              int(stop_bit) if stop_bit is not None else None)
 
-        i, sum_length = range_list.find_relative_container_index(bit_range.start)
-        if i is None:
-            raise ValueError("Bit offset {0} is out of range for range sequence {1!r}".format(
-                int(bit_range.start * 8), range_list))
+        container = range_list.find_relative_container_bit_index(bit_range.start_bit)
+        if container is None:
+            raise ValueError("Bit offset {0} is out of range for range sequence {1!r}".format(bit_range.start_bit,
+                                                                                              range_list))
+        i, sum_bits = container
+        subrange_start = range_list[i].start_bit + bit_range.start_bit - sum_bits
 
         if bit_range.is_open():
-            subrange_start = range_list[i].start + bit_range.start - sum_length
-            return SequentialRangeList([SequentialRange(subrange_start, range_list[i].stop)] + range_list[i + 1:])
+            return SequentialRangeList([SequentialRange.from_bits(subrange_start, range_list[i].stop_bit)] +
+                                       range_list[i + 1:])
 
-        bit_range_remaining_len = bit_range.byte_length()
+        bit_range_remaining_len = bit_range.bit_length()
         result = []
         for i in range(i, len(range_list)):
             r = range_list[i]
-            subrange_start = r.start + bit_range.start - sum_length
-            if r.is_open() or (r.stop - subrange_start) >= bit_range_remaining_len:
+            if r.stop_bit is None or (r.stop_bit - subrange_start) >= bit_range_remaining_len:
                 subrange_stop = subrange_start + bit_range_remaining_len
             else:
-                subrange_stop = r.stop
+                subrange_stop = r.stop_bit
 
-            result.append(SequentialRange(subrange_start, subrange_stop))
+            result.append(SequentialRange.from_bits(subrange_start, subrange_stop))
 
             bit_range_remaining_len -= (subrange_stop - subrange_start)
             if bit_range_remaining_len == 0:
                 break
+            if i + 1 < len(range_list):
+                subrange_start = range_list[i + 1].start_bit  # continues at the start of the next range
 
         if bit_range_remaining_len > 0:
             raise ValueError("Bit range {0!r} is out of range for parent range {1!r}".format(bit_range, range_list))
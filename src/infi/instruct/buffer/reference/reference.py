@@ -1,3 +1,4 @@
+import sys
 from numbers import Number
 import operator
 
@@ -42,17 +43,34 @@ Reference cycle:
 
 
 class Context(object):
-    """Base class for working with references."""
+    """
+    Base class for working with references.
+
+    :param check_cycles: if False, cyclic references aren't detected while dereferencing. This should only be used when
+                         the reference graph is known to be acyclic (see plan.py).
+    """
 
-    def __init__(self):
+    def __init__(self, check_cycles=True):
         self.cached_results = dict()
-        self.call_nodes = set()
+        self.call_nodes = set() if check_cycles else None
         self.call_stack = []
         self.exception_call_stack = None
+        self._exception = None
 
     def format_exception_call_stack(self):
         return [repr(line) for line in self.exception_call_stack] if self.exception_call_stack is not None else []
 
+    def add_exception_frame(self, ref):
+        """
+        Called while an exception propagates out of `ref.deref` when not checking cycles (so there's no call stack to
+        copy). Builds the exception call stack from the innermost reference outwards.
+        """
+        exception = sys.exc_info()[1]
+        if exception is not self._exception:
+            self._exception = exception
+            self.exception_call_stack = []
+        self.exception_call_stack.insert(0, ref)
+
 
 class Reference(object):
     """
@@ -74,12 +92,22 @@ class Reference(object):
         If the call was already made, it returns a cached result.
         It also makes sure there's no cyclic reference, and if so raises CyclicReferenceError.
         """
+        cached_results = ctx.cached_results
+        if self in cached_results:
+            return cached_results[self]
+
+        if ctx.call_nodes is None:
+            # Cycles were ruled out in advance, so we can skip the bookkeeping.
+            try:
+                result = cached_results[self] = self.evaluate(ctx)
+                return result
+            except:
+                ctx.add_exception_frame(self)
+                raise
+
         if self in ctx.call_nodes:
             raise CyclicReferenceError(ctx, self)
 
-        if self in ctx.cached_results:
-            return ctx.cached_results[self]
-
         try:
             ctx.call_nodes.add(self)
             ctx.call_stack.append(self)
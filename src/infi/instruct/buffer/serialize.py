@@ -5,6 +5,8 @@ from sys import byteorder
 
 from .io_buffer import BitAwareByteArray, BitView
 from .buffer import BufferType
+from .fused import register_struct_marshaller, marshaller_struct_format
+from .numpy_dtype import register_bytes_marshaller
 
 from ..errors import InstructError
 from .._compat import long
@@ -47,6 +49,16 @@ class UnpackError(InstructError):
 ENDIAN_NAME_TO_FORMAT = {'unspecified': '@', 'native': '=', 'big': '>', 'little': '<'}
 
 
+def struct_unpack_from_view(format, buffer, byte_size):
+    """
+    Unpacks a struct format from the beginning of buffer. If buffer is a view that starts on a byte boundary we read
+    directly from the underlying buffer at the view's offset instead of copying the bytes out of it.
+    """
+    if isinstance(buffer, BitView) and buffer.start_bit % 8 == 0 and buffer.bit_length() >= byte_size * 8:
+        return struct.unpack_from(format, buffer.buffer, buffer.start_bit // 8)
+    return struct.unpack(format, buffer[0:byte_size].to_bytes())
+
+
 #
 # integer support
 #
@@ -101,7 +113,7 @@ def unpack_struct_int(buffer, format_char, **kwargs):
     format = format_from_struct_int_arguments(format_char, kwargs)
     byte_size = struct.calcsize(format)
     assert len(buffer) >= byte_size, "buffer size must be at least {0} but instead got {1}".format(byte_size, len(buffer))
-    return struct.unpack(format, buffer[0:byte_size].to_bytes())[0], byte_size
+    return struct_unpack_from_view(format, buffer, byte_size)[0], byte_size
 
 STRUCT_INT_UNPACKERS = {
     1: keep_kwargs_partial(unpack_struct_int, format_char='b'),
@@ -119,6 +131,18 @@ def unpack_int(buffer, **kwargs):
         byte_size = kwargs.pop('byte_size', buffer.length())
         return unpack_bit_int(buffer, byte_size, **kwargs)
 
+
+STRUCT_INT_FORMAT_CHARS = {1: 'b', 2: 'h', 4: 'l', 8: 'q'}
+
+
+def struct_int_format(kwargs):
+    byte_size = kwargs.get("byte_size", None)
+    if byte_size not in STRUCT_INT_FORMAT_CHARS:
+        return None
+    return format_from_struct_int_arguments(STRUCT_INT_FORMAT_CHARS[byte_size], kwargs)
+
+register_struct_marshaller(pack_int, unpack_int, struct_int_format)
+
 #
 # float support
 #
@@ -153,7 +177,7 @@ def unpack_struct_float(buffer, format_char, **kwargs):
     format = format_from_struct_float_arguments(format_char, kwargs)
     byte_size = struct.calcsize(format)
     assert len(buffer) >= byte_size, "buffer size must be at least {0} but instead got {1}".format(byte_size, len(buffer))
-    return struct.unpack(format, buffer[0:byte_size].to_bytes())[0], byte_size
+    return struct_unpack_from_view(format, buffer, byte_size)[0], byte_size
 
 
 def unpack_float(buffer, **kwargs):
@@ -165,9 +189,22 @@ def unpack_float(buffer, **kwargs):
 
 STRUCT_FLOAT_UNPACKERS = {
     4: keep_kwargs_partial(unpack_struct_float, format_char='f'),
-    8: keep_kwargs_partial(unpack_struct_float, format_char='q')
+    8: keep_kwargs_partial(unpack_struct_float, format_char='d')
 }
 
+STRUCT_FLOAT_FORMAT_CHARS = {4: 'f', 8: 'd'}
+
+
+def struct_float_format(kwargs):
+    byte_size = kwargs.get("byte_size", None)
+    if byte_size is None:
+        byte_size = 4
+    if byte_size not in STRUCT_FLOAT_FORMAT_CHARS:
+        return None
+    return format_from_struct_float_arguments(STRUCT_FLOAT_FORMAT_CHARS[byte_size], kwargs)
+
+register_struct_marshaller(pack_float, unpack_float, struct_float_format)
+
 
 #
 # string support
@@ -219,6 +256,9 @@ def unpack_str(buffer, **kwargs):
     return value, len(buffer)
 
 
+register_bytes_marshaller(pack_str, unpack_str)
+
+
 def pack_json(value, **kwargs):
     return pack_str(json.dumps(value), **kwargs)
 
@@ -279,9 +319,22 @@ def unpack_selector_decorator(selector):
 
 
 def pack_list(list, elem_packer, **kwargs):
+    elem_format = marshaller_struct_format(elem_packer)
+    if elem_format is not None:
+        try:
+            return pack_struct_list(list, elem_format)
+        except struct.error:
+            pass  # let the element packer raise the error
+
+    # We collect the packed elements and join them once at the end, so packing is linear in the list's size.
+    chunks = [elem_packer(o, **kwargs) for o in list]
+    if all(not isinstance(chunk, BitView) or chunk.is_byte_aligned() for chunk in chunks):
+        return bytearray().join(chunk.to_bytearray() if isinstance(chunk, BitView) else chunk for chunk in chunks)
+
+    # Some elements have a fractional byte size, so they have to be concatenated bit by bit.
     result = BitAwareByteArray(bytearray())
-    for o in list:
-        result += elem_packer(o, **kwargs)
+    for chunk in chunks:
+        result.extend(chunk if isinstance(chunk, BitView) else BitView(chunk))
     return result
 
 
@@ -292,11 +345,40 @@ def unpack_list(buffer, elem_unpacker, **kwargs):
 
     result = []
     offset = 0
-    index = 0
-    while offset < buffer.length() and (n is None or index < n):
-        unpacker_kwargs = copy_and_remove_kwargs(kwargs, ('buffer', 'n', 'index', 'container'))
-        item, item_len = elem_unpacker(buffer[offset:byte_size], index=index, n=n, container=result, **unpacker_kwargs)
+    elem_format = marshaller_struct_format(elem_unpacker)
+    if elem_format is not None:
+        result = unpack_struct_list(buffer, elem_format, n)
+        offset = len(result) * struct.calcsize(elem_format)
+    index = len(result)
+
+    # Any elements that weren't unpacked above (e.g. a partial element at the end) go through the element unpacker.
+    # Each element gets a view from the current offset (a cursor) over the buffer, so nothing is copied.
+    buffer_length = buffer.length()
+    stop = buffer.start + (buffer_length if byte_size is None else min(byte_size, buffer_length))
+    unpacker_kwargs = copy_and_remove_kwargs(kwargs, ('buffer', 'n', 'index', 'container'))
+    while offset < buffer_length and (n is None or index < n):
+        item, item_len = elem_unpacker(BitView(buffer.buffer, buffer.start + offset, stop), index=index, n=n,
+                                       container=result, **unpacker_kwargs)
         result.append(item)
         offset += item_len
         index += 1
     return result, offset
+
+
+def pack_struct_list(values, elem_format):
+    """Packs a list of fixed-width ints/floats with a single struct.pack call."""
+    return bytearray(struct.pack("{0}{1}{2}".format(elem_format[0], len(values), elem_format[1:]), *values))
+
+
+def unpack_struct_list(buffer, elem_format, n):
+    """
+    Unpacks as many whole fixed-width ints/floats as possible (up to n) from a byte-aligned buffer with a single
+    struct.unpack_from call.
+    """
+    if not isinstance(buffer, BitView) or buffer.start_bit % 8 != 0:
+        return []
+    count = buffer.bit_length() // (struct.calcsize(elem_format) * 8)
+    if n is not None:
+        count = min(count, n)
+    format = "{0}{1}{2}".format(elem_format[0], count, elem_format[1:])
+    return list(struct.unpack_from(format, buffer.buffer, buffer.start_bit // 8))
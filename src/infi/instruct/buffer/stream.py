@@ -0,0 +1,170 @@
+import os
+import math
+import mmap
+import weakref
+
+from infi.exceptools import chain as chain_exceptions
+
+from .reference import UnpackContext
+from .io_buffer import BitView
+from .fused import static_byte_range
+from .errors import InstructBufferError
+from .._compat import PY2
+
+# Caches the static header size of each Buffer class (see record_header_size).
+_header_sizes = weakref.WeakKeyDictionary()
+
+
+def record_header_size(buffer_type):
+    """
+    Returns the size of the record's static header: the bytes covered by the fields that are always unpacked from a
+    static position. A record can't be shorter than that, so it's the minimum we read before looking at lengths.
+    """
+    if buffer_type not in _header_sizes:
+        stops = [0]
+        for field in buffer_type.__evaluation_plan__.fields:
+            byte_range = static_byte_range(field)
+            if byte_range is not None:
+                stops.append(byte_range[0] + byte_range[1])
+        _header_sizes[buffer_type] = max(stops)
+    return _header_sizes[buffer_type]
+
+
+def record_bytes_needed(buffer_type, data, start=0, stop=None):
+    """
+    Returns the number of bytes needed to unpack the buffer_type record that starts at offset start of data, where
+    only the bytes up to stop (default: the end of data) were received so far.
+
+    If the result is bigger than the number of received bytes, more bytes need to be received before calling this
+    function again - it's the least number of bytes required to learn more about the record's size. Otherwise, it's
+    the record's byte size. Positions are resolved in the plan's order, so the length fields a position depends on are
+    received before the position is calculated.
+    """
+    if stop is None:
+        stop = len(data)
+    length = stop - start
+    byte_size = buffer_type.byte_size
+    if byte_size is not None:
+        return int(math.ceil(byte_size))
+    header_size = record_header_size(buffer_type)
+    if length < header_size:
+        return header_size
+
+    plan = buffer_type.__evaluation_plan__
+    ctx = UnpackContext(buffer_type(), plan.fields, BitView(data, start, stop), check_cycles=not plan.unpack_acyclic,
+                        fields_by_name=buffer_type.__fields_by_name__)
+    record_size = 0
+    for field in plan.unpack_order:
+        try:
+            if not field.unpack_if.deref(ctx):
+                continue
+            position_list = field.unpack_absolute_position_ref.unpack_position_ref.deref(ctx)
+        except:
+            raise chain_exceptions(InstructBufferError("Error while calculating record size", ctx, buffer_type,
+                                                       field.attr_name()))
+        if position_list.is_open():
+            raise ValueError(("{0} can't be read from a stream since field {1} extends to the end of the buffer, so " +
+                              "the record's size is unknown").format(buffer_type, field.attr_name()))
+        stop = int(math.ceil(position_list.max_stop()))
+        if stop > length:
+            return stop
+        record_size = max(record_size, stop)
+    return record_size
+
+
+class RecordReader(object):
+    """
+    Reads successive records of a Buffer class from a binary stream (e.g. a file or a socket's makefile()). The records
+    may be variable-sized - each record's size is learned from its header (length fields, after_ref, etc.) and exactly
+    that many bytes are read into a reusable buffer, so the stream is never read past the current record.
+    """
+    def __init__(self, buffer_type, stream):
+        self.buffer_type = buffer_type
+        self.stream = stream
+        self._buffer = bytearray(max(record_header_size(buffer_type), 64))
+
+    def read(self):
+        """Returns the next record or None if the stream ended. Raises EOFError if it ended in the middle of one."""
+        length = 0
+        record_size = record_bytes_needed(self.buffer_type, self._buffer, 0, length)
+        while record_size > length:
+            if record_size > len(self._buffer):
+                # We allocate a new buffer instead of resizing the current one, which fails if it's still exported.
+                new_buffer = bytearray(max(record_size, len(self._buffer) * 2))
+                new_buffer[:length] = self._buffer[:length]
+                self._buffer = new_buffer
+            bytes_read = self._read_into(length, record_size)
+            if bytes_read == 0:
+                if length == 0:
+                    return None
+                raise EOFError("stream ended in the middle of a {0} record ({1} bytes out of at least {2})".format(
+                               self.buffer_type, length, record_size))
+            length += bytes_read
+            record_size = record_bytes_needed(self.buffer_type, self._buffer, 0, length)
+
+        obj = self.buffer_type()
+        obj.unpack(BitView(self._buffer, 0, record_size))
+        if self.buffer_type.__lazy__:
+            self._buffer = bytearray(len(self._buffer))  # the object keeps a reference to the buffer
+        else:
+            obj._unpack_all_lazy_fields()  # lazy Buffers nested in it must not refer to the reused buffer
+        return obj
+
+    def _read_into(self, start, stop):
+        if hasattr(self.stream, 'readinto'):
+            return self.stream.readinto(memoryview(self._buffer)[start:stop]) or 0
+        data = self.stream.read(stop - start)
+        self._buffer[start:start + len(data)] = data
+        return len(data)
+
+    def __iter__(self):
+        while True:
+            obj = self.read()
+            if obj is None:
+                return
+            yield obj
+
+
+def iter_from_stream(buffer_type, stream):
+    """Yields the records of buffer_type read from stream until the stream ends (see RecordReader)."""
+    return iter(RecordReader(buffer_type, stream))
+
+
+def iter_records(buffer_type, data, offset=0):
+    """
+    Yields the buffer_type records packed back to back in data (e.g. a memoryview), starting at offset. Each record is
+    unpacked in place through a view of data, so data isn't copied. Raises EOFError if data ends in the middle of a
+    record.
+    """
+    length = len(data)
+    while offset < length:
+        record_size = record_bytes_needed(buffer_type, data, offset)
+        if offset + record_size > length:
+            raise EOFError("data ends in the middle of a {0} record at {1} ({2} bytes out of at least {3})".format(
+                buffer_type, offset, length - offset, record_size))
+        obj = buffer_type()
+        obj.unpack(BitView(data, offset, offset + record_size))
+        offset += record_size
+        yield obj
+
+
+def scan_mmap(path, buffer_type):
+    """
+    Yields the buffer_type records stored back to back in the file at path (see iter_records). The file is mapped to
+    memory instead of being read, so files larger than the available memory can be scanned. The mapping is closed when
+    the iteration ends, so lazily unpacked records (including the ones nested in other records) are fully decoded
+    before they're yielded.
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return  # empty files can't be mapped
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    view = mapping if PY2 else memoryview(mapping)
+    try:
+        for obj in iter_records(buffer_type, view):
+            obj._unpack_all_lazy_fields()
+            yield obj
+    finally:
+        if not PY2:
+            view.release()
+        mapping.close()
@@ -0,0 +1,249 @@
+"""
+Shows how a Buffer class is packed and unpacked: the position of each field, the fields each field depends on and
+through which references (after_ref, len_ref, total_size, etc.), the fields that have to be packed just to learn their
+size and an estimate of the reference evaluations per pack.
+
+    python -m infi.instruct.explain package.module:ClassName   # explains a class
+    python -m infi.instruct.explain package.module             # summarizes the module's Buffer classes
+
+The same is available with `explain(buffer_type)` and `summarize(buffer_types)`.
+"""
+import sys
+import argparse
+import importlib
+
+from .buffer.buffer import Buffer
+from .buffer.plan import PACK, UNPACK, field_step_refs, field_dependencies, child_refs
+from .buffer.reference import (Context, ObjectReference, FieldReference, FieldOrAttrReference, TotalSizeReference,
+                               AfterFieldReference, LengthFuncCallReference, FuncCallReference,
+                               ContextGetAttrReference)
+from .buffer.reference.range import ByteSliceRangeReference
+from .buffer.field_reference_builder import PackAbsolutePositionReference
+
+
+class FieldExplanation(object):
+    """
+    :ivar name: the field's name
+    :ivar position: the field's position, e.g. "[2:4]" or "dynamic [after(header):]"
+    :ivar is_open: True if the field's range may extend to the end of the buffer, so packing it is needed to learn its
+                   size (e.g. for the positions of the fields after it or for total_size)
+    :ivar pack_dependencies: names of the fields this field depends on when packing
+    :ivar unpack_dependencies: names of the fields this field depends on when unpacking
+    :ivar reference_kinds: the kinds of references the field uses (e.g. after_ref, len_ref, total_size)
+    """
+    def __init__(self, name, position, is_open, pack_dependencies, unpack_dependencies, reference_kinds):
+        self.name = name
+        self.position = position
+        self.is_open = is_open
+        self.pack_dependencies = pack_dependencies
+        self.unpack_dependencies = unpack_dependencies
+        self.reference_kinds = reference_kinds
+
+
+class BufferExplanation(object):
+    """
+    The explanation of a Buffer class. str() returns the printed report.
+
+    :ivar pack_evaluations: estimated number of references evaluated per pack (excluding nested buffers, 0 for fused
+                            classes)
+    :ivar pack_derefs: estimated number of `Reference.deref` calls per pack, including the ones answered by the cache
+    """
+    def __init__(self, buffer_type, fields, pack_evaluations, pack_derefs):
+        self.buffer_type = buffer_type
+        self.fields = fields
+        self.pack_evaluations = pack_evaluations
+        self.pack_derefs = pack_derefs
+
+    def open_fields(self):
+        return [field.name for field in self.fields if field.is_open]
+
+    def __str__(self):
+        buffer_type = self.buffer_type
+        plan = buffer_type.__evaluation_plan__
+        lines = ["{0}.{1}".format(buffer_type.__module__, buffer_type.__name__),
+                 "  byte size: {0}".format("dynamic" if buffer_type.byte_size is None else buffer_type.byte_size),
+                 "  fused struct: {0}".format(buffer_type.__fused_struct__.struct.format
+                                              if buffer_type.__fused_struct__ is not None else "no"),
+                 "  pack order: {0}{1}".format(_names(plan.pack_order),
+                                               "" if plan.pack_acyclic else " (cyclic - checked at runtime)"),
+                 "  unpack order: {0}{1}".format(_names(plan.unpack_order),
+                                                 "" if plan.unpack_acyclic else " (cyclic - checked at runtime)"),
+                 "  estimated per pack: {0} reference evaluations, {1} deref calls{2}".format(
+                     self.pack_evaluations, self.pack_derefs,
+                     " (fused - packed with a single struct.pack)" if buffer_type.__fused_struct__ is not None else ""),
+                 "  fields:"]
+        for field in self.fields:
+            lines.append("    {0}: {1}{2}".format(field.name, field.position,
+                                                  " (open - packed to compute its size)" if field.is_open else ""))
+            if field.pack_dependencies:
+                lines.append("      pack depends on: {0}".format(", ".join(field.pack_dependencies)))
+            if field.unpack_dependencies:
+                lines.append("      unpack depends on: {0}".format(", ".join(field.unpack_dependencies)))
+            if field.reference_kinds:
+                lines.append("      via: {0}".format(", ".join(field.reference_kinds)))
+        return "\n".join(lines)
+
+
+def explain(buffer_type):
+    """Returns a `BufferExplanation` of a Buffer class."""
+    plan = buffer_type.__evaluation_plan__
+    fields = []
+    for field in buffer_type.__all_fields__:
+        position_ref = field.pack_absolute_position_ref.pack_position_ref
+        fields.append(FieldExplanation(
+            field.attr_name(), _format_position(position_ref), _may_be_open(position_ref),
+            _dependency_names(field, plan.fields, PACK), _dependency_names(field, plan.fields, UNPACK),
+            _reference_kinds(field)))
+    pack_evaluations, pack_derefs = _estimate_pack_derefs(buffer_type)
+    return BufferExplanation(buffer_type, fields, pack_evaluations, pack_derefs)
+
+
+def summarize(buffer_types):
+    """Returns a table of the classes, the most expensive (by estimated deref calls per pack) first."""
+    explanations = sorted((explain(buffer_type) for buffer_type in buffer_types), key=lambda e: e.pack_derefs,
+                          reverse=True)
+    lines = ["{0:<40} {1:>7} {2:>6} {3:>8} {4:>12} {5:>10}  {6}".format("class", "fields", "fused", "acyclic",
+                                                                         "evaluations", "derefs", "open fields")]
+    for e in explanations:
+        plan = e.buffer_type.__evaluation_plan__
+        lines.append("{0:<40} {1:>7} {2:>6} {3:>8} {4:>12} {5:>10}  {6}".format(
+            e.buffer_type.__name__, len(e.fields), "yes" if e.buffer_type.__fused_struct__ is not None else "no",
+            "yes" if plan.pack_acyclic and plan.unpack_acyclic else "no", e.pack_evaluations, e.pack_derefs,
+            ", ".join(e.open_fields())))
+    return "\n".join(lines)
+
+
+def _names(fields):
+    return ", ".join(field.attr_name() for field in fields)
+
+
+def _dependency_names(field, fields, mode):
+    dependencies = field_dependencies(field, fields, mode)
+    if len(fields) > 1 and len(dependencies) == len(fields) - 1 and _uses(field, mode, TotalSizeReference):
+        return ["(all fields - total_size)"]
+    return [dependency.attr_name() for dependency in dependencies]
+
+
+def _format_position(position_ref):
+    if not position_ref.is_static():
+        return "dynamic {0!r}".format(position_ref)
+    return " + ".join(_format_range(position) for position in position_ref.deref(Context()))
+
+
+def _format_range(position):
+    start, stop = position.start, position.stop
+    if stop is None:
+        return "[{0}:]".format(start)
+    if int(start) == start and int(stop) == stop:
+        return "[{0}:{1}]".format(int(start), int(stop))
+    if int(start) == int(stop) or int(start) + 1 == stop:
+        return "[{0}].bits[{1}:{2}]".format(int(start), int((start - int(start)) * 8), int((stop - int(start)) * 8))
+    return "[{0}:{1}]".format(start, stop)
+
+
+def _walk(refs, expand):
+    """Yields the references reachable from refs, each once. expand(ref) returns the references to continue with."""
+    visited = set()
+    stack = list(refs)
+    while stack:
+        ref = stack.pop()
+        if id(ref) in visited:
+            continue
+        visited.add(id(ref))
+        yield ref
+        stack.extend(expand(ref))
+
+
+def _may_be_open(position_ref):
+    return any(isinstance(ref, ByteSliceRangeReference) and isinstance(ref.stop, ObjectReference) and
+               ref.stop.obj is None for ref in _walk([position_ref], child_refs))
+
+
+def _local_refs(field, modes):
+    """Yields the references of a field's pack/unpack steps without descending into other fields."""
+    def expand(ref):
+        return [] if isinstance(ref, (FieldReference, TotalSizeReference)) else child_refs(ref)
+    return _walk([ref for mode in modes for ref in field_step_refs(field, mode)], expand)
+
+
+def _uses(field, mode, reference_type):
+    return any(isinstance(ref, reference_type) for ref in _local_refs(field, [mode]))
+
+
+def _reference_kinds(field):
+    kinds = set()
+    for ref in _local_refs(field, [PACK, UNPACK]):
+        if isinstance(ref, AfterFieldReference):
+            kinds.add("after_ref")
+        elif isinstance(ref, LengthFuncCallReference):
+            kinds.add("len_ref")
+        elif isinstance(ref, TotalSizeReference):
+            kinds.add("total_size")
+        elif isinstance(ref, FieldOrAttrReference):
+            kinds.add("self_ref")
+        elif type(ref) is FuncCallReference and any(isinstance(arg, ContextGetAttrReference) for arg in ref.arg_refs):
+            # e.g. member_func_ref or an unpack_selector (GetAttrReference & co. are FuncCallReference subclasses).
+            kinds.add("function of the object (opaque)")
+    return sorted(kinds)
+
+
+def _estimate_pack_derefs(buffer_type):
+    """
+    Estimates the (evaluations, deref calls) of packing buffer_type by walking the reference graph the way pack does.
+    Each reference is evaluated once per pack and later derefs of it are answered from the context's cache. Function
+    calls are opaque, so references they dereference by themselves aren't counted. Fused classes are packed with a
+    single struct.pack and don't evaluate references at all, so they're (0, 0).
+    """
+    if buffer_type.__fused_struct__ is not None:
+        return 0, 0
+    plan = buffer_type.__evaluation_plan__
+    fields_by_name = buffer_type.__fields_by_name__
+
+    def expand(ref):
+        if isinstance(ref, FieldReference):
+            return [ref.pack_value_ref]
+        elif isinstance(ref, FieldOrAttrReference):
+            return [fields_by_name[ref.name]] if ref.name in fields_by_name else []
+        elif isinstance(ref, TotalSizeReference):
+            return [] if buffer_type.byte_size is not None else [f.pack_absolute_position_ref for f in plan.fields]
+        elif isinstance(ref, AfterFieldReference):
+            return [ref.field_ref.pack_absolute_position_ref]
+        elif isinstance(ref, PackAbsolutePositionReference):
+            open_refs = [ref.field.pack_ref] if _may_be_open(ref.pack_position_ref) else []
+            return [ref.pack_position_ref] + open_refs
+        return child_refs(ref)
+
+    evaluations, derefs = set(), 0
+    stack = [ref for field in plan.pack_order for ref in [field.pack_if] + field_step_refs(field, PACK)]
+    while stack:
+        ref = stack.pop()
+        derefs += 1
+        if id(ref) not in evaluations:
+            evaluations.add(id(ref))
+            stack.extend(expand(ref))
+    return len(evaluations), derefs
+
+
+def _load(target):
+    module_name, _, class_name = target.partition(":")
+    module = importlib.import_module(module_name)
+    if class_name:
+        return [getattr(module, class_name)]
+    return [obj for obj in vars(module).values()
+            if isinstance(obj, type) and issubclass(obj, Buffer) and obj.__module__ == module.__name__]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m infi.instruct.explain",
+                                     description="Explains how Buffer classes are packed and unpacked.")
+    parser.add_argument("targets", nargs="+", metavar="module[:ClassName]",
+                        help="a Buffer class to explain or a module whose Buffer classes are summarized")
+    args = parser.parse_args(argv)
+    for target in args.targets:
+        buffer_types = _load(target)
+        print(explain(buffer_types[0]) if ":" in target else summarize(buffer_types))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
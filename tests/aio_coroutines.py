@@ -0,0 +1,40 @@
+"""Coroutines used by test_buffer_aio.py, kept in a separate module since `async def` is a syntax error on Python 2."""
+import asyncio
+import socket
+
+from infi.instruct.buffer.aio import BufferFramedProtocol, BufferWriter
+
+
+async def read_all(buffer_type, data):
+    reader = asyncio.StreamReader()
+    reader.feed_data(data)
+    reader.feed_eof()
+    result = []
+    while True:
+        obj = await buffer_type.read_from(reader)
+        if obj is None:
+            return result
+        result.append(obj)
+
+
+async def loopback(buffer_type, objects):
+    loop = asyncio.get_running_loop()
+    received = []
+    done = loop.create_future()
+
+    def record_received(obj):
+        received.append(obj)
+        if len(received) == len(objects):
+            done.set_result(None)
+
+    server_sock, client_sock = socket.socketpair()
+    transport, _ = await loop.connect_accepted_socket(lambda: BufferFramedProtocol(buffer_type, record_received),
+                                                      server_sock)
+    _, stream_writer = await asyncio.open_connection(sock=client_sock)
+    writer = BufferWriter(stream_writer, coalesce_size=100)
+    writer.writelines(objects)
+    await writer.drain()
+    await done
+    stream_writer.close()
+    transport.close()
+    return received
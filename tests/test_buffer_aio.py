@@ -0,0 +1,64 @@
+from infi.unittest import TestCase, SkipTest
+from infi.instruct._compat import PY2
+from infi.instruct.buffer import (Buffer, be_uint_field, str_field, list_field, bytes_ref, len_ref, num_ref, self_ref,
+                                  total_size)
+
+if not PY2:
+    import asyncio
+    from infi.instruct.buffer.aio import BufferFramedProtocol
+    from aio_coroutines import read_all, loopback
+
+
+class Message(Buffer):
+    length = be_uint_field(where=bytes_ref[0:2], set_before_pack=len_ref(self_ref.body))
+    body = str_field(where=bytes_ref[2:2 + num_ref(self_ref.length)])
+
+
+class AsyncioTestCase(TestCase):
+    def setUp(self):
+        if PY2:
+            raise SkipTest("asyncio support requires Python 3")
+
+    def _messages(self):
+        return [Message(body="message {0}".format(i) * (i % 5)) for i in range(50)]
+
+    def test_read_from(self):
+        messages = self._messages()
+        data = b"".join(message.pack() for message in messages)
+        self.assertEqual([message.body for message in messages],
+                         [message.body for message in asyncio.run(read_all(Message, data))])
+        with self.assertRaises(asyncio.IncompleteReadError):
+            asyncio.run(read_all(Message, data[:-1]))
+
+    def test_framed_protocol(self):
+        received = []
+        protocol = BufferFramedProtocol(Message, received.append)
+        messages = self._messages()
+        data = b"".join(message.pack() for message in messages)
+        for i in range(0, len(data), 7):
+            protocol.data_received(data[i:i + 7])
+        self.assertEqual([message.body for message in messages], [message.body for message in received])
+
+    def test_framed_protocol__nested_lazy(self):
+        class Element(Buffer):
+            __lazy__ = True
+            a = be_uint_field(where=bytes_ref[0:2])
+            s = str_field(where=bytes_ref[2:5])
+
+        class Elements(Buffer):
+            length = be_uint_field(where=bytes_ref[0], set_before_pack=total_size)
+            elements = list_field(where_when_pack=bytes_ref[1:],
+                                  where_when_unpack=bytes_ref[1:num_ref(self_ref.length)], type=Element)
+
+        received = []
+        protocol = BufferFramedProtocol(Elements, received.append)
+        records = [[(i, "ab{0}".format(i)), (i + 10, "cd{0}".format(i))] for i in range(10)]
+        data = b"".join(Elements(elements=[Element(a=a, s=s) for a, s in record]).pack() for record in records)
+        for i in range(0, len(data), 7):
+            protocol.data_received(data[i:i + 7])  # the consumed bytes are dropped from the receive buffer as we go
+        self.assertEqual(records, [[(e.a, e.s) for e in r.elements] for r in received])
+
+    def test_socketpair_loopback(self):
+        messages = self._messages()
+        received = asyncio.run(loopback(Message, messages))
+        self.assertEqual([message.body for message in messages], [message.body for message in received])
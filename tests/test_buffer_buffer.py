@@ -1,10 +1,14 @@
+import copy
+import mmap
 import struct
 from bitarray import bitarray
 from infi.unittest import TestCase
 from infi.instruct.buffer.buffer import Buffer, InstructBufferError
 from infi.instruct.buffer.macros import (int_field, float_field, str_field, buffer_field, list_field,
                                          bytes_ref, total_size, n_uint32, be_int_field, len_ref, self_ref, num_ref,
-                                         json_field, le_int_field)
+                                         json_field, le_int_field, b_int16, l_uint16, after_ref)
+from infi.instruct.buffer.serialize import pack_float, unpack_float
+from infi.instruct.utils.kwargs import keep_kwargs_partial
 from infi.instruct._compat import range, PY2
 
 
@@ -250,6 +254,42 @@ class BufferTestCase(TestCase):
         foo.unpack(struct.pack("=LLLL", 1, 2, 2, 4))
         self.assertEqual([1, 2, 2, 4], foo.f_int_array)
 
+    def test_buffer_pack_unpack__numeric_list(self):
+        class Foo(Buffer):
+            f_len = be_int_field(where=bytes_ref[0:2], set_before_pack=len_ref(self_ref.f_list))
+            f_list = list_field(where=bytes_ref[2:], type=b_int16, n=num_ref(self_ref.f_len))
+
+        values = [(i * 37) % 65536 - 32768 for i in range(10000)]
+        packed = Foo(f_list=values).pack()
+        self.assertEqual(struct.pack(">H10000h", 10000, *values), packed)
+
+        foo = Foo()
+        self.assertEqual(20002, foo.unpack(packed + b"\x00\x00"))
+        self.assertEqual(values, foo.f_list)
+
+        with self.assertRaises(InstructBufferError):
+            Foo(f_list=[40000]).pack()
+
+    def test_buffer_pack_unpack__numeric_list_generic_fallback(self):
+        class Foo(Buffer):
+            f_a = int_field(where=bytes_ref[0].bits[0:4])
+            f_list = list_field(where=bytes_ref[0:3].bits[4:20], type=l_uint16)
+
+        class Bar(Buffer):
+            f_list = list_field(where=bytes_ref[0:], type=(keep_kwargs_partial(pack_float, byte_size=8, endian="big"),
+                                                            keep_kwargs_partial(unpack_float, byte_size=8,
+                                                                                endian="big")))
+
+        foo = Foo()
+        foo.unpack(b"\x21\x43\x65")
+        self.assertEqual([0x5432], foo.f_list)
+        self.assertEqual(1, foo.f_a)
+
+        bar = Bar()
+        bar.unpack(struct.pack(">dd", 1.5, -2.25))
+        self.assertEqual([1.5, -2.25], bar.f_list)
+        self.assertEqual(struct.pack(">dd", 1.5, -2.25), bar.pack())
+
     def test_buffer_pack_unpack__json_field(self):
         class Foo(Buffer):
             json_data = json_field(where=bytes_ref[0:15])
@@ -504,6 +544,34 @@ class BufferTestCase(TestCase):
         with self.assertRaises(InstructBufferError):
             f.unpack(b"\x00\x051234")  # missing one byte
 
+    def test_buffer_unpack_error__message(self):
+        class Foo(Buffer):
+            l = be_int_field(where=bytes_ref[0:2])
+            s = str_field(where=bytes_ref[2:2 + l])
+
+        class ReprCounter(object):
+            calls = 0
+
+            def __repr__(self):
+                ReprCounter.calls += 1
+                return "ReprCounter()"
+
+        with self.assertRaises(InstructBufferError) as context:
+            Foo().unpack(b"\x00\x051234")
+        error = context.exception
+        self.assertEqual(("s", Foo), (error.attr_name, error.clazz))
+
+        counter = ReprCounter()
+        error._cached_results["counter"] = counter  # the message is formatted only when it's needed
+        self.assertEqual(0, ReprCounter.calls)
+        message = str(error)
+        self.assertEqual(1, ReprCounter.calls)
+        self.assertTrue(message.startswith("Unpack error occurred - attribute 's' in class"), message)
+        self.assertIn("=ReprCounter()", message)
+        self.assertIn("Instruct internal call stack:\n    ", message)
+        self.assertIs(message, str(error))
+        self.assertEqual((message,), error.args)
+
     def test_buffer_unpack_non_numeric(self):
         with self.assertRaises(TypeError):
             class Foo(Buffer):
@@ -546,3 +614,319 @@ class BufferTestCase(TestCase):
         f.unpack(b"\x02hell")
         self.assertEquals(f.a, 2)
         self.assertEquals(f.s, "hell")
+
+    def test_buffer_pack_into(self):
+        class Foo(Buffer):
+            a = be_int_field(where=bytes_ref[0:2])
+            b = int_field(where=bytes_ref[2].bits[0:4])
+            c = int_field(where=bytes_ref[2].bits[4:8])
+            s = str_field(where=bytes_ref[4:])
+
+        foo = Foo(a=0x102, b=3, c=4, s="hello")
+        target = bytearray(b"\xff" * 12)
+        self.assertEqual(9, foo.pack_into(target, 2))
+        self.assertEqual(b"\xff\xff" + foo.pack() + b"\xff", target)
+
+        self.assertEqual(9, foo.pack_into(memoryview(target)[1:], 1))
+        self.assertEqual(b"\xff\xff" + foo.pack() + b"\xff", target)
+
+        with self.assertRaises(ValueError):
+            foo.pack_into(target, 4)
+
+    def test_buffer_pack_into__fused(self):
+        class Foo(Buffer):
+            a = be_int_field(where=bytes_ref[0:2])
+            b = be_int_field(where=bytes_ref[3:4])
+
+        self.assertIsNotNone(Foo.__fused_struct__)
+        target = bytearray(b"\xff" * 6)
+        self.assertEqual(4, Foo(a=1, b=2).pack_into(target, 1))
+        self.assertEqual(b"\xff\x00\x01\x00\x02\xff", target)
+
+    def test_buffer_pack_into__mmap(self):
+        class Foo(Buffer):
+            a = be_int_field(where=bytes_ref[0:2], set_before_pack=len_ref(self_ref.s))
+            s = str_field(where=bytes_ref[2:2 + num_ref(self_ref.a)])
+
+        m = mmap.mmap(-1, 16)
+        try:
+            offset = 0
+            for s in ("abc", "de"):
+                offset += Foo(s=s).pack_into(m, offset)
+            self.assertEqual(9, offset)
+            self.assertEqual(b"\x00\x03abc\x00\x02de", m[:offset])
+
+            foo = Foo()
+            self.assertEqual(4, foo.unpack_from(m, 5))
+            self.assertEqual("de", foo.s)
+        finally:
+            m.close()
+
+    def test_buffer_unpack_from(self):
+        class Foo(Buffer):
+            a = be_int_field(where=bytes_ref[0:2])
+            b = be_int_field(where=bytes_ref[2:4])
+
+        class Bar(Buffer):
+            a = be_int_field(where=bytes_ref[0:2])
+            s = str_field(where=bytes_ref[2:2 + num_ref(self_ref.a)])
+
+        data = b"\xff\x00\x01\x00\x02\x00\x02hi"
+        foo = Foo()
+        self.assertEqual(4, foo.unpack_from(data, 1))
+        self.assertEqual((1, 2), (foo.a, foo.b))
+
+        bar = Bar()
+        self.assertEqual(4, bar.unpack_from(bytearray(data), 5))
+        self.assertEqual("hi", bar.s)
+
+        for offset in (-1, len(data) + 1):
+            with self.assertRaises(ValueError):
+                foo.unpack_from(data, offset)
+
+    def test_buffer_unpack_many__fused(self):
+        class Foo(Buffer):
+            a = be_int_field(where=bytes_ref[0:2])
+            b = le_int_field(where=bytes_ref[2:3])
+
+        self.assertIsNotNone(Foo.__fused_struct__)
+        data = b"\xff" + b"".join(Foo(a=i, b=-i).pack() for i in range(100))
+        foos = Foo.unpack_many(memoryview(data)[1:])
+        self.assertEqual(100, len(foos))
+        self.assertEqual([(i, -i) for i in range(100)], [(foo.a, foo.b) for foo in foos])
+
+        self.assertEqual([0, 1], [foo.a for foo in Foo.iter_unpack(data[1:], count=2)])
+        with self.assertRaises(ValueError):
+            Foo.unpack_many(data)
+        with self.assertRaises(ValueError):
+            Foo.unpack_many(data, count=101)
+        with self.assertRaises(ValueError):
+            Foo.iter_unpack(data)  # raised by the call itself, before iterating
+
+    def test_buffer_unpack_many__generic(self):
+        class Foo(Buffer):
+            a = int_field(where=bytes_ref[0].bits[0:4])
+            b = int_field(where=bytes_ref[0].bits[4:8])
+            s = str_field(where=bytes_ref[1:3])
+
+        self.assertIsNone(Foo.__fused_struct__)
+        foos = Foo.unpack_many(b"\x21ab\x43cd")
+        self.assertEqual([(1, 2, "ab"), (3, 4, "cd")], [(foo.a, foo.b, foo.s) for foo in foos])
+
+    def test_buffer_unpack_many__dynamic_size(self):
+        class Foo(Buffer):
+            s = str_field(where=bytes_ref[0:])
+
+        with self.assertRaises(TypeError):
+            Foo.unpack_many(b"abc")
+        with self.assertRaises(TypeError):
+            Foo.iter_unpack(b"abc")
+
+    def test_buffer_unpack_lazy(self):
+        class Foo(Buffer):
+            f_a = be_int_field(where=bytes_ref[0])
+            f_len = be_int_field(where=bytes_ref[1])
+            f_str = str_field(where=bytes_ref[2:2 + num_ref(self_ref.f_len)])
+            f_b = be_int_field(where=bytes_ref[after_ref(f_str):after_ref(f_str) + 4])
+
+        # f_b is beyond the end of the buffer, so decoding it fails - but we never touch it.
+        foo = Foo.unpack_lazy(b"\x07\x03abc")
+        self.assertEqual(["f_a", "f_b", "f_len", "f_str"], sorted(foo._lazy_unpack_context.lazy_fields))
+        self.assertEqual("abc", foo.f_str)
+        self.assertEqual(["f_a", "f_b"], sorted(foo._lazy_unpack_context.lazy_fields))
+        self.assertEqual(3, foo.f_len)
+        with self.assertRaises(InstructBufferError):
+            foo.f_b
+
+        foo = Foo.unpack_lazy(b"\x07\x03abc\x00\x00\x00\x01")
+        foo.f_len = 5  # assigning a field that another field depends on doesn't change how the other field is decoded
+        self.assertEqual("abc", foo.f_str)
+        self.assertEqual(5, foo.f_len)
+        self.assertEqual(1, foo.f_b)
+        self.assertEqual(7, foo.f_a)
+        self.assertIsNone(foo._lazy_unpack_context)
+
+    def test_buffer_unpack_lazy__copy(self):
+        class Foo(Buffer):
+            f_a = be_int_field(where=bytes_ref[0])
+            f_len = be_int_field(where=bytes_ref[1])
+            f_str = str_field(where=bytes_ref[2:2 + num_ref(self_ref.f_len)])
+
+        for copy_func in (copy.copy, copy.deepcopy):
+            foo = Foo.unpack_lazy(b"\x07\x03abc")
+            foo.f_a = 8
+            other = copy_func(foo)
+            self.assertIsNone(other._lazy_unpack_context)
+            self.assertEqual((8, 3, "abc"), (other.f_a, other.f_len, other.f_str))
+            other.f_str = "x"
+            self.assertEqual((8, 3, "abc"), (foo.f_a, foo.f_len, foo.f_str))
+
+        class Bar(Buffer):
+            __compact__ = True
+            f_a = be_int_field(where=bytes_ref[0])
+
+        self.assertEqual(5, copy.deepcopy(Bar(f_a=5)).f_a)
+
+    def test_buffer_unpack_lazy__class_attribute(self):
+        class Foo(Buffer):
+            __lazy__ = True
+            f_a = be_int_field(where=bytes_ref[0], set_after_unpack=lambda value: calls.append(value))
+            f_b = be_int_field(where=bytes_ref[1].bits[0:4])
+            f_c = be_int_field(where=bytes_ref[1].bits[4:8], unpack_if=self_ref.f_a)
+
+        calls = []
+        foo = Foo()
+        self.assertEqual(2, foo.unpack(b"\x00\x21"))
+        self.assertEqual([0], calls)  # set_after_unpack hooks are called right away
+        self.assertEqual(["f_b", "f_c"], sorted(foo._lazy_unpack_context.lazy_fields))
+        self.assertIsNone(foo.f_c)
+        self.assertEqual(1, foo.f_b)
+        self.assertIsNone(foo._lazy_unpack_context)
+
+    def test_buffer_unpack_lazy__class_attribute_dynamic_size(self):
+        class Foo(Buffer):
+            __lazy__ = True
+            f_len = be_int_field(where=bytes_ref[0], set_before_pack=len_ref(self_ref.f_str))
+            f_str = str_field(where=bytes_ref[1:1 + num_ref(self_ref.f_len)])
+
+        class Bar(Buffer):
+            f_foos = list_field(where=bytes_ref[0:], type=Foo)
+
+        class Baz(Buffer):
+            f_foo = buffer_field(where=bytes_ref[0:], type=Foo)
+
+        foo = Foo()
+        self.assertEqual(3, foo.unpack(b"\x02ab"))
+        self.assertIsNone(foo._lazy_unpack_context)
+        bar = Bar()
+        bar.unpack(b"\x02ab\x01c")
+        self.assertEqual(["ab", "c"], [item.f_str for item in bar.f_foos])
+        baz = Baz()
+        baz.unpack(b"\x02ab")
+        self.assertEqual("ab", baz.f_foo.f_str)
+
+    def test_buffer_unpack__fields(self):
+        class Foo(Buffer):
+            f_status = be_int_field(where=bytes_ref[0])
+            f_len = be_int_field(where=bytes_ref[1], set_before_pack=len_ref(self_ref.f_str))
+            f_str = str_field(where=bytes_ref[2:2 + num_ref(self_ref.f_len)])
+            f_gen = be_int_field(where=bytes_ref[after_ref(f_str):after_ref(f_str) + 4], unpack_if=self_ref.f_status)
+            f_junk = be_int_field(where=bytes_ref[after_ref(f_gen):after_ref(f_gen) + 4])
+
+        # f_junk can't be unpacked since the buffer is too short, but we don't need it.
+        data = b"\x01\x03abc\x00\x00\x00\x05"
+        foo = Foo()
+        self.assertIsNone(foo.unpack(data, fields=("f_gen",)))
+        self.assertEqual((1, 3, "abc", 5, None), (foo.f_status, foo.f_len, foo.f_str, foo.f_gen, foo.f_junk))
+
+        foo = Foo()
+        foo.unpack(data, fields=("f_status",))
+        self.assertEqual((1, None, None), (foo.f_status, foo.f_len, foo.f_str))
+
+        with self.assertRaises(AssertionError):
+            foo.unpack(data, fields=("f_nonexistent",))
+
+    def test_buffer_compact(self):
+        class Foo(Buffer):
+            __compact__ = True
+            f_a = int_field(where=bytes_ref[0:2], default=7)
+            f_len = int_field(where=bytes_ref[2], set_before_pack=len_ref(self_ref.f_str))
+            f_str = str_field(where=bytes_ref[3:3 + num_ref(self_ref.f_len)])
+
+        class Bar(Foo):
+            f_b = str_field(where=bytes_ref[after_ref(Foo.f_str):], default="")
+
+        self.assertIs(Foo.__fields_by_name__["f_str"], Foo.f_str)
+        foo = Foo(f_str="abc")
+        self.assertFalse(hasattr(foo, '__dict__'))
+        self.assertEqual((7, None, "abc"), (foo.f_a, foo.f_len, foo.f_str))
+        with self.assertRaises(AttributeError):
+            foo.f_other = 1
+
+        packed = foo.pack()
+        self.assertEqual(b"\x07\x00\x03abc", packed)
+        other = Foo()
+        self.assertEqual(6, other.unpack(packed))
+        self.assertEqual((7, 3, "abc"), (other.f_a, other.f_len, other.f_str))
+        self.assertEqual((7, 3, "abc"), (lambda o: (o.f_a, o.f_len, o.f_str))(Foo.unpack_lazy(packed)))
+
+        bar = Bar(f_a=1, f_str="x", f_b="yz")
+        self.assertFalse(hasattr(bar, '__dict__'))
+        self.assertEqual(b"\x01\x00\x01xyz", bar.pack())
+        self.assertEqual((1, 1, "x", "yz"), (lambda o: (o.f_a, o.f_len, o.f_str, o.f_b))(Bar.unpack_lazy(bar.pack())))
+
+        with self.assertRaises(AssertionError):
+            Foo(f_other=1)
+
+    def test_buffer_compact__custom_init(self):
+        class Foo(Buffer):
+            __compact__ = True
+            f_a = int_field(where=bytes_ref[0:2], default=7)
+            f_str = str_field(where=bytes_ref[2:5], default="abc")
+
+            def __init__(self, f_a=None):
+                super(Foo, self).__init__(**(dict(f_a=f_a) if f_a is not None else {}))
+
+        self.assertEqual((7, "abc"), (Foo().f_a, Foo().f_str))
+        self.assertEqual(b"\x01\x00abc", Foo(1).pack())
+
+    def test_buffer_compact__inherited_custom_init(self):
+        class Base(Buffer):
+            f_a = int_field(where=bytes_ref[0:2])
+
+            def __init__(self, **kwargs):
+                super(Base, self).__init__(**kwargs)
+                self.f_a = 5
+
+        class Foo(Base):
+            __compact__ = True
+            f_b = int_field(where=bytes_ref[2:4], default=1)
+
+        class Bar(Foo):
+            f_c = int_field(where=bytes_ref[4:6], default=2)
+
+        self.assertEqual(5, Base().f_a)
+        self.assertEqual((5, 1), (Foo().f_a, Foo().f_b))
+        self.assertEqual((5, 1, 2), (Bar().f_a, Bar().f_b, Bar().f_c))
+
+    def test_buffer_compact__fused(self):
+        class Foo(Buffer):
+            __compact__ = True
+            f_a = be_int_field(where=bytes_ref[0:2])
+            f_b = be_int_field(where=bytes_ref[2:4])
+
+        self.assertIsNotNone(Foo.__fused_struct__)
+        self.assertEqual([(1, 2), (3, 4)], [(foo.f_a, foo.f_b) for foo in Foo.unpack_many(b"\x00\x01\x00\x02\x00\x03"
+                                                                                              b"\x00\x04")])
+
+    def test_buffer_static_positions_are_cached(self):
+        class Foo(Buffer):
+            f_a = int_field(where=bytes_ref[0:2])
+            f_len = int_field(where=bytes_ref[2], set_before_pack=len_ref(self_ref.f_str))
+            f_str = str_field(where=bytes_ref[3:3 + num_ref(self_ref.f_len)])
+
+        f_a, f_len, f_str = Foo.__fields__
+        static_position_list = f_a.pack_absolute_position_ref.static_position_list
+        self.assertEqual([(0, 2)], [(r.start, r.stop) for r in static_position_list])
+        self.assertEqual(static_position_list, f_a.unpack_absolute_position_ref.static_position_list)
+        self.assertIsNone(f_str.pack_absolute_position_ref.static_position_list)
+
+        data = Foo(f_a=1, f_str="abc").pack()
+        self.assertEqual(b"\x01\x00\x03abc", bytes(data))
+        foo = Foo()
+        foo.unpack(b"\x01\x00\x02xy")
+        self.assertEqual((1, 2, "xy"), (foo.f_a, foo.f_len, foo.f_str))
+        self.assertEqual([(0, 2)], [(r.start, r.stop) for r in static_position_list])
+
+    def test_buffer_overlapping_positions(self):
+        with self.assertRaises(InstructBufferError):
+            class Foo(Buffer):
+                f_a = int_field(where=bytes_ref[0:2] + bytes_ref[1:3])
+
+        class Bar(Buffer):
+            f_len = int_field(where=bytes_ref[0])
+            f_a = int_field(where=bytes_ref[1:3] + bytes_ref[num_ref(self_ref.f_len):4])
+
+        self.assertEqual(b"\x03\x02\x00\x01", bytes(Bar(f_len=3, f_a=0x10002).pack()))
+        with self.assertRaises(InstructBufferError):
+            Bar(f_len=2, f_a=0x10002).pack()
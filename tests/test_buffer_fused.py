@@ -0,0 +1,127 @@
+import struct
+from infi.unittest import TestCase
+from infi.instruct.buffer.buffer import Buffer, InstructBufferError
+from infi.instruct.buffer.macros import (int_field, uint_field, be_int_field, be_uint_field, le_int_field,
+                                         float_field, str_field, list_field, bytes_ref)
+
+
+class CDB(Buffer):
+    opcode = be_uint_field(where=bytes_ref[0])
+    lba = be_uint_field(where=bytes_ref[2:6])
+    group = be_int_field(where=bytes_ref[6])
+    transfer_length = be_uint_field(where=bytes_ref[7:9])
+    control = be_uint_field(where=bytes_ref[9])
+
+
+class FusedStructTestCase(TestCase):
+    def test_fused_struct__compiled(self):
+        self.assertIsNotNone(CDB.__fused_struct__)
+        self.assertEqual(">B1xLbHB", CDB.__fused_struct__.struct.format)
+        self.assertEqual(10, CDB.__fused_struct__.byte_size)
+
+    def test_fused_struct__pack_unpack(self):
+        cdb = CDB(opcode=0x28, lba=0x12345678, group=-1, transfer_length=8, control=0)
+        packed = cdb.pack()
+        self.assertIsInstance(packed, bytearray)
+        self.assertEqual(struct.pack(">BxIbHB", 0x28, 0x12345678, -1, 8, 0), packed)
+
+        other = CDB()
+        self.assertEqual(10, other.unpack(packed))
+        self.assertEqual((0x28, 0x12345678, -1, 8, 0),
+                         (other.opcode, other.lba, other.group, other.transfer_length, other.control))
+
+    def test_fused_struct__constant_set_before_pack(self):
+        class Read10(Buffer):
+            opcode = be_uint_field(where=bytes_ref[0], set_before_pack=0x28)
+            lba = be_uint_field(where=bytes_ref[2:6])
+            transfer_length = be_uint_field(where=bytes_ref[7:9])
+            control = be_uint_field(where=bytes_ref[9])
+
+        self.assertIsNotNone(Read10.__fused_struct__)
+        cdb = Read10(lba=0x12345678, transfer_length=8, control=0)
+        self.assertEqual(struct.pack(">BxIxHB", 0x28, 0x12345678, 8, 0), cdb.pack())
+        self.assertEqual(0x28, cdb.opcode)
+        cdb.opcode = 0
+        self.assertEqual(b"\x28", cdb.pack()[:1])
+
+    def test_fused_struct__same_result_as_generic_path(self):
+        def make_foo_class():
+            class Foo(Buffer):
+                byte_size = 24
+                f_a = le_int_field(where=bytes_ref[0:2])
+                f_b = uint_field(where=bytes_ref[2])
+                f_c = int_field(where=bytes_ref[4:8])
+                f_d = float_field(where=bytes_ref[8:12])
+                f_e = float_field(where=bytes_ref[12:20])
+            return Foo
+
+        Foo, GenericFoo = make_foo_class(), make_foo_class()
+        GenericFoo.__fused_struct__ = None
+
+        self.assertIsNotNone(Foo.__fused_struct__)
+        values = dict(f_a=-2, f_b=200, f_c=123456, f_d=1.5, f_e=2.25)
+        packed = Foo(**values).pack()
+        self.assertEqual(GenericFoo(**values).pack(), packed)
+        self.assertEqual(24, len(packed))
+
+        foo, generic_foo = Foo(), GenericFoo()
+        self.assertEqual(generic_foo.unpack(packed), foo.unpack(packed))
+        for name, value in values.items():
+            self.assertEqual(value, getattr(foo, name))
+            self.assertEqual(value, getattr(generic_foo, name))
+
+    def test_fused_struct__inheritance(self):
+        class Bar(Buffer):
+            f_a = be_int_field(where=bytes_ref[0:4])
+
+        class Bar2(Bar):
+            f_b = be_int_field(where=bytes_ref[4:8])
+
+        self.assertEqual(">ll", Bar2.__fused_struct__.struct.format)
+        self.assertEqual(struct.pack(">ll", 1, 2), Bar2(f_a=1, f_b=2).pack())
+
+    def test_fused_struct__not_compiled(self):
+        class Bits(Buffer):
+            f_a = be_int_field(where=bytes_ref[0].bits[0:4])
+            f_b = be_int_field(where=bytes_ref[0].bits[4:8])
+
+        class MixedEndian(Buffer):
+            f_a = be_int_field(where=bytes_ref[0:2])
+            f_b = le_int_field(where=bytes_ref[2:4])
+
+        class Hook(Buffer):
+            f_a = be_int_field(where=bytes_ref[0:2], set_before_pack=lambda obj: 5)
+
+        class VarSize(Buffer):
+            f_a = be_int_field(where=bytes_ref[0:2])
+            f_b = str_field(where=bytes_ref[2:])
+
+        class Overlap(Buffer):
+            f_a = be_int_field(where=bytes_ref[0:2])
+            f_b = be_int_field(where=bytes_ref[1:3])
+
+        class OddSize(Buffer):
+            f_a = be_int_field(where=bytes_ref[0:3])
+
+        for cls in (Bits, MixedEndian, Hook, VarSize, Overlap, OddSize):
+            self.assertIsNone(cls.__fused_struct__, cls.__name__)
+
+    def test_fused_struct__errors_fall_back_to_generic_path(self):
+        cdb = CDB(opcode=0x28, lba=0, group=0, transfer_length=0x10000, control=0)
+        with self.assertRaises(InstructBufferError):
+            cdb.pack()
+
+        with self.assertRaises(InstructBufferError):
+            CDB().unpack(b"\x28\x00\x00")
+
+    def test_fused_struct__nested_in_view(self):
+        class Foo(Buffer):
+            f_a = be_int_field(where=bytes_ref[0])
+            f_cdbs = list_field(where=bytes_ref[1:], type=CDB)
+
+        data = b"\x02" + CDB(opcode=1, lba=2, group=3, transfer_length=4, control=5).pack() + \
+            CDB(opcode=6, lba=7, group=8, transfer_length=9, control=10).pack()
+        foo = Foo()
+        self.assertEqual(21, foo.unpack(data))
+        self.assertEqual([(1, 2, 3, 4, 5), (6, 7, 8, 9, 10)],
+                         [(c.opcode, c.lba, c.group, c.transfer_length, c.control) for c in foo.f_cdbs])
@@ -1,8 +1,10 @@
 import random
+from array import array
 from bitarray import bitarray
 from infi.instruct._compat import range, PY2
 from infi.unittest import TestCase
-from infi.instruct.buffer.io_buffer import BitView, BitAwareByteArray
+from infi.instruct.buffer.io_buffer import BitView, BitAwareByteArray, OutputBuffer
+from infi.instruct.buffer.range import SequentialRange, SequentialRangeList
 
 random.seed(0)
 
@@ -218,6 +220,32 @@ class IOBufferTestCase(TestCase):
         bv[2.5:3.5] = BitView([0])
         self.assertEqualBitArrayBitView(self._bitarray_from_bitstring('0000000000000000111111110000'), bv)
 
+    def test_bitview__unaligned_bytes(self):
+        for i in range(0, 100):
+            ba = self._create_random_bit_array()
+            bv = BitView(self._bitarray_to_bytes(ba), stop=float(ba.length()) / 8)
+            start_in_bits = random.choice(range(0, ba.length() + 1))
+            stop_in_bits = random.choice(range(start_in_bits, ba.length() + 1))
+            expected = self._bitarray_to_bytes(ba[start_in_bits:stop_in_bits])
+            bv_slice = bv[float(start_in_bits) / 8:float(stop_in_bits) / 8]
+            self.assertEqual(expected, bv_slice.to_bytearray() if start_in_bits % 8 else bytearray(bv_slice))
+            self.assertEqual(list(expected), list(bv_slice))
+
+    def test_bitview__unaligned_bytes__ipv4_flags(self):
+        # flags (3 bits) & fragment offset (13 bits) of an IPv4 header, as little-endian bit ranges of bytes 6-7.
+        bv = BitView(bytearray(b"\x45\x00\x00\x54\x12\x34\xa5\x5a"))
+        self.assertEqual(bytearray([0xa5 >> 3 | (0x5a << 5) & 0xff, 0x5a >> 3]), bv[6.375:8].to_bytearray())
+        self.assertEqual([0xa5 & 7], list(bv[6:6.375]))
+
+    def test_bitview__bit_offsets(self):
+        bv = BitView(bytearray(b"\x01\x02\x03"))[1.25:2.75]
+        self.assertEqual((10, 22), (bv.start_bit, bv.stop_bit))
+        self.assertEqual((1.25, 2.75), (bv.start, bv.stop))
+        self.assertEqual(12, bv.bit_length())
+        self.assertEqual(1.5, bv.length())
+        self.assertEqual((13, 16), (bv.bit_slice(3, 6).start_bit, bv.bit_slice(3, 6).stop_bit))
+        self.assertEqual(bytearray(b"\xc0\x00"), bv.to_bytearray())
+
     def test_bitview_fetch_small(self):
         bv = BitView(b"\xFF\x00", 0, 6 * 0.125)
         self.assertEquals(bv[0], 63)
@@ -227,6 +255,65 @@ class IOBufferTestCase(TestCase):
         self.assertEquals(a[0], 2)
         self.assertEquals(list(a), [2])
 
+    def test_bitview_slice__no_copy(self):
+        buf = bytearray(b"\x01\x02\x03\x04")
+        bv = BitView(buf)
+        sub = bv[1:3][1:]
+        self.assertIs(buf, sub.buffer)
+        self.assertEqual((2, 3), (sub.start, sub.stop))
+        self.assertEqual(b"\x03", sub.to_bytes())
+        buf[2] = 0xff
+        self.assertEqual(0xff, sub[0])
+
+    def test_bitview_bytes__no_copy(self):
+        if PY2:
+            return
+        data = b"\x01\x02\x03\x04"
+        bv = BitView(data)
+        self.assertIsInstance(bv.buffer, memoryview)
+        self.assertIs(data, bv[1:].buffer.obj)
+        self.assertEqual(bytearray(b"\x02\x03"), bv[1:3].to_bytearray())
+        self.assertEqual([1, 2, 3, 4], list(BitView(memoryview(data))))
+
+    def test_bitview__non_byte_memoryview(self):
+        if PY2:
+            return
+        data = memoryview(array('H', [1, 2]))
+        bv = BitView(data)
+        self.assertEqual(4, len(bv))
+        self.assertEqual(bytes(data), bv.to_bytes())
+        self.assertEqual(bytes(data)[1:4], BitView(data, 1).to_bytes())
+
+    def test_bitawarebytearray_slice__copy(self):
+        buf = BitAwareByteArray(bytearray(b"\x01\x02\x03"))
+        sub = buf[1:]
+        sub[0:1] = 0xff
+        self.assertEqual([1, 2, 3], list(buf))
+        self.assertEqual([0xff, 3], list(sub))
+
+    def test_output_buffer__preallocated(self):
+        buf = bytearray(4)
+        output = OutputBuffer(buf)
+        output.set(b"\x01\x02", SequentialRangeList([SequentialRange(2, 4)]))
+        output.set(b"\x03\x04", SequentialRangeList([SequentialRange(0, 1), SequentialRange(1, 2)]))
+        output.set(BitAwareByteArray(bytearray(b"\x05"), 0, 0.5), SequentialRangeList([SequentialRange(2.5, 3)]))
+        self.assertIs(buf, output.to_bytearray())
+        self.assertEqual(bytearray(b"\x03\x04\x51\x02"), buf)
+
+    def test_output_buffer__preallocated_bits(self):
+        buf = bytearray(b"\xff\xff\xff")
+        output = OutputBuffer(buf)
+        output.set(b"\x05", SequentialRangeList([SequentialRange(0.375, 0.75)]))
+        output.set(BitView(b"\xa5\x01", 0.25, 1.5), SequentialRangeList([SequentialRange(1.75, 3)]))
+        self.assertIs(buf, output.to_bytearray())
+        self.assertEqual(bytearray(b"\xef\x7f\x1a"), buf)
+
+    def test_output_buffer__grow(self):
+        output = OutputBuffer()
+        output.set(b"\x01\x02", SequentialRangeList([SequentialRange(2, 4)]))
+        output.set(BitAwareByteArray(bytearray(b"\x03"), 0, 0.25), SequentialRangeList([SequentialRange(4, 4.25)]))
+        self.assertEqual(bytearray(b"\x00\x00\x01\x02\x03"), output.to_bytearray())
+
     def assertEqualBitArrayBitView(self, ba, bv):
         self.assertEqual(ba.length(), 8 * bv.length())
         ba_bytes = self._bitarray_to_bytes(ba)
@@ -0,0 +1,60 @@
+from infi.unittest import TestCase, SkipTest
+from infi.instruct.buffer import (Buffer, be_uint_field, le_int_field, float_field, str_field, int_field, bytes_ref,
+                                  total_size)
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class Descriptor(Buffer):
+    length = be_uint_field(where=bytes_ref[0:2], set_before_pack=total_size)
+    lba = be_uint_field(where=bytes_ref[4:12])
+    delta = le_int_field(where=bytes_ref[12:14])
+    ratio = float_field(where=bytes_ref[14:18], endian='big')
+    name = str_field(where=bytes_ref[18:22])
+
+
+class NumpyTestCase(TestCase):
+    def setUp(self):
+        if numpy is None:
+            raise SkipTest("NumPy is not installed")
+
+    def test_to_numpy_dtype(self):
+        dtype = Descriptor.to_numpy_dtype()
+        self.assertEqual(22, dtype.itemsize)
+        self.assertEqual(("length", "lba", "delta", "ratio", "name"), dtype.names)
+        self.assertEqual((numpy.dtype(">u8"), 4), dtype.fields["lba"])
+        self.assertEqual((numpy.dtype("<i2"), 12), dtype.fields["delta"])
+        self.assertEqual((numpy.dtype(">f4"), 14), dtype.fields["ratio"])
+        self.assertEqual((numpy.dtype("S4"), 18), dtype.fields["name"])
+
+    def test_unpack_numpy(self):
+        descriptors = [Descriptor(lba=i * 1000, delta=-i, ratio=i / 2.0, name="d{0}".format(i)) for i in range(10)]
+        data = bytearray(b"\xff" * 3) + b"".join(descriptor.pack() for descriptor in descriptors)
+        records = Descriptor.unpack_numpy(data, offset=3)
+        self.assertEqual(10, len(records))
+        self.assertEqual([d.lba for d in descriptors], records.lba.tolist())
+        self.assertEqual([d.delta for d in descriptors], records.delta.tolist())
+        self.assertEqual([d.ratio for d in descriptors], records.ratio.tolist())
+        self.assertEqual([22] * 10, records.length.tolist())
+        self.assertEqual(b"d3  ", records.name[3])
+
+        # The record array is a view over the buffer.
+        data[3 + 22 * 2 + 4:3 + 22 * 2 + 12] = b"\x00" * 7 + b"\x01"
+        self.assertEqual(1, records.lba[2])
+
+    def test_to_numpy_dtype__unsupported(self):
+        class Bits(Buffer):
+            f_a = int_field(where=bytes_ref[0].bits[0:4])
+            f_b = int_field(where=bytes_ref[0].bits[4:8])
+
+        class VarSize(Buffer):
+            f_a = be_uint_field(where=bytes_ref[0:2])
+            f_b = str_field(where=bytes_ref[2:])
+
+        with self.assertRaises(TypeError):
+            Bits.to_numpy_dtype()
+        with self.assertRaises(TypeError):
+            VarSize.to_numpy_dtype()
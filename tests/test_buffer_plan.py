@@ -0,0 +1,89 @@
+from infi.unittest import TestCase
+from infi.instruct.buffer import (Buffer, be_int_field, be_uint_field, str_field, bytes_ref, after_ref, len_ref,
+                                  self_ref, total_size)
+from infi.instruct.buffer.plan import PACK, UNPACK, field_dependencies
+
+
+def chained_buffer_class(n):
+    # Each field is placed after the field with the next index, so in dir() order fields come before their dependencies.
+    attrs = dict()
+    prev_field = attrs["f_{0:04}".format(n)] = be_uint_field(where=bytes_ref[0])
+    for i in range(n - 1, -1, -1):
+        prev_field = attrs["f_{0:04}".format(i)] = be_uint_field(where=bytes_ref[after_ref(prev_field)])
+    return type("Chained", (Buffer,), attrs)
+
+
+class EvaluationPlanTestCase(TestCase):
+    def test_plan__dependencies_first(self):
+        class Foo(Buffer):
+            a_data = str_field(where=bytes_ref[after_ref(self_ref.b_len):])
+            b_len = be_int_field(where=bytes_ref[0])
+
+        plan = Foo.__evaluation_plan__
+        self.assertEqual(["b_len", "a_data"], [field.attr_name() for field in plan.unpack_order])
+        self.assertEqual(["b_len", "a_data"], [field.attr_name() for field in plan.pack_order])
+        self.assertTrue(plan.pack_acyclic)
+        self.assertTrue(plan.unpack_acyclic)
+
+    def test_plan__unpack_after(self):
+        class Foo(Buffer):
+            a = be_int_field(where=bytes_ref[0])
+            b = be_int_field(where=bytes_ref[1])
+            c = be_int_field(where=bytes_ref[2], unpack_after=b)
+
+        self.assertEqual(["a", "b", "c"], [field.attr_name() for field in Foo.__evaluation_plan__.unpack_order])
+        self.assertEqual([Foo.b], field_dependencies(Foo.c, Foo.__fields__, UNPACK))
+        self.assertEqual([], field_dependencies(Foo.c, Foo.__fields__, PACK))
+
+    def test_plan__unpack_closure(self):
+        class Foo(Buffer):
+            a = be_int_field(where=bytes_ref[0])
+            b = be_int_field(where=bytes_ref[1])
+            c = str_field(where=bytes_ref[2:3], unpack_after=b)
+
+        plan = Foo.__evaluation_plan__
+        self.assertEqual(["b", "c"], [field.attr_name() for field in plan.unpack_closure([Foo.c])])
+        self.assertIs(plan.unpack_closure([Foo.c, Foo.b]), plan.unpack_closure([Foo.b, Foo.c]))
+        self.assertEqual(2, len(plan._unpack_closures))
+
+        self.assertEqual(["a", "b", "c"], [field.attr_name() for field in plan.unpack_closure([Foo.a, Foo.c], False)])
+        self.assertEqual(2, len(plan._unpack_closures))
+
+        foo = Foo.unpack_lazy(b"\x01\x02x")
+        self.assertEqual(2, foo.b)
+        cached_closures = len(plan._unpack_closures)
+        foo._unpack_all_lazy_fields()  # decodes the fields left undecoded without caching their closure
+        self.assertEqual((1, 2, "x"), (foo.a, foo.b, foo.c))
+        self.assertEqual(cached_closures, len(plan._unpack_closures))
+
+    def test_plan__total_size(self):
+        class Foo(Buffer):
+            length = be_int_field(where=bytes_ref[0], set_before_pack=total_size)
+            data = str_field(where=bytes_ref[1:])
+
+        self.assertEqual(["data", "length"], [field.attr_name() for field in Foo.__evaluation_plan__.pack_order])
+        self.assertEqual(b"\x06hello", Foo(data="hello").pack())
+
+    def test_plan__cyclic_fields_fall_back_to_runtime_checks(self):
+        class Foo(Buffer):
+            length = be_int_field(where=bytes_ref[0], set_before_pack=len_ref(self_ref.data))
+            data = str_field(where=bytes_ref[1:length + 1])
+
+        plan = Foo.__evaluation_plan__
+        self.assertFalse(plan.pack_acyclic)
+        self.assertTrue(plan.unpack_acyclic)
+
+        foo = Foo(data="hello")
+        self.assertEqual(b"\x05hello", foo.pack())
+        foo = Foo()
+        foo.unpack(b"\x03abcdef")
+        self.assertEqual("abc", foo.data)
+
+    def test_plan__long_after_ref_chain(self):
+        n = 500
+        data = bytearray(i % 256 for i in range(n + 1))
+        Chained = chained_buffer_class(n)
+        obj = Chained()
+        self.assertEqual(n + 1, obj.unpack(data))
+        self.assertEqual(n % 256, obj.f_0000)
+        self.assertEqual(data, obj.pack())
@@ -0,0 +1,48 @@
+from infi.unittest import TestCase
+from infi.instruct.buffer import Buffer, be_uint_field, str_field, buffer_field, bytes_ref, len_ref, num_ref, self_ref
+from infi.instruct.buffer.reference import Reference
+from infi.instruct.buffer.io_buffer import OutputBuffer
+from infi.instruct.buffer.profiling import profile_buffers, PACK, UNPACK
+
+
+class Inner(Buffer):
+    name_length = be_uint_field(where=bytes_ref[0], set_before_pack=len_ref(self_ref.name))
+    name = str_field(where=bytes_ref[1:1 + num_ref(self_ref.name_length)])
+
+
+class Outer(Buffer):
+    flags = be_uint_field(where=bytes_ref[0].bits[0:4])
+    inner = buffer_field(type=Inner, where=bytes_ref[1:])
+
+
+class ProfilingTestCase(TestCase):
+    def test_profile_buffers(self):
+        obj = Outer(flags=3, inner=Inner(name="abc"))
+        with profile_buffers() as profile:
+            data = obj.pack()
+            Outer().unpack(data)
+
+        self.assertEqual(b"\x03\x03abc", data)
+        self.assertEqual(1, profile.class_stats[(Outer, PACK)][0])
+        self.assertEqual(1, profile.class_stats[(Outer, UNPACK)][0])
+        self.assertEqual(1, profile.class_stats[(Inner, UNPACK)][0])
+        for key in [(Outer, "flags", PACK), (Outer, "inner", PACK), (Inner, "name", PACK),
+                    (Outer, "flags", UNPACK), (Outer, "inner", UNPACK), (Inner, "name_length", UNPACK)]:
+            calls, seconds = profile.field_stats[key]
+            self.assertEqual(1, calls, key)
+            self.assertGreaterEqual(seconds, 0, key)
+        self.assertGreater(profile.deref_evaluations, 0)
+        self.assertGreater(profile.deref_cache_hits, 0)
+        self.assertEqual(4 + 0.5 + 4, profile.bytes_set)  # Inner, then Outer's 4-bit flags and packed Inner
+        self.assertIn("Outer.inner", profile.format())
+
+    def test_profile_buffers__hooks_are_removed(self):
+        originals = [Buffer.__dict__["pack"], Buffer.__dict__["_unpack_field"], Reference.__dict__["deref"],
+                     OutputBuffer.__dict__["set"]]
+        with profile_buffers():
+            self.assertIsNot(originals[0], Buffer.__dict__["pack"])
+            with self.assertRaises(RuntimeError):
+                with profile_buffers():
+                    pass
+        self.assertEqual(originals, [Buffer.__dict__["pack"], Buffer.__dict__["_unpack_field"],
+                                     Reference.__dict__["deref"], OutputBuffer.__dict__["set"]])
@@ -67,6 +67,42 @@ class RangeTestCase(TestCase):
         self.assertTrue(SequentialRangeList([ SequentialRange(1, 4), SequentialRange(0, 5) ]).has_overlaps())
         self.assertFalse(SequentialRangeList([ SequentialRange(0, 4), SequentialRange(4, 5) ]).has_overlaps())
         self.assertFalse(SequentialRangeList([ SequentialRange(3, 4), SequentialRange(1, 3) ]).has_overlaps())
+        self.assertFalse(SequentialRangeList([ SequentialRange(3, None) ]).has_overlaps())
+        self.assertFalse(SequentialRangeList().has_overlaps())
+
+    def test_bit__slice_spanning_ranges(self):
+        range1 = bytes_ref[0, 4].bits[4:12]
+        self.assertEqualRangeList([ (0.5, 1), (4, 4.5) ], range1.deref(Context()))
+
+    def test_bit__open_slice(self):
+        range1 = bytes_ref[2:].bits[3:]
+        self.assertEqualRangeList([ (2.375, None) ], range1.deref(Context()))
+
+    def test_sequential_range__bits(self):
+        r = SequentialRange(2, 3.5)
+        self.assertEqual((16, 28), (r.start_bit, r.stop_bit))
+        self.assertEqual(12, r.bit_length())
+        self.assertEqual(1.5, r.byte_length())
+        self.assertIsInstance(r.start, int)
+        self.assertEqual(r, SequentialRange.from_bits(16, 28))
+        self.assertTrue(r.contains(3.375))
+        self.assertFalse(r.contains(3.5))
+
+    def test_sequential_range__assign_start_stop(self):
+        r = SequentialRange(2, 3)
+        r.start, r.stop = 1.5, 4
+        self.assertEqual((12, 32), (r.start_bit, r.stop_bit))
+        self.assertEqual((1.5, 4), (r.start, r.stop))
+        r.stop = None
+        self.assertTrue(r.is_open())
+
+    def test_sequential_range__large_bit_offset(self):
+        start_bit = 2 ** 60 + 1
+        r = SequentialRange.from_bits(start_bit, start_bit + 3)
+        self.assertEqual(3, r.bit_length())
+        self.assertEqual(3, SequentialRangeList([r]).bit_length())
+        self.assertTrue(r.overlaps(SequentialRange.from_bits(start_bit + 2, start_bit + 8)))
+        self.assertFalse(r.overlaps(SequentialRange.from_bits(start_bit + 3, start_bit + 8)))
 
     def assertEqualRangeList(self, a, b):
         self.assertEqual([ slice(s[0], s[1], 1) for s in a ], [ r.to_slice() for r in b ])
@@ -0,0 +1,156 @@
+import os
+import shutil
+import tempfile
+from io import BytesIO
+from infi.unittest import TestCase
+from infi.instruct.buffer import (Buffer, be_uint_field, str_field, list_field, bytes_ref, len_ref, num_ref, self_ref,
+                                  buffer_field, total_size, b_uint16, after_ref, scan_mmap)
+from infi.instruct.buffer.compat import buffer_to_struct_adapter
+from infi.instruct.buffer.stream import RecordReader, record_bytes_needed, record_header_size, iter_records
+
+
+class Record(Buffer):
+    record_length = be_uint_field(where=bytes_ref[0:2], set_before_pack=total_size)
+    name_length = be_uint_field(where=bytes_ref[2], set_before_pack=len_ref(self_ref.name))
+    name = str_field(where=bytes_ref[3:3 + num_ref(self_ref.name_length)])
+    values = list_field(where_when_pack=bytes_ref[after_ref(name):],
+                        where_when_unpack=bytes_ref[after_ref(name):num_ref(self_ref.record_length)], type=b_uint16)
+
+
+class ShortReadStream(object):
+    """A stream that returns at most 3 bytes per read, like a socket or a pipe."""
+    def __init__(self, data):
+        self.stream = BytesIO(data)
+
+    def readinto(self, buffer):
+        data = self.stream.read(min(3, len(buffer)))
+        buffer[:len(data)] = data
+        return len(data)
+
+
+class StreamTestCase(TestCase):
+    def _records(self):
+        return [Record(name="record{0}".format(i), values=list(range(i))) for i in range(20)]
+
+    def test_record_bytes_needed(self):
+        data = Record(name="abc", values=[1, 2]).pack()
+        self.assertEqual(3, record_header_size(Record))
+        self.assertEqual(3, record_bytes_needed(Record, data, 0, 0))
+        self.assertEqual(6, record_bytes_needed(Record, data, 0, 3))
+        self.assertEqual(10, record_bytes_needed(Record, data, 0, 6))
+        self.assertEqual(10, record_bytes_needed(Record, data))
+        self.assertEqual(10, record_bytes_needed(Record, b"junk" + data, 4))
+
+    def test_iter_from_stream(self):
+        records = self._records()
+        data = b"".join(record.pack() for record in records)
+        for stream in (BytesIO(data), ShortReadStream(data)):
+            result = list(Record.iter_from_stream(stream))
+            self.assertEqual([(r.name, r.values) for r in records], [(r.name, r.values) for r in result])
+
+    def test_iter_from_stream__reads_exactly_one_record(self):
+        stream = BytesIO(Record(name="abc", values=[1]).pack() + b"trailer")
+        self.assertEqual("abc", RecordReader(Record, stream).read().name)
+        self.assertEqual(b"trailer", stream.read())
+
+    def test_iter_from_stream__static_size(self):
+        class Foo(Buffer):
+            a = be_uint_field(where=bytes_ref[0:2])
+            b = be_uint_field(where=bytes_ref[2:4])
+
+        data = b"".join(Foo(a=i, b=i * 2).pack() for i in range(100))
+        self.assertEqual([(i, i * 2) for i in range(100)], [(f.a, f.b) for f in Foo.iter_from_stream(BytesIO(data))])
+
+    def test_iter_from_stream__nested_lazy(self):
+        class Element(Buffer):
+            __lazy__ = True
+            a = be_uint_field(where=bytes_ref[0:2])
+            s = str_field(where=bytes_ref[2:5])
+
+        class Elements(Buffer):
+            length = be_uint_field(where=bytes_ref[0], set_before_pack=total_size)
+            elements = list_field(where_when_pack=bytes_ref[1:],
+                                  where_when_unpack=bytes_ref[1:num_ref(self_ref.length)], type=Element)
+
+        records = [[(i, "ab{0}".format(i)), (i + 10, "cd{0}".format(i))] for i in range(3)]
+        data = b"".join(Elements(elements=[Element(a=a, s=s) for a, s in record]).pack() for record in records)
+        result = list(Elements.iter_from_stream(BytesIO(data)))  # the reader reuses its buffer for each record
+        self.assertEqual(records, [[(e.a, e.s) for e in r.elements] for r in result])
+
+    def test_iter_from_stream__errors(self):
+        class Foo(Buffer):
+            a = be_uint_field(where=bytes_ref[0:2])
+            s = str_field(where=bytes_ref[2:])
+
+        with self.assertRaises(ValueError):
+            list(Foo.iter_from_stream(BytesIO(b"\x00\x00abc")))
+
+        with self.assertRaises(EOFError):
+            list(Record.iter_from_stream(BytesIO(Record(name="abc", values=[1]).pack()[:-1])))
+
+    def test_create_from_stream(self):
+        adapter = buffer_to_struct_adapter(Record)
+        stream = BytesIO(b"".join(record.pack() for record in self._records()[:2]))
+        self.assertEqual("record0", adapter.create_from_stream(stream).name)
+        self.assertEqual("record1", adapter.create_from_stream(stream).name)
+        with self.assertRaises(EOFError):
+            adapter.create_from_stream(stream)
+
+    def _write_temp_file(self, data):
+        dirname = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, dirname)
+        path = os.path.join(dirname, "records.bin")
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+    def test_scan_mmap(self):
+        records = self._records()
+        path = self._write_temp_file(b"".join(record.pack() for record in records))
+        self.assertEqual([(r.name, r.values) for r in records], [(r.name, r.values) for r in scan_mmap(path, Record)])
+
+    def test_scan_mmap__static_size(self):
+        class Foo(Buffer):
+            a = be_uint_field(where=bytes_ref[0:2])
+            b = be_uint_field(where=bytes_ref[2:4])
+
+        path = self._write_temp_file(b"".join(Foo(a=i, b=i * 2).pack() for i in range(100)))
+        self.assertEqual([(i, i * 2) for i in range(100)], [(f.a, f.b) for f in scan_mmap(path, Foo)])
+        self.assertEqual([], list(scan_mmap(self._write_temp_file(b""), Foo)))
+
+    def test_scan_mmap__lazy(self):
+        class Element(Buffer):
+            __lazy__ = True
+            a = be_uint_field(where=bytes_ref[0:2])
+            s = str_field(where=bytes_ref[2:4])
+
+        class Page(Buffer):
+            __lazy__ = True
+            element = buffer_field(where=bytes_ref[0:4], type=Element)
+            b = be_uint_field(where=bytes_ref[4:6])
+
+        class Outer(Buffer):
+            length = be_uint_field(where=bytes_ref[0], set_before_pack=total_size)
+            element = buffer_field(where=bytes_ref[1:5], type=Element)
+            name = str_field(where_when_pack=bytes_ref[5:], where_when_unpack=bytes_ref[5:num_ref(self_ref.length)])
+
+        path = self._write_temp_file(b"".join(Page(element=Element(a=i, s="ab"), b=i * 2).pack() for i in range(10)))
+        pages = list(scan_mmap(path, Page))  # the mapping is closed, so the records must not refer to it
+        self.assertEqual([(i, "ab", i * 2) for i in range(10)], [(p.element.a, p.element.s, p.b) for p in pages])
+
+        path = self._write_temp_file(b"".join(Outer(element=Element(a=i, s="cd"), name="x" * i).pack()
+                                              for i in range(3)))
+        records = list(scan_mmap(path, Outer))
+        self.assertEqual([(0, "cd", ""), (1, "cd", "x"), (2, "cd", "xx")],
+                         [(r.element.a, r.element.s, r.name) for r in records])
+
+    def test_scan_mmap__truncated(self):
+        path = self._write_temp_file(Record(name="abc", values=[1]).pack() + b"\x00")
+        records = scan_mmap(path, Record)
+        self.assertEqual("abc", next(records).name)
+        with self.assertRaises(EOFError):
+            next(records)
+
+    def test_iter_records__offset(self):
+        data = b"junk" + Record(name="abc", values=[1]).pack() + Record(name="de", values=[]).pack()
+        self.assertEqual(["abc", "de"], [r.name for r in iter_records(Record, memoryview(data), 4)])
@@ -0,0 +1,80 @@
+import sys
+from six import StringIO
+from infi.unittest import TestCase
+from infi.instruct.buffer import (Buffer, be_uint_field, str_field, list_field, bytes_ref, len_ref, num_ref, self_ref,
+                                  total_size, after_ref, member_func_ref, b_uint16)
+from infi.instruct.explain import explain, summarize, main
+
+
+class Header(Buffer):
+    opcode = be_uint_field(where=bytes_ref[0])
+    flags = be_uint_field(where=bytes_ref[1].bits[4:8])
+
+
+class FusedHeader(Buffer):
+    opcode = be_uint_field(where=bytes_ref[0])
+    length = be_uint_field(where=bytes_ref[1:3])
+
+
+class Page(Buffer):
+    def _count(self):
+        return len(self.values)
+
+    page_length = be_uint_field(where=bytes_ref[0:2], set_before_pack=total_size - 2)
+    name_length = be_uint_field(where=bytes_ref[2], set_before_pack=len_ref(self_ref.name))
+    name = str_field(where=bytes_ref[3:3 + num_ref(self_ref.name_length)])
+    values = list_field(where=bytes_ref[after_ref(name):], type=b_uint16, n=member_func_ref(_count))
+
+
+class ExplainTestCase(TestCase):
+    def test_explain(self):
+        explanation = explain(Page)
+        fields = dict((field.name, field) for field in explanation.fields)
+
+        self.assertEqual("[0:2]", fields["page_length"].position)
+        self.assertEqual(["(all fields - total_size)"], fields["page_length"].pack_dependencies)
+        self.assertEqual(["total_size"], fields["page_length"].reference_kinds)
+
+        self.assertEqual(["name"], fields["name_length"].pack_dependencies)
+        self.assertEqual(["len_ref", "self_ref"], fields["name_length"].reference_kinds)
+
+        self.assertEqual("dynamic [3:(3 + numeric(field_or_attr_ref('name_length')))]", fields["name"].position)
+        self.assertEqual(["name_length"], fields["name"].unpack_dependencies)
+        self.assertFalse(fields["name"].is_open)
+
+        self.assertTrue(fields["values"].is_open)
+        self.assertEqual(["values"], explanation.open_fields())
+        self.assertEqual(["name"], fields["values"].pack_dependencies)
+        self.assertEqual(["after_ref", "function of the object (opaque)"], fields["values"].reference_kinds)
+
+        self.assertGreater(explanation.pack_derefs, explanation.pack_evaluations)
+        self.assertIn("values: dynamic [after(name):None] (open - packed to compute its size)", str(explanation))
+
+    def test_explain__bits_and_fused(self):
+        fields = dict((field.name, field) for field in explain(Header).fields)
+        self.assertEqual("[0:1]", fields["opcode"].position)
+        self.assertEqual("[1].bits[4:8]", fields["flags"].position)
+        self.assertEqual([], fields["flags"].pack_dependencies)
+
+    def test_explain__fused(self):
+        self.assertIsNotNone(FusedHeader.__fused_struct__)
+        explanation = explain(FusedHeader)
+        self.assertEqual((0, 0), (explanation.pack_evaluations, explanation.pack_derefs))
+        self.assertIn("fused struct: >BH", str(explanation))
+        self.assertIn("0 deref calls (fused - packed with a single struct.pack)", str(explanation))
+
+    def test_summarize(self):
+        lines = summarize([FusedHeader, Header, Page]).splitlines()
+        self.assertEqual(["class", "Page", "Header", "FusedHeader"], [line.split()[0] for line in lines])
+        self.assertEqual(["FusedHeader", "2", "yes", "yes", "0", "0"], lines[-1].split())
+
+    def test_main(self):
+        stdout = sys.stdout
+        sys.stdout = StringIO()
+        try:
+            self.assertEqual(0, main([__name__ + ":Page", __name__]))
+            output = sys.stdout.getvalue()
+        finally:
+            sys.stdout = stdout
+        self.assertIn(__name__ + ".Page\n  byte size: dynamic", output)
+        self.assertIn("\nHeader ", output)